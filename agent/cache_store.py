@@ -0,0 +1,94 @@
+# agent/cache_store.py
+
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+from typing import Any, Optional
+
+log = logging.getLogger(__name__)
+
+
+class SQLiteTTLCache:
+    """
+    Small persistent key/value cache shared by the LLM and search caches.
+
+    - values are JSON, stored in one SQLite table per cache
+    - each entry expires after its TTL (seconds; None = never)
+    - at most max_entries rows: least recently used rows are evicted on write
+    - WAL mode + busy timeout, so concurrent Streamlit sessions/processes can share the file
+    """
+
+    def __init__(self, path: str, table: str = "cache", max_entries: int = 10000, default_ttl: Optional[float] = None):
+        if not table.isidentifier():
+            raise ValueError(f"Invalid cache table name: {table!r}")
+        self.path = path
+        self.table = table
+        self.max_entries = max(1, max_entries)
+        self.default_ttl = default_ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} "
+            "(key TEXT PRIMARY KEY, value TEXT, expires_at REAL, last_used REAL)"
+        )
+        self._db.execute(f"CREATE INDEX IF NOT EXISTS {table}_lru ON {table} (last_used)")
+        self._db.commit()
+
+    def get(self, key: str) -> Optional[Any]:
+        now = time.time()
+        try:
+            with self._lock:
+                row = self._db.execute(f"SELECT value, expires_at FROM {self.table} WHERE key = ?", (key,)).fetchone()
+                if row is None or (row[1] is not None and row[1] < now):
+                    if row is not None:
+                        self._db.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+                        self._db.commit()
+                    self.misses += 1
+                    return None
+                self._db.execute(f"UPDATE {self.table} SET last_used = ? WHERE key = ?", (now, key))
+                self._db.commit()
+                self.hits += 1
+                return json.loads(row[0])
+        except sqlite3.Error as e:
+            # A cache failure must never fail the caller
+            log.warning("[Cache:%s] read failed: %s", self.table, e)
+            return None
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        now = time.time()
+        ttl = self.default_ttl if ttl is None else ttl
+        expires_at = now + ttl if ttl is not None else None
+        try:
+            with self._lock:
+                self._db.execute(
+                    f"INSERT OR REPLACE INTO {self.table} VALUES (?, ?, ?, ?)",
+                    (key, json.dumps(value, ensure_ascii=False), expires_at, now),
+                )
+                self._evict(now)
+                self._db.commit()
+        except sqlite3.Error as e:
+            log.warning("[Cache:%s] write failed: %s", self.table, e)
+
+    def _evict(self, now: float) -> None:
+        self._db.execute(f"DELETE FROM {self.table} WHERE expires_at IS NOT NULL AND expires_at < ?", (now,))
+        overflow = self._db.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0] - self.max_entries
+        if overflow > 0:
+            self._db.execute(
+                f"DELETE FROM {self.table} WHERE key IN "
+                f"(SELECT key FROM {self.table} ORDER BY last_used LIMIT ?)",
+                (overflow,),
+            )
+
+    def clear(self) -> None:
+        with self._lock:
+            self._db.execute(f"DELETE FROM {self.table}")
+            self._db.commit()
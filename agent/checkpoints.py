@@ -0,0 +1,53 @@
+# agent/checkpoints.py
+
+import os
+import logging
+from contextlib import asynccontextmanager
+from typing import Optional
+
+log = logging.getLogger(__name__)
+
+CHECKPOINTS_ENABLED = os.getenv("CHECKPOINTS", "1") != "0"
+CHECKPOINT_PATH = os.getenv("CHECKPOINT_PATH", ".cache/checkpoints.sqlite")
+# Most recent runs kept; older runs' checkpoints are deleted after each finished run
+CHECKPOINT_MAX_THREADS = int(os.getenv("CHECKPOINT_MAX_THREADS", "200"))
+
+
+@asynccontextmanager
+async def open_checkpointer(path: Optional[str] = None):
+    """
+    SQLite checkpointer for one run, or None when CHECKPOINTS=0. Opened per run because
+    an aiosqlite connection belongs to the event loop that opened it.
+    """
+    if not CHECKPOINTS_ENABLED:
+        yield None
+        return
+    from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+
+    path = path or CHECKPOINT_PATH
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    async with AsyncSqliteSaver.from_conn_string(path) as saver:
+        yield saver
+
+
+async def latest_thread(saver, query_key: str) -> Optional[str]:
+    """Thread id of the most recent run whose checkpoints carry metadata query_key."""
+    async for checkpoint in saver.alist(None, filter={"query_key": query_key}, limit=1):
+        return checkpoint.config["configurable"]["thread_id"]
+    return None
+
+
+async def prune_threads(saver, keep: int = CHECKPOINT_MAX_THREADS) -> int:
+    """Deletes every run but the `keep` most recent (checkpoint ids are time-ordered)."""
+    await saver.setup()
+    async with saver.conn.execute(
+        "SELECT thread_id FROM checkpoints GROUP BY thread_id ORDER BY MAX(checkpoint_id) DESC LIMIT -1 OFFSET ?",
+        (max(0, keep),),
+    ) as cursor:
+        stale = [row[0] async for row in cursor]
+    for thread_id in stale:
+        await saver.adelete_thread(thread_id)
+    if stale:
+        log.info("[Checkpoints] pruned %d old runs", len(stale))
+    return len(stale)
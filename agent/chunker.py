@@ -1,31 +1,58 @@
 # agent/chunker.py
 
+import os
+from typing import AsyncIterable, AsyncIterator, Iterable, Iterator
+
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_core.documents import Document
 
-def chunk_text(text, chunk_size=500, chunk_overlap=100):
+CHUNK_SIZE = int(os.getenv("CHUNK_SIZE", "500"))
+CHUNK_OVERLAP = int(os.getenv("CHUNK_OVERLAP", "100"))
+
+def make_splitter(chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP):
     """
-    Splits a string of text into overlapping chunks.
-    Returns a list of LangChain Document objects.
+    Builds the text splitter used for a run. Build it once and pass it to
+    iter_chunks / achunk_stream instead of creating one per call.
     """
-    splitter = RecursiveCharacterTextSplitter(
+    return RecursiveCharacterTextSplitter(
         chunk_size=chunk_size, chunk_overlap=chunk_overlap
     )
+
+def iter_chunks(documents: Iterable[Document], splitter=None) -> Iterator[Document]:
+    """
+    Lazily splits documents, yielding chunks as each document is processed.
+    Every chunk keeps its parent's metadata (source, page, ...).
+    """
+    splitter = splitter or make_splitter()
+    for doc in documents:
+        yield from splitter.split_documents([doc])
+
+async def achunk_stream(batches: AsyncIterable[Iterable[Document]], splitter=None) -> AsyncIterator[Document]:
+    """
+    Async variant of iter_chunks: consumes batches of documents as they arrive
+    (e.g. one batch per finished source) and yields their chunks immediately.
+    """
+    splitter = splitter or make_splitter()
+    async for docs in batches:
+        for chunk in iter_chunks(docs, splitter):
+            yield chunk
+
+def chunk_text(text, chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP):
+    """
+    Splits a string of text into overlapping chunks.
+    Returns a list of LangChain Document objects.
+    """
+    splitter = make_splitter(chunk_size, chunk_overlap)
     docs = splitter.split_documents([Document(page_content=text)])
     return docs
 
-def chunk_documents(documents, chunk_size=500, chunk_overlap=100):
+def chunk_documents(documents, chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP, splitter=None):
     """
     Splits a list of LangChain Document objects into smaller chunks.
     Returns a flat list of new Document objects.
     """
-    splitter = RecursiveCharacterTextSplitter(
-        chunk_size=chunk_size, chunk_overlap=chunk_overlap
-    )
-    all_chunks = []
-    for doc in documents:
-        all_chunks.extend(splitter.split_documents([doc]))
-    return all_chunks
+    splitter = splitter or make_splitter(chunk_size, chunk_overlap)
+    return list(iter_chunks(documents, splitter))
 
 # # Example usage
 # if __name__ == "__main__":
@@ -0,0 +1,122 @@
+# agent/dedupe.py
+
+import os
+import re
+import hashlib
+from typing import Dict, List, Optional
+
+import numpy as np
+from langchain_core.documents import Document
+
+# MinHash / LSH knobs: 64 permutations in 16 bands of 4 rows
+DEDUP_NUM_PERM = 64
+DEDUP_BANDS = 16
+DEDUP_SHINGLE_WORDS = int(os.getenv("DEDUP_SHINGLE_WORDS", "5"))
+DEDUP_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", "0.85"))
+
+_MERSENNE = (1 << 31) - 1  # keeps (a * x + b) inside uint64
+_rng = np.random.default_rng(1234)  # fixed seed → stable signatures across runs
+_PERM_A = _rng.integers(1, _MERSENNE, size=DEDUP_NUM_PERM, dtype=np.uint64)
+_PERM_B = _rng.integers(0, _MERSENNE, size=DEDUP_NUM_PERM, dtype=np.uint64)
+
+
+def _normalize(text: str) -> str:
+    return " ".join(re.findall(r"\w+", (text or "").lower()))
+
+def content_hash(text: str) -> str:
+    """Stable id for a document body (whitespace/case/punctuation-insensitive)."""
+    return hashlib.sha256(_normalize(text).encode("utf-8")).hexdigest()
+
+def _shingles(normalized: str, k: int) -> set:
+    words = normalized.split()
+    if len(words) < k:
+        return set()
+    return {" ".join(words[i:i + k]) for i in range(len(words) - k + 1)}
+
+def minhash_signature(text: str, k: int = DEDUP_SHINGLE_WORDS) -> Optional[np.ndarray]:
+    """MinHash signature over word k-shingles, or None if the text is too short to shingle."""
+    shingles = _shingles(_normalize(text), k)
+    if not shingles:
+        return None
+    hashes = np.fromiter(
+        (int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=4).digest(), "little") for s in shingles),
+        dtype=np.uint64,
+        count=len(shingles),
+    ) % np.uint64(_MERSENNE)
+    permuted = (hashes[None, :] * _PERM_A[:, None] + _PERM_B[:, None]) % np.uint64(_MERSENNE)
+    return permuted.min(axis=1)
+
+
+class SourceDeduplicator:
+    """
+    Collapses documents gathered from web, arXiv and local PDFs before indexing.
+
+    - exact duplicates: same normalized content hash
+    - near duplicates: MinHash + LSH banding, confirmed by estimated Jaccard >= threshold
+
+    Each kept document gets metadata["doc_id"]; `provenance` maps doc_id to the
+    sub-questions that referenced it (duplicates add their sub-question to the kept copy).
+    """
+
+    def __init__(self, threshold: float = DEDUP_THRESHOLD, shingle_words: int = DEDUP_SHINGLE_WORDS):
+        self.threshold = threshold
+        self.shingle_words = shingle_words
+        self.documents: List[Document] = []
+        self.provenance: Dict[str, List[str]] = {}
+        self.dropped = 0
+        self._exact: Dict[str, str] = {}
+        self._signatures: Dict[str, np.ndarray] = {}
+        self._buckets: Dict[tuple, List[str]] = {}
+
+    def _bands(self, sig: np.ndarray):
+        rows = len(sig) // DEDUP_BANDS
+        for b in range(DEDUP_BANDS):
+            yield (b, sig[b * rows:(b + 1) * rows].tobytes())
+
+    def _near_duplicate_of(self, sig: np.ndarray) -> Optional[str]:
+        seen = set()
+        for band in self._bands(sig):
+            for doc_id in self._buckets.get(band, ()):
+                if doc_id in seen:
+                    continue
+                seen.add(doc_id)
+                if float(np.mean(self._signatures[doc_id] == sig)) >= self.threshold:
+                    return doc_id
+        return None
+
+    def _record(self, doc_id: str, subquestion: Optional[str]) -> None:
+        refs = self.provenance.setdefault(doc_id, [])
+        if subquestion is not None and subquestion not in refs:
+            refs.append(subquestion)
+
+    def add(self, doc: Document, subquestion: Optional[str] = None) -> Optional[Document]:
+        """Returns the document if it is new, or None if it duplicates one already kept."""
+        doc_id = content_hash(doc.page_content)
+        kept_id = self._exact.get(doc_id)
+
+        sig = None
+        if kept_id is None:
+            sig = minhash_signature(doc.page_content, self.shingle_words)
+            if sig is not None:
+                kept_id = self._near_duplicate_of(sig)
+
+        if kept_id is not None:
+            self._exact.setdefault(doc_id, kept_id)
+            self._record(kept_id, subquestion)
+            self.dropped += 1
+            return None
+
+        self._exact[doc_id] = doc_id
+        if sig is not None:
+            self._signatures[doc_id] = sig
+            for band in self._bands(sig):
+                self._buckets.setdefault(band, []).append(doc_id)
+
+        kept = Document(page_content=doc.page_content, metadata={**doc.metadata, "doc_id": doc_id})
+        self.documents.append(kept)
+        self._record(doc_id, subquestion)
+        return kept
+
+    def add_all(self, docs: List[Document], subquestion: Optional[str] = None) -> List[Document]:
+        return [kept for kept in (self.add(d, subquestion) for d in docs) if kept is not None]
+
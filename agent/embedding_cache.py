@@ -0,0 +1,176 @@
+# agent/embedding_cache.py
+
+import os
+import re
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from typing import Dict, List
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from agent.tracing import span
+
+log = logging.getLogger(__name__)
+
+EMBED_CACHE_DIR = os.getenv("EMBED_CACHE_DIR", ".cache/embeddings")
+EMBED_CACHE_MAX_ENTRIES = int(os.getenv("EMBED_CACHE_MAX_ENTRIES", "100000"))
+EMBED_CACHE_DTYPE = os.getenv("EMBED_CACHE_DTYPE", "float16")  # or float32
+
+_SQL_BATCH = 500  # stay well under SQLite's bound-parameter limit
+
+
+def text_key(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Persistent, size-capped embedding cache wrapped around any LangChain Embeddings.
+
+    Layout per model under <root>/<model-slug>/:
+      - index.sqlite: text hash -> slot, last_used (LRU order)
+      - vectors.mmap: fixed-capacity [max_entries, dim] array, memory-mapped
+
+    Lookups are batched; only cache misses are sent to the base model.
+    When the cache is full the least recently used slots are reused.
+    """
+
+    def __init__(
+        self,
+        base: Embeddings,
+        model_name: str,
+        root: str = EMBED_CACHE_DIR,
+        max_entries: int = EMBED_CACHE_MAX_ENTRIES,
+        dtype: str = EMBED_CACHE_DTYPE,
+    ):
+        self.base = base
+        self.model_name = model_name
+        self.max_entries = max(1, max_entries)
+        self.dtype = np.dtype(dtype)
+        self.dir = os.path.join(root, re.sub(r"[^A-Za-z0-9._-]+", "_", model_name))
+        os.makedirs(self.dir, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._vectors = None
+        self._dim = None
+        self.hits = 0
+        self.misses = 0
+
+        self._db = sqlite3.connect(os.path.join(self.dir, "index.sqlite"), timeout=30, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT)")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, slot INTEGER UNIQUE, last_used REAL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS entries_lru ON entries (last_used)")
+        self._db.commit()
+        row = self._db.execute("SELECT value FROM meta WHERE name = 'dim'").fetchone()
+        if row:
+            self._open_vectors(int(row[0]))
+
+    # ---------- storage ----------
+    def _open_vectors(self, dim: int) -> None:
+        path = os.path.join(self.dir, f"vectors.{self.dtype.name}.mmap")
+        row = self._db.execute("SELECT value FROM meta WHERE name = 'capacity'").fetchone()
+        capacity = int(row[0]) if row else self.max_entries
+        mode = "r+" if os.path.exists(path) else "w+"
+        self._vectors = np.memmap(path, dtype=self.dtype, mode=mode, shape=(capacity, dim))
+        self._dim = dim
+        self.max_entries = min(self.max_entries, capacity)
+        self._db.execute("INSERT OR IGNORE INTO meta VALUES ('dim', ?)", (str(dim),))
+        self._db.execute("INSERT OR IGNORE INTO meta VALUES ('capacity', ?)", (str(capacity),))
+        self._db.commit()
+
+    def _select_slots(self, keys: List[str]) -> Dict[str, int]:
+        found = {}
+        for i in range(0, len(keys), _SQL_BATCH):
+            batch = keys[i:i + _SQL_BATCH]
+            marks = ",".join("?" * len(batch))
+            found.update(self._db.execute(f"SELECT key, slot FROM entries WHERE key IN ({marks})", batch).fetchall())
+        return found
+
+    def _lookup(self, keys: List[str]) -> Dict[str, int]:
+        found = self._select_slots(keys)
+        if found:
+            now = time.time()
+            self._db.executemany("UPDATE entries SET last_used = ? WHERE key = ?", [(now, k) for k in found])
+            self._db.commit()
+        return found
+
+    def _allocate(self, n: int) -> List[int]:
+        """
+        Returns n free slots, evicting least recently used entries if needed (inside a write txn).
+        Slots stay dense: evicted slots are reused immediately, so the next fresh slot is COUNT(*).
+        """
+        used = self._db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        free = list(range(used, min(used + n, self.max_entries)))
+        if len(free) < n:
+            victims = self._db.execute(
+                "SELECT key, slot FROM entries ORDER BY last_used LIMIT ?", (n - len(free),)
+            ).fetchall()
+            self._db.executemany("DELETE FROM entries WHERE key = ?", [(k,) for k, _ in victims])
+            free.extend(slot for _, slot in victims)
+        return free
+
+    def _store(self, keys: List[str], vectors: np.ndarray) -> None:
+        # Only the most recent max_entries vectors can fit
+        keys, vectors = keys[-self.max_entries:], vectors[-self.max_entries:]
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            # Another process may have stored some of these meanwhile
+            present = self._select_slots(keys)
+            todo = [(k, v) for k, v in zip(keys, vectors) if k not in present]
+            slots = self._allocate(len(todo))
+            now = time.time()
+            for slot, (_, vec) in zip(slots, todo):
+                self._vectors[slot] = vec
+            self._vectors.flush()  # vectors hit the file before their index rows become visible
+            self._db.executemany(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?)",
+                [(k, slot, now) for slot, (k, _) in zip(slots, todo)],
+            )
+            self._db.commit()
+        except Exception:
+            self._db.rollback()
+            raise
+
+    # ---------- Embeddings API ----------
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        with span("embedding", kind="embedding", model=self.model_name, texts=len(texts)) as sp:
+            return self._embed(texts, sp)
+
+    def _embed(self, texts: List[str], sp) -> List[List[float]]:
+        keys = [text_key(t) for t in texts]
+        with self._lock:
+            slots = self._lookup(list(dict.fromkeys(keys))) if self._vectors is not None else {}
+            cached = {k: np.asarray(self._vectors[s], dtype=np.float32) for k, s in slots.items()}
+
+        miss_keys = [k for k in dict.fromkeys(keys) if k not in cached]
+        self.hits += len(cached)
+        self.misses += len(miss_keys)
+        sp.set(cache_hits=len(cached), cache_misses=len(miss_keys))
+        if miss_keys:
+            first_text = {}
+            for k, t in zip(keys, texts):
+                first_text.setdefault(k, t)
+            fresh = np.asarray(self.base.embed_documents([first_text[k] for k in miss_keys]), dtype=np.float32)
+            cached.update(zip(miss_keys, fresh))
+            with self._lock:
+                if self._vectors is None:
+                    self._open_vectors(fresh.shape[1])
+                try:
+                    self._store(miss_keys, fresh.astype(self.dtype))
+                except sqlite3.Error as e:
+                    # The cache is best-effort; fresh vectors are still returned
+                    log.warning("[Embedding Cache] could not store %d vectors: %s", len(miss_keys), e)
+
+        return [cached[k].tolist() for k in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
@@ -0,0 +1,145 @@
+# agent/embedding_engine.py
+
+import os
+import time
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, List, Optional
+
+from langchain_core.embeddings import Embeddings
+
+log = logging.getLogger(__name__)
+
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "64"))
+# 0 = embed in-process; -1 = one worker process per core; N = N worker processes
+EMBED_WORKERS = int(os.getenv("EMBED_WORKERS", "0"))
+# Upper bound on text held in flight at once (rough proxy for tokenizer/activation memory)
+EMBED_MAX_BUFFER_MB = float(os.getenv("EMBED_MAX_BUFFER_MB", "64"))
+
+
+def huggingface_factory(model_name: str, batch_size: int) -> Embeddings:
+    # Imported lazily so worker processes and tests only pay for torch when they embed
+    from langchain_huggingface import HuggingFaceEmbeddings
+    return HuggingFaceEmbeddings(model_name=model_name, encode_kwargs={"batch_size": batch_size})
+
+
+# ----------------- worker process side -----------------
+_worker_model: Optional[Embeddings] = None
+
+def _init_worker(factory, model_name: str, batch_size: int, threads: int) -> None:
+    global _worker_model
+    try:
+        import torch
+        torch.set_num_threads(threads)  # avoid oversubscribing cores across workers
+    except ImportError:
+        pass
+    _worker_model = factory(model_name, batch_size)
+
+def _embed_in_worker(texts: List[str]) -> List[List[float]]:
+    return _worker_model.embed_documents(texts)
+
+
+class EmbeddingEngine(Embeddings):
+    """
+    Batched embedding engine for large ingests.
+
+    - texts are embedded in windows capped by max_buffer_mb, so huge PDF dumps
+      don't balloon RSS
+    - within a window, texts are sorted by length before batching to cut padding
+    - workers > 0 fans batches out to a process pool (one model per process)
+    - throughput of the last call is kept in `stats`, running totals in `totals`
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        batch_size: int = EMBED_BATCH_SIZE,
+        workers: int = EMBED_WORKERS,
+        max_buffer_mb: float = EMBED_MAX_BUFFER_MB,
+        model_factory: Callable[[str, int], Embeddings] = huggingface_factory,
+    ):
+        self.model_name = model_name
+        self.batch_size = max(1, batch_size)
+        self.workers = (os.cpu_count() or 1) if workers < 0 else workers
+        self.max_buffer_chars = max(1, int(max_buffer_mb * 1024 * 1024))
+        self.model_factory = model_factory
+        self.stats = {"chunks": 0, "seconds": 0.0, "chunks_per_sec": 0.0}
+        self.totals = {"chunks": 0, "seconds": 0.0}
+        self._model = None
+        self._pool = None
+
+    # ---------- backends ----------
+    def _local_model(self) -> Embeddings:
+        if self._model is None:
+            self._model = self.model_factory(self.model_name, self.batch_size)
+        return self._model
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            threads = max(1, (os.cpu_count() or 1) // self.workers)
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),  # safe with torch + threads
+                initializer=_init_worker,
+                initargs=(self.model_factory, self.model_name, self.batch_size, threads),
+            )
+        return self._pool
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
+
+    # ---------- batching ----------
+    def _windows(self, order: List[int], texts: List[str]):
+        """Splits indices into consecutive windows whose total text stays under the buffer cap."""
+        window, size = [], 0
+        for i in order:
+            n = len(texts[i])
+            if window and size + n > self.max_buffer_chars:
+                yield window
+                window, size = [], 0
+            window.append(i)
+            size += n
+        if window:
+            yield window
+
+    def _embed_window(self, window: List[int], texts: List[str], out: list) -> None:
+        # Longest first: similar lengths share a batch, so padding stays small
+        window = sorted(window, key=lambda i: len(texts[i]), reverse=True)
+        batches = [window[i:i + self.batch_size] for i in range(0, len(window), self.batch_size)]
+        payloads = [[texts[i] for i in batch] for batch in batches]
+        if self.workers > 0:
+            results = self._get_pool().map(_embed_in_worker, payloads)
+        else:
+            model = self._local_model()
+            results = (model.embed_documents(p) for p in payloads)
+        for batch, vectors in zip(batches, results):
+            for i, vec in zip(batch, vectors):
+                out[i] = list(vec)
+
+    # ---------- Embeddings API ----------
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        start = time.perf_counter()
+        out: List[Optional[List[float]]] = [None] * len(texts)
+        for window in self._windows(list(range(len(texts))), texts):
+            self._embed_window(window, texts, out)
+
+        elapsed = time.perf_counter() - start
+        self.stats = {
+            "chunks": len(texts),
+            "seconds": elapsed,
+            "chunks_per_sec": len(texts) / elapsed if elapsed > 0 else float("inf"),
+        }
+        self.totals["chunks"] += len(texts)
+        self.totals["seconds"] += elapsed
+        log.info("[Embedding] %d chunks in %.2fs (%.1f chunks/sec)", len(texts), elapsed, self.stats["chunks_per_sec"])
+        return out
+
+    def embed_query(self, text: str) -> List[float]:
+        if self.workers > 0:
+            return list(self._get_pool().submit(_embed_in_worker, [text]).result()[0])
+        return self._local_model().embed_query(text)
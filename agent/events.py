@@ -0,0 +1,118 @@
+# agent/events.py
+
+import os
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+log = logging.getLogger(__name__)
+
+# Dispatcher wakes up this often (or as soon as a batch is full) to hand events to sinks
+EVENTS_FLUSH_INTERVAL_SEC = float(os.getenv("EVENTS_FLUSH_INTERVAL_SEC", "0.1"))
+EVENTS_MAX_BATCH = int(os.getenv("EVENTS_MAX_BATCH", "50"))
+
+
+@dataclass
+class Event:
+    stage: str                          # planner | pdf | gather | index | embed | synthesize ...
+    message: str                        # human-readable line for UIs and logs
+    subquestion: Optional[str] = None
+    counts: Dict[str, Any] = field(default_factory=dict)
+    ts: float = field(default_factory=time.time)
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+# ----------------- sinks -----------------
+class CallbackSink:
+    def __init__(self, fn: Callable[[List[Event]], None]):
+        self.fn = fn
+
+    def handle(self, events: List[Event]) -> None:
+        self.fn(events)
+
+
+# ----------------- bus -----------------
+class EventBus:
+    """
+    Collects events from any thread or task and delivers them to sinks in batches
+    from a single dispatcher thread. emit() only appends under a lock.
+    """
+
+    def __init__(self, sinks: List[Any], flush_interval: float = EVENTS_FLUSH_INTERVAL_SEC,
+                 max_batch: int = EVENTS_MAX_BATCH):
+        self.sinks = sinks
+        self.flush_interval = flush_interval
+        self.max_batch = max(1, max_batch)
+        self.history: List[Event] = []
+        self._pending: List[Event] = []
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def emit(self, event: Event) -> None:
+        with self._lock:
+            self._pending.append(event)
+            self.history.append(event)
+            full = len(self._pending) >= self.max_batch
+        if full:
+            self._wake.set()
+
+    def flush(self) -> None:
+        with self._lock:
+            batch, self._pending = self._pending, []
+        if not batch:
+            return
+        for sink in self.sinks:
+            try:
+                sink.handle(batch)
+            except Exception as e:
+                # A broken UI must not take the research run down with it
+                log.warning("[Events] %s failed: %s", type(sink).__name__, e)
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def start(self) -> "EventBus":
+        self._thread = threading.Thread(target=self._run, name="event-bus", daemon=True)
+        self._thread.start()
+        return self
+
+    def close(self) -> None:
+        self._stopped.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        self.flush()
+
+
+_bus: ContextVar[Optional[EventBus]] = ContextVar("event_bus", default=None)
+
+@contextmanager
+def use_event_sinks(*sinks, **bus_kwargs):
+    """Routes events emitted in this context (and tasks/threads started from it) to `sinks`."""
+    bus = EventBus(list(sinks), **bus_kwargs).start()
+    token = _bus.set(bus)
+    try:
+        yield bus
+    finally:
+        _bus.reset(token)
+        bus.close()
+
+def emit(stage: str, message: str, subquestion: Optional[str] = None, **counts) -> None:
+    """Progress event from anywhere in the pipeline; logged when no bus is active."""
+    event = Event(stage=stage, message=message, subquestion=subquestion, counts=counts)
+    bus = _bus.get()
+    if bus is None:
+        log.info("[%s] %s", event.stage, event.message.strip())
+    else:
+        bus.emit(event)
@@ -0,0 +1,197 @@
+# agent/fetch_web.py
+
+import os
+import time
+import asyncio
+import hashlib
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+from agent.cache_store import SQLiteTTLCache
+from agent.tracing import span
+from agent.http_pool import get_async_client, loop_local
+
+log = logging.getLogger(__name__)
+
+# Full-text fetching of web results is opt-in (WEB_FULL_TEXT=1); otherwise Tavily snippets are used
+WEB_FULL_TEXT = os.getenv("WEB_FULL_TEXT", "0") == "1"
+FETCH_PER_HOST = int(os.getenv("FETCH_PER_HOST", "2"))             # concurrent requests to one host
+FETCH_TIMEOUT_SEC = float(os.getenv("FETCH_TIMEOUT_SEC", "10"))
+FETCH_MAX_BYTES = int(os.getenv("FETCH_MAX_BYTES", str(2 * 1024 * 1024)))   # longer bodies are cut here
+FETCH_MAX_CHARS = int(os.getenv("FETCH_MAX_CHARS", "20000"))       # extracted text kept per page
+# HTML parsing is CPU-bound; 0 parses in a thread instead of worker processes
+FETCH_EXTRACT_WORKERS = int(os.getenv("FETCH_EXTRACT_WORKERS", str(min(2, os.cpu_count() or 1))))
+FETCH_USER_AGENT = os.getenv("FETCH_USER_AGENT", "AI-Research-Agent/1.0 (+research assistant)")
+
+# Pages younger than FETCH_FRESH_SEC are used as is; older ones are revalidated with their ETag
+FETCH_CACHE_ENABLED = os.getenv("FETCH_CACHE", "1") != "0"
+FETCH_CACHE_PATH = os.getenv("FETCH_CACHE_PATH", ".cache/pages.sqlite")
+FETCH_CACHE_TTL_SEC = float(os.getenv("FETCH_CACHE_TTL_SEC", str(7 * 24 * 3600)))
+FETCH_FRESH_SEC = float(os.getenv("FETCH_FRESH_SEC", "3600"))
+FETCH_CACHE_MAX_ENTRIES = int(os.getenv("FETCH_CACHE_MAX_ENTRIES", "5000"))
+
+_TEXT_TYPES = ("text/html", "application/xhtml+xml", "text/plain")
+_DROP_TAGS = ["script", "style", "noscript", "nav", "header", "footer", "aside", "form", "svg", "iframe"]
+
+
+# ----------------- extraction (runs in worker processes) -----------------
+def html_to_text(body: bytes, content_type: str = "text/html", max_chars: int = FETCH_MAX_CHARS) -> str:
+    """Readable text of a page: markup, scripts and page chrome removed, blank lines collapsed."""
+    if not content_type.startswith("text/html") and "xhtml" not in content_type:
+        text = body.decode("utf-8", errors="replace")
+    else:
+        from bs4 import BeautifulSoup
+        soup = BeautifulSoup(body, "lxml")
+        for tag in soup(_DROP_TAGS):
+            tag.decompose()
+        root = soup.find("article") or soup.find("main") or soup.body or soup
+        text = root.get_text("\n")
+    lines = (" ".join(line.split()) for line in text.splitlines())
+    return "\n".join(line for line in lines if line)[:max_chars]
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+def _extract_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=FETCH_EXTRACT_WORKERS,
+                                        mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+async def _extract(body: bytes, content_type: str) -> str:
+    if FETCH_EXTRACT_WORKERS <= 0:
+        return await asyncio.to_thread(html_to_text, body, content_type)
+    return await asyncio.get_running_loop().run_in_executor(_extract_pool(), html_to_text, body, content_type)
+
+
+# ----------------- page cache -----------------
+_cache: Optional[SQLiteTTLCache] = None
+
+def get_page_cache() -> SQLiteTTLCache:
+    # Opened lazily so importing the gatherer never touches the disk
+    global _cache
+    if _cache is None:
+        _cache = SQLiteTTLCache(FETCH_CACHE_PATH, table="pages", max_entries=FETCH_CACHE_MAX_ENTRIES,
+                                default_ttl=FETCH_CACHE_TTL_SEC)
+    return _cache
+
+def page_key(url: str) -> str:
+    return hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+
+class PageFetcher:
+    """
+    Fetches pages over the shared "pages" connection pool (agent.http_pool; FETCH_MAX_CONNECTIONS):
+    at most `per_host` requests to a host at a time, bodies capped at `max_bytes`. Cached pages
+    carry their ETag/Last-Modified, so a stale entry is revalidated with a conditional GET and
+    a 304 costs no download or parsing.
+    """
+
+    def __init__(self, per_host: int = FETCH_PER_HOST, timeout: float = FETCH_TIMEOUT_SEC,
+                 max_bytes: int = FETCH_MAX_BYTES, transport=None):
+        self.per_host = max(1, per_host)
+        self.max_bytes = max_bytes
+        options = {"timeout": timeout, "follow_redirects": True, "headers": {"User-Agent": FETCH_USER_AGENT}}
+        # A transport (tests) gets a private client; otherwise the loop's pool is shared
+        self._own_client = transport is not None
+        self.client = httpx.AsyncClient(transport=transport, **options) if transport else get_async_client("pages", **options)
+        self._hosts: Dict[str, asyncio.Semaphore] = {}
+
+    def _host_slot(self, url: str) -> asyncio.Semaphore:
+        host = urlsplit(url).netloc.lower()
+        if host not in self._hosts:
+            self._hosts[host] = asyncio.Semaphore(self.per_host)
+        return self._hosts[host]
+
+    async def _download(self, url: str, headers: dict):
+        """(status, body, content_type, headers); bodies past max_bytes are cut, non-text bodies skipped."""
+        async with self.client.stream("GET", url, headers=headers) as response:
+            content_type = response.headers.get("content-type", "").lower()
+            if response.status_code != 200 or not content_type.startswith(_TEXT_TYPES):
+                return response.status_code, b"", content_type, response.headers
+            body = bytearray()
+            async for chunk in response.aiter_bytes():
+                body.extend(chunk)
+                if len(body) >= self.max_bytes:
+                    del body[self.max_bytes:]
+                    break
+            return 200, bytes(body), content_type, response.headers
+
+    async def fetch(self, url: str) -> str:
+        """Extracted text of the page, or "" if it could not be fetched (failures are never cached)."""
+        with span("web.fetch", kind="provider", provider="web", url=url) as sp:
+            cache = await asyncio.to_thread(get_page_cache) if FETCH_CACHE_ENABLED else None
+            # Cache reads and writes run off the loop, so a locked SQLite file stalls only this fetch
+            cached = await asyncio.to_thread(cache.get, page_key(url)) if cache is not None else None
+            if cached is not None and time.time() - cached["fetched_at"] < FETCH_FRESH_SEC:
+                sp.set(cache="hit", chars=len(cached["text"]))
+                return cached["text"]
+
+            headers = {}
+            if cached is not None and cached.get("etag"):
+                headers["If-None-Match"] = cached["etag"]
+            if cached is not None and cached.get("last_modified"):
+                headers["If-Modified-Since"] = cached["last_modified"]
+            try:
+                async with self._host_slot(url):
+                    status, body, content_type, response_headers = await self._download(url, headers)
+            except (httpx.HTTPError, ValueError) as e:
+                log.info("[Fetch] %s failed: %s", url, e)
+                sp.set(failed=f"{type(e).__name__}: {e}")
+                return cached["text"] if cached is not None else ""   # stale beats nothing
+
+            if status == 304 and cached is not None:
+                await asyncio.to_thread(cache.set, page_key(url), {**cached, "fetched_at": time.time()})
+                sp.set(cache="revalidated", chars=len(cached["text"]))
+                return cached["text"]
+            if not body:
+                sp.set(cache="miss", status=status, skipped=content_type or "empty")
+                return cached["text"] if cached is not None and status >= 500 else ""
+            try:
+                text = await _extract(body, content_type)
+            except Exception as e:
+                log.warning("[Fetch] could not extract %s: %s", url, e)
+                sp.set(failed=f"extract: {type(e).__name__}: {e}")
+                return ""
+            sp.set(cache="miss", status=status, bytes=len(body), chars=len(text))
+            if cache is not None and text:
+                await asyncio.to_thread(cache.set, page_key(url), {
+                    "text": text, "fetched_at": time.time(), "etag": response_headers.get("etag", ""),
+                    "last_modified": response_headers.get("last-modified", "")})
+            return text
+
+    async def fetch_all(self, urls: List[str]) -> Dict[str, str]:
+        """Fetches every URL concurrently (bounded per host); {url: text} for the ones that worked."""
+        unique = list(dict.fromkeys(u for u in urls if u and u.startswith(("http://", "https://"))))
+        texts = await asyncio.gather(*(self.fetch(u) for u in unique))
+        return {u: t for u, t in zip(unique, texts) if t}
+
+    async def aclose(self) -> None:
+        if self._own_client:
+            await self.client.aclose()
+
+
+def get_fetcher() -> PageFetcher:
+    """The running loop's fetcher (its per-host slots are loop-bound, like the pool under it)."""
+    return loop_local("page-fetcher", PageFetcher)
+
+
+async def with_full_text(results: List[dict]) -> List[dict]:
+    """
+    Replaces each web result's snippet with the full text of its page when the page yields more
+    than the snippet. Results whose page can't be fetched keep their snippet.
+    """
+    if not results:
+        return results
+    texts = await get_fetcher().fetch_all([r.get("url", "") for r in results])
+    return [{**r, "content": texts[r["url"]]} if len(texts.get(r.get("url"), "")) > len(r.get("content", "")) else r
+            for r in results]
@@ -1,51 +1,219 @@
 import os
 import asyncio
 import logging
-from langchain_community.utilities import ArxivAPIWrapper
+import tempfile
+from typing import Dict, Iterable, List, Optional
+
+import feedparser
+
+from agent.search_cache import aget_cached_results, astore_results
+from agent.rate_limit import get_limiter
+from agent.tracing import span
+from agent.http_pool import get_async_client, loop_local
 
 log = logging.getLogger(__name__)
-arxiv = ArxivAPIWrapper()
 
 MAX_WEB_QUERY = int(os.getenv("MAX_WEB_QUERY_CHARS", "380"))
+ARXIV_MAX_RESULTS = int(os.getenv("ARXIV_MAX_RESULTS", "3"))
+# Searches from concurrent branches arriving within this window go out as one batch
+ARXIV_BATCH_WINDOW_MS = float(os.getenv("ARXIV_BATCH_WINDOW_MS", "25"))
+# Full-text PDFs (ARXIV_FULL_TEXT=1) are downloaded once into ARXIV_PDF_DIR, a few at a time
+ARXIV_FULL_TEXT = os.getenv("ARXIV_FULL_TEXT", "0") == "1"
+ARXIV_PDF_DIR = os.getenv("ARXIV_PDF_DIR", ".cache/arxiv_pdfs")
+ARXIV_PDF_CONCURRENCY = int(os.getenv("ARXIV_PDF_CONCURRENCY", "3"))
+ARXIV_PDF_TIMEOUT_SEC = float(os.getenv("ARXIV_PDF_TIMEOUT_SEC", "60"))
+ARXIV_PDF_MAX_BYTES = int(os.getenv("ARXIV_PDF_MAX_BYTES", str(50 * 1024 * 1024)))   # larger PDFs are skipped
+
+ARXIV_API_URL = "https://export.arxiv.org/api/query"
 
 def _clamp_query(q: str) -> str:
     q = " ".join((q or "").split())
     return q[:MAX_WEB_QUERY]
 
-async def search_academic(query: str, max_results: int = 3):
+def _paper_id(entry_id: str) -> str:
+    # Versionless arXiv id, so v1 and v2 of a paper are the same paper
+    short = entry_id.split("arxiv.org/abs/")[-1]
+    head, sep, tail = short.rpartition("v")
+    return head if sep and head and tail.isdigit() else short
+
+def _to_paper(entry) -> dict:
+    """One Atom feed entry as a JSON-safe record; `url` and `content` are what gather_all indexes."""
+    title = " ".join((entry.get("title") or "").split())
+    pdf_url = next((link.get("href", "") for link in entry.get("links", [])
+                    if link.get("type") == "application/pdf" or link.get("title") == "pdf"), "")
+    return {
+        "url": entry.get("id", ""),
+        "content": f"{title}\n\n{' '.join((entry.get('summary') or '').split())}",
+        "arxiv_id": _paper_id(entry.get("id", "")),
+        "title": title,
+        "authors": ", ".join(a.get("name", "") for a in entry.get("authors", [])),
+        "published": (entry.get("published") or "")[:10],
+        "pdf_url": pdf_url,
+    }
+
+
+class ArxivClient:
     """
-    Search academic papers (arXiv) asynchronously.
-    Returns: [{'url': str, 'content': str}, ...]
+    Async arXiv API client on the shared "arxiv" connection pool (agent.http_pool).
+    Spacing requests is the rate limiter's job, not the client's.
+    """
+
+    async def search(self, query: str, max_results: int) -> List[dict]:
+        response = await get_async_client("arxiv").get(ARXIV_API_URL, params={
+            "search_query": query, "start": 0, "max_results": max_results,
+            "sortBy": "relevance", "sortOrder": "descending",
+        })
+        response.raise_for_status()
+        entries = feedparser.parse(response.text).entries
+        # The API reports a bad query as a feed with one error entry; raise it so it is never cached
+        errors = [e for e in entries if "/api/errors" in e.get("id", "")]
+        if errors:
+            raise RuntimeError(f"arXiv error: {errors[0].get('summary', '')}")
+        return [_to_paper(e) for e in entries][:max_results]
+
+client = ArxivClient()
+
+
+async def search_papers(queries: Iterable[str], max_results: int = ARXIV_MAX_RESULTS,
+                        seen: Optional[Dict[str, dict]] = None) -> Dict[str, List[dict]]:
     """
-    try:
+    Searches arXiv for several queries through the shared client and returns {query: papers}.
+    Each query is served from the search cache when possible. A paper found by several
+    queries is the same record in each list (`seen`, {arxiv_id: paper}, extends that across
+    calls), so downstream it is embedded and downloaded once.
+    """
+    seen = {} if seen is None else seen
+    out: Dict[str, List[dict]] = {}
+    for query in dict.fromkeys(queries):
         q = _clamp_query(query)
-        loop = asyncio.get_event_loop()
-        # ArxivAPIWrapper.run returns a string summary; wrap in executor
-        results = await loop.run_in_executor(None, arxiv.run, q)
-
-        # Normalize to list of dicts
-        if isinstance(results, str):
-            results = [{"url": "arxiv.org", "content": results}]
-        elif isinstance(results, dict):
-            results = [results]
-        elif isinstance(results, list):
-            flat = []
-            for r in results:
-                if isinstance(r, list):
-                    flat.extend(r)
-                else:
-                    flat.append(r)
-            results = flat
+        with span("academic.search", kind="provider", provider="arxiv") as sp:
+            papers = await aget_cached_results("arxiv", q, max_results)
+            if papers is not None and any("arxiv_id" not in p for p in papers):
+                papers = None   # one-blob entry written before results were per paper
+            sp.set(cache="hit" if papers is not None else "miss")
+            if papers is None:
+                try:
+                    # Shared token bucket; 429s/5xx are retried with backoff before we give up on the query
+                    papers = await get_limiter("arxiv").acall(client.search, q, max_results)
+                    await astore_results("arxiv", q, max_results, papers)
+                except Exception as e:
+                    log.warning("[Academic Search Error] %s", e)
+                    sp.set(results=0, failed=str(e))
+                    papers = []
+            sp.set(results=len(papers))
+        out[query] = [seen.setdefault(p.get("arxiv_id") or p["url"], p) for p in papers]
+    return out
+
+
+async def _download_pdf(paper: dict, directory: str) -> str:
+    path = os.path.join(directory, paper["arxiv_id"].replace("/", "_") + ".pdf")
+    if os.path.exists(path):
+        return path
+    with span("academic.pdf", kind="provider", provider="arxiv", paper=paper["arxiv_id"]) as sp:
+        body = bytearray()
+        async with get_async_client("arxiv_pdf", follow_redirects=True).stream(
+                "GET", paper["pdf_url"], timeout=ARXIV_PDF_TIMEOUT_SEC) as response:
+            response.raise_for_status()
+            async for chunk in response.aiter_bytes():
+                body.extend(chunk)
+                if len(body) > ARXIV_PDF_MAX_BYTES:   # a cut PDF is unreadable; skip the paper
+                    raise ValueError(f"PDF over ARXIV_PDF_MAX_BYTES ({ARXIV_PDF_MAX_BYTES} bytes)")
+        sp.set(bytes=len(body))
+    await asyncio.to_thread(_write_atomic, directory, path, bytes(body))
+    return path
+
+def _write_atomic(directory: str, path: str, content: bytes) -> None:
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix=".part")
+    with os.fdopen(fd, "wb") as f:
+        f.write(content)
+    os.replace(tmp, path)   # readers never see a half-written PDF
+
+async def download_pdfs(papers: Iterable[dict], directory: str = ARXIV_PDF_DIR,
+                        concurrency: int = ARXIV_PDF_CONCURRENCY) -> Dict[str, str]:
+    """
+    Downloads the papers' full-text PDFs, at most `concurrency` at a time, into `directory`
+    (a paper already there is not fetched again). Returns {arxiv_id: path} for the ones
+    that made it; failed downloads are logged and left out.
+    """
+    unique = {p["arxiv_id"]: p for p in papers if p.get("arxiv_id") and p.get("pdf_url")}
+    if not unique:
+        return {}
+    os.makedirs(directory, exist_ok=True)
+    slots = asyncio.Semaphore(max(1, concurrency))
+
+    async def one(paper):
+        async with slots:
+            return await _download_pdf(paper, directory)
+
+    results = await asyncio.gather(*(one(p) for p in unique.values()), return_exceptions=True)
+    paths = {}
+    for paper_id, result in zip(unique, results):
+        if isinstance(result, BaseException):
+            log.warning("[Academic PDF] %s not downloaded: %s", paper_id, result)
         else:
-            results = []
-
-        out = []
-        for r in results:
-            if isinstance(r, dict):
-                out.append({"url": r.get("url", "arxiv.org"), "content": r.get("content", str(r))})
-            else:
-                out.append({"url": "arxiv.org", "content": str(r)})
-        return out[:max_results]
-    except Exception as e:
-        log.warning("[Academic Search Error] %s", e)
-        return []
+            paths[paper_id] = result
+    return paths
+
+async def _with_full_text(paper_lists: List[List[dict]]) -> List[List[dict]]:
+    """Appends each paper's full text to its abstract; one download pass for the whole batch."""
+    from agent.gather_docs import extract_pdf
+
+    paths = await download_pdfs(p for papers in paper_lists for p in papers)
+    texts = {}
+    for paper_id, path in paths.items():
+        pages = await asyncio.to_thread(extract_pdf, path)
+        texts[paper_id] = "\n".join(page.page_content for page in pages)
+    return [[{**p, "content": p["content"] + "\n\n" + texts[p["arxiv_id"]]} if texts.get(p.get("arxiv_id")) else p
+             for p in papers] for papers in paper_lists]
+
+
+class ArxivBatcher:
+    """
+    Collects the searches concurrent branches issue within `window` seconds and runs them
+    together: each distinct query once, all of them concurrently (the rate limiter spaces
+    the requests), and each query's callers get their papers as soon as that query is done.
+    A paper found by several queries of a batch is one shared record, downloaded once.
+    """
+
+    def __init__(self, window: float = ARXIV_BATCH_WINDOW_MS / 1000.0):
+        self.window = window
+        self._pending: Dict[tuple, List[asyncio.Future]] = {}
+        self._flush: Optional[asyncio.Task] = None
+
+    async def search(self, query: str, max_results: int) -> List[dict]:
+        future = asyncio.get_running_loop().create_future()
+        self._pending.setdefault((query, max_results), []).append(future)
+        if self._flush is None:
+            self._flush = asyncio.ensure_future(self._run_batch())
+        return await future
+
+    async def _run_batch(self) -> None:
+        await asyncio.sleep(self.window)
+        batch, self._pending, self._flush = self._pending, {}, None
+        seen: Dict[str, dict] = {}
+        await asyncio.gather(*(self._resolve(query, max_results, futures, seen)
+                               for (query, max_results), futures in batch.items()))
+
+    async def _resolve(self, query: str, max_results: int, futures: List[asyncio.Future], seen: dict) -> None:
+        try:
+            papers = (await search_papers([query], max_results, seen))[query]
+            if ARXIV_FULL_TEXT:
+                papers, = await _with_full_text([papers])
+            for future in futures:
+                if not future.done():
+                    future.set_result(papers)
+        except BaseException as e:
+            for future in futures:
+                if not future.done():
+                    future.set_exception(e)
+            if not isinstance(e, Exception):
+                raise
+
+async def search_academic(query: str, max_results: int = ARXIV_MAX_RESULTS):
+    """
+    Search academic papers (arXiv) asynchronously.
+    Returns one record per paper:
+    [{'url', 'content', 'arxiv_id', 'title', 'authors', 'published', 'pdf_url'}, ...]
+    """
+    # One batcher per event loop (its futures belong to the loop that created them)
+    return await loop_local("arxiv-batcher", ArxivBatcher).search(query, max_results)
@@ -1,28 +1,241 @@
 # agent/gather_docs.py
 
 import os
-from langchain_community.document_loaders import PyMuPDFLoader
+import time
+import logging
+import multiprocessing
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+from langchain_core.documents import Document
+
+log = logging.getLogger(__name__)
+
+# Parser processes (0 = parse in-process, one file after another)
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", str(min(4, os.cpu_count() or 1))))
+PDF_MAX_FILE_MB = float(os.getenv("PDF_MAX_FILE_MB", "200"))   # larger files are skipped
+PDF_MAX_PAGES = int(os.getenv("PDF_MAX_PAGES", "1000"))         # longer files are cut here
+PDF_TIMEOUT_SEC = float(os.getenv("PDF_TIMEOUT_SEC", "300"))    # per file; the file is dropped past it
+PDF_PAGES_PER_TASK = int(os.getenv("PDF_PAGES_PER_TASK", "25"))
+# Extra wait for a worker that overran its file's deadline before it is given up on
+_KILL_GRACE_SEC = 5.0
+
+
+# ----------------- worker process side -----------------
+def _probe_pdf(path: str) -> Tuple[int, dict]:
+    import pymupdf
+    with pymupdf.open(path) as doc:
+        meta = {k: v for k, v in (doc.metadata or {}).items() if v is not None and k != "encryption"}
+        return doc.page_count, meta
+
+def _extract_pages(path: str, start: int, stop: int, meta: dict, total: int, deadline: float) -> List[Tuple[str, dict]]:
+    import pymupdf
+    pages = []
+    with pymupdf.open(path) as doc:
+        for i in range(start, stop):
+            if time.time() > deadline:
+                raise TimeoutError(f"still parsing at page {i} when the time budget ran out")
+            pages.append((doc[i].get_text(), {**meta, "source": path, "file_path": path, "total_pages": total, "page": i}))
+    return pages
+
+
+@dataclass
+class PageBatch:
+    path: str
+    pages: List[Document] = field(default_factory=list)
+    last: bool = False      # no more batches follow for this file
+    error: str = ""         # the file was skipped or abandoned (pages already yielded stay valid)
+
+
+def _to_batch(path: str, raw: List[Tuple[str, dict]], last: bool) -> PageBatch:
+    return PageBatch(path, [Document(page_content=text, metadata=meta) for text, meta in raw], last)
+
+def _ranges(total: int, max_pages: int, pages_per_task: int, path: str) -> List[Tuple[int, int]]:
+    n = min(total, max_pages)
+    if total > max_pages:
+        log.warning("[PDF] %s has %d pages; parsing the first %d", path, total, max_pages)
+    step = max(1, pages_per_task)
+    return [(s, min(s + step, n)) for s in range(0, n, step)]
+
+def _oversized(path: str, max_file_mb: float) -> str:
+    if not os.path.exists(path):
+        return "file not found"
+    size_mb = os.path.getsize(path) / (1024 * 1024)
+    return f"{size_mb:.0f} MB exceeds the {max_file_mb:.0f} MB limit" if size_mb > max_file_mb else ""
+
+
+def _iter_inline(paths, max_pages, max_file_mb, timeout, pages_per_task) -> Iterator[PageBatch]:
+    for path in paths:
+        problem = _oversized(path, max_file_mb)
+        if problem:
+            yield PageBatch(path, last=True, error=problem)
+            continue
+        deadline = time.time() + timeout
+        try:
+            total, meta = _probe_pdf(path)
+            ranges = _ranges(total, max_pages, pages_per_task, path)
+            if not ranges:
+                yield PageBatch(path, last=True)
+            for i, (start, stop) in enumerate(ranges):
+                yield _to_batch(path, _extract_pages(path, start, stop, meta, total, deadline), i == len(ranges) - 1)
+        except Exception as e:
+            yield PageBatch(path, last=True, error=f"{type(e).__name__}: {e}")
+
+
+def iter_pdf_pages(
+    paths: Iterable[str],
+    workers: int = PDF_WORKERS,
+    max_pages: int = PDF_MAX_PAGES,
+    max_file_mb: float = PDF_MAX_FILE_MB,
+    timeout: float = PDF_TIMEOUT_SEC,
+    pages_per_task: int = PDF_PAGES_PER_TASK,
+) -> Iterator[PageBatch]:
+    """
+    Parses PDFs in a process pool and yields their pages in batches as soon as each batch
+    is parsed, so callers can chunk and embed the first pages while later files are parsing.
+
+    - a file is split into page ranges, and at most `workers` ranges are in flight at once
+    - batches of one file may arrive out of order (pages carry metadata["page"]);
+      the file's final batch has last=True
+    - files over max_file_mb are skipped, files over max_pages are cut at max_pages,
+      and a file still parsing `timeout` seconds after it started is abandoned;
+      skipped/abandoned files end with an error batch instead
+    """
+    paths = list(paths)
+    if workers <= 0:
+        yield from _iter_inline(paths, max_pages, max_file_mb, timeout, pages_per_task)
+        return
+
+    files: Dict[str, dict] = {}
+    todo = deque()
+    for path in paths:
+        problem = _oversized(path, max_file_mb)
+        if problem:
+            yield PageBatch(path, last=True, error=problem)
+        elif path not in files:
+            files[path] = {"deadline": None, "remaining": 0, "failed": False, "done": False, "yielded": False,
+                           "meta": {}, "total": 0}
+            todo.append(("probe", path, None))
+    if not todo:
+        return
+
+    def fail(path, message):
+        files[path]["failed"] = True
+        # Drop the file's queued page ranges, so they don't hold up the files behind it
+        rest = [item for item in todo if item[1] != path]
+        todo.clear()
+        todo.extend(rest)
+        return PageBatch(path, last=True, error=message)
+
+    def emit_batch(path, batch):
+        files[path]["yielded"] = True
+        files[path]["done"] = batch.last
+        return batch
+
+    pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+    inflight, abandoned = {}, []
+    try:
+        while todo or inflight:
+            while todo and len(inflight) < workers:
+                kind, path, pages = todo.popleft()
+                state = files[path]
+                if state["failed"]:
+                    continue
+                if state["deadline"] is None:
+                    state["deadline"] = time.time() + timeout
+                if kind == "probe":
+                    future = pool.submit(_probe_pdf, path)
+                else:
+                    future = pool.submit(_extract_pages, path, *pages, state["meta"], state["total"], state["deadline"])
+                inflight[future] = (kind, path)
+
+            if not inflight:
+                continue
+            nearest = min(files[path]["deadline"] for _, path in inflight.values())
+            done, _ = wait(inflight, timeout=max(0.0, nearest + _KILL_GRACE_SEC - time.time()),
+                           return_when=FIRST_COMPLETED)
+            if not done:
+                # A worker overran its file's deadline without noticing (one pathological page)
+                now = time.time()
+                for future, (_, path) in list(inflight.items()):
+                    if files[path]["deadline"] + _KILL_GRACE_SEC <= now:
+                        del inflight[future]
+                        abandoned.append(future)
+                        if not files[path]["failed"]:
+                            yield fail(path, f"not parsed within {timeout:.0f}s")
+                continue
+
+            for future in done:
+                kind, path = inflight.pop(future)
+                state = files[path]
+                if state["failed"]:
+                    continue
+                try:
+                    result = future.result()
+                except BrokenProcessPool:
+                    raise
+                except Exception as e:
+                    yield fail(path, f"{type(e).__name__}: {e}")
+                    continue
+                if kind == "probe":
+                    state["total"], state["meta"] = result
+                    ranges = _ranges(state["total"], max_pages, pages_per_task, path)
+                    state["remaining"] = len(ranges)
+                    if not ranges:
+                        yield emit_batch(path, PageBatch(path, last=True))
+                    # Front of the queue: a started file finishes before the next one starts
+                    todo.extendleft(("pages", path, r) for r in reversed(ranges))
+                else:
+                    state["remaining"] -= 1
+                    yield emit_batch(path, _to_batch(path, result, state["remaining"] == 0))
+    except BrokenProcessPool as e:
+        # A worker died (out of memory, or no spawn-safe __main__): finish the rest in-process
+        log.warning("[PDF] parser pool broke (%s); parsing the remaining files in-process", e)
+        rest = []
+        for path, state in files.items():
+            if state["failed"] or state["done"]:
+                continue
+            if state["yielded"]:
+                yield fail(path, "parser process died")
+            else:
+                rest.append(path)
+        yield from _iter_inline(rest, max_pages, max_file_mb, timeout, pages_per_task)
+    finally:
+        if any(not f.done() for f in abandoned):
+            # shutdown() can't interrupt a running task; stop the stuck workers outright
+            for process in list((getattr(pool, "_processes", None) or {}).values()):
+                process.kill()
+        pool.shutdown(wait=False, cancel_futures=True)
+
 
 def load_local_pdfs(directory: str = "./docs") -> list:
     """
-    Loads all PDFs from the given directory into a list of LangChain Document objects.
+    Loads all PDFs from the given directory into a list of LangChain Document objects
+    (parsed in parallel; see iter_pdf_pages).
     """
-    docs = []
     if not os.path.exists(directory):
-        return docs
-
-    for filename in os.listdir(directory):
-        if filename.lower().endswith(".pdf"):
-            path = os.path.join(directory, filename)
-            loader = PyMuPDFLoader(path)
-            docs.extend(loader.load())
-    return docs
+        return []
+    paths = [os.path.join(directory, f) for f in sorted(os.listdir(directory)) if f.lower().endswith(".pdf")]
+    docs = []
+    for batch in iter_pdf_pages(paths):
+        if batch.error:
+            log.warning("[PDF] skipped %s: %s", batch.path, batch.error)
+        docs.extend(batch.pages)
+    order = {path: i for i, path in enumerate(paths)}
+    return sorted(docs, key=lambda d: (order[d.metadata["source"]], d.metadata["page"]))
 
 def extract_pdf(path: str) -> list:
     """
-    Loads a single PDF file and returns a list of LangChain Document objects.
+    Loads a single PDF file (in-process) and returns a list of LangChain Document objects.
     """
     if not os.path.exists(path):
         return []
-    loader = PyMuPDFLoader(path)
-    return loader.load()
+    docs = []
+    for batch in iter_pdf_pages([path], workers=0):
+        if batch.error:
+            log.warning("[PDF] skipped %s: %s", path, batch.error)
+        docs.extend(batch.pages)
+    return docs
@@ -1,7 +1,11 @@
 import os
 import logging
-from tavily import TavilyClient
+from tavily import AsyncTavilyClient, TavilyClient
 from dotenv import load_dotenv
+from agent.search_cache import aget_cached_results, astore_results, get_cached_results, store_results
+from agent.rate_limit import get_limiter
+from agent.tracing import span
+from agent.http_pool import get_async_client, loop_local
 
 load_dotenv()
 log = logging.getLogger(__name__)
@@ -11,35 +15,76 @@ MAX_WEB_QUERY = int(os.getenv("MAX_WEB_QUERY_CHARS", "380"))
 DEFAULT_MAX_RESULTS = int(os.getenv("WEB_MAX_RESULTS", "3"))
 
 client = TavilyClient(api_key=os.getenv("TAVILY_API_KEY"))
+TAVILY_API_URL = "https://api.tavily.com"
+
+def _async_client() -> AsyncTavilyClient:
+    """The running loop's Tavily client, on the shared "tavily" connection pool."""
+    return loop_local("tavily", lambda: AsyncTavilyClient(
+        api_key=os.getenv("TAVILY_API_KEY"), client=get_async_client("tavily", base_url=TAVILY_API_URL)))
 
 def _clamp_query(q: str) -> str:
     q = " ".join((q or "").split())  # collapse whitespace
     return q[:MAX_WEB_QUERY]
 
+def _normalize(results: dict) -> list:
+    # Flatten + normalize
+    flat = []
+    for item in results.get("results", []):
+        if isinstance(item, list):
+            flat.extend(item)
+        else:
+            flat.append(item)
+    return [
+        {"url": r.get("url", ""), "content": r.get("content", "")}
+        for r in flat
+        if isinstance(r, dict)
+    ]
+
 def search_web(query: str, max_results: int | None = None):
     """
     Search the web using Tavily API.
     Returns: [{'url': str, 'content': str}, ...]
     """
-    try:
+    with span("web.search", kind="provider", provider="tavily") as sp:
+        limit = max_results or DEFAULT_MAX_RESULTS
+        q = _clamp_query(query)
+        cached = get_cached_results("tavily", q, limit)
+        sp.set(cache="hit" if cached is not None else "miss")
+        if cached is not None:
+            sp.set(results=len(cached))
+            return cached
+        try:
+            # Shared token bucket; 429s/5xx are retried with backoff before we give up on the query
+            results = get_limiter("tavily").call(client.search, q, max_results=limit)
+            out = _normalize(results)
+            store_results("tavily", q, limit, out)
+            sp.set(results=len(out))
+            return out
+        except Exception as e:
+            log.warning("[Web Search Error] orig_len=%d used_len=%d : %s", len(query or ""), len(_clamp_query(query)), e)
+            sp.set(results=0, failed=str(e))
+            return []
+
+async def asearch_web(query: str, max_results: int | None = None):
+    """
+    Async variant of search_web over the pooled AsyncTavilyClient: waiting for a socket or a
+    rate-limit token never holds a thread. Shares search_web's cache entries.
+    """
+    with span("web.search", kind="provider", provider="tavily") as sp:
         limit = max_results or DEFAULT_MAX_RESULTS
         q = _clamp_query(query)
-        results = client.search(q, max_results=limit)
-        raw_results = results.get("results", [])
-
-        # Flatten + normalize
-        flat = []
-        for item in raw_results:
-            if isinstance(item, list):
-                flat.extend(item)
-            else:
-                flat.append(item)
-
-        return [
-            {"url": r.get("url", ""), "content": r.get("content", "")}
-            for r in flat
-            if isinstance(r, dict)
-        ]
-    except Exception as e:
-        log.warning("[Web Search Error] orig_len=%d used_len=%d : %s", len(query or ""), len(_clamp_query(query)), e)
-        return []
+        cached = await aget_cached_results("tavily", q, limit)
+        sp.set(cache="hit" if cached is not None else "miss")
+        if cached is not None:
+            sp.set(results=len(cached))
+            return cached
+        try:
+            results = await get_limiter("tavily").acall(_async_client().search, q, max_results=limit)
+            out = _normalize(results)
+            await astore_results("tavily", q, limit, out)
+            sp.set(results=len(out))
+            return out
+        except Exception as e:
+            log.warning("[Web Search Error] orig_len=%d used_len=%d : %s", len(query or ""), len(q), e)
+            sp.set(results=0, failed=str(e))
+            return []
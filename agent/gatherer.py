@@ -1,40 +1,73 @@
 # agent/gatherer.py
 import os
 import asyncio
-from typing import List
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterable, AsyncIterator, List, Optional, Tuple
 from dotenv import load_dotenv
-import streamlit as st
 
-from langchain_community.vectorstores import Zilliz
-from langchain_huggingface import HuggingFaceEmbeddings
 from langchain_core.documents import Document
 
-from agent.gather_docs import load_local_pdfs
-from agent.gather_web import search_web
+from agent.embedding_cache import CachedEmbeddings
+from agent.embedding_engine import EmbeddingEngine
+from agent.ingest_cache import PDFIngestCache, SeededEmbeddings, iter_local_pdfs
+from agent.gather_web import asearch_web
+from agent.fetch_web import WEB_FULL_TEXT, with_full_text
 from agent.gather_academic import search_academic
+from agent.scheduler import GatherScheduler
+from agent.dedupe import SourceDeduplicator
+from agent.chunker import achunk_stream, make_splitter
+from agent.vectorstore import DOCS_SCOPE, ScopedVectorStore, open_vectorstore, scope_for
+from agent.tracing import current_span, span
+from agent.events import emit
 
 load_dotenv()
 
-embedding_model = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
+INDEX_BATCH_SIZE = int(os.getenv("INDEX_BATCH_SIZE", "64"))
+EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+# Batched (optionally multi-process) MiniLM behind a persistent cache:
+# only texts never seen before reach the engine
+embedding_engine = EmbeddingEngine(EMBEDDING_MODEL)
+_embedding_model: Optional[CachedEmbeddings] = None
+_ingest_cache: Optional[PDFIngestCache] = None
 
+def get_embedding_model() -> CachedEmbeddings:
+    # Opened lazily so importing the gatherer never touches the disk
+    global _embedding_model
+    if _embedding_model is None:
+        _embedding_model = CachedEmbeddings(embedding_engine, model_name=EMBEDDING_MODEL)
+    return _embedding_model
 
-async def gather_all(subq: str, local_pdfs: List[Document]) -> List[Document]:
+def get_ingest_cache() -> PDFIngestCache:
+    global _ingest_cache
+    if _ingest_cache is None:
+        _ingest_cache = PDFIngestCache(embedding_model_name=EMBEDDING_MODEL)
+    return _ingest_cache
+
+
+async def gather_all(subq: str, scheduler: GatherScheduler | None = None) -> List[Document]:
     """
-    Gathers documents from web, academic, and local PDFs for a single sub-question.
+    Gathers documents from web and academic sources for a single sub-question.
+    Local PDFs are shared across sub-questions and indexed once per run (see open_sources).
+    Provider calls go through the scheduler so concurrent sub-questions stay bounded.
     Returns a list of Document objects.
     """
+    scheduler = scheduler or GatherScheduler()
 
-    st.write(f"🔹 Processing sub-question: {subq}")
+    emit("gather", f"🔹 Processing sub-question: {subq}", subq)
 
     # Async tasks
-    st.write("🌐 Searching the web...")
-    web_task = asyncio.to_thread(search_web, subq)  # sync → thread
+    emit("gather", "🌐 Searching the web...", subq)
+    web_task = scheduler.run("web", asearch_web, subq)  # async client, pooled sockets
+    if WEB_FULL_TEXT:
+        web_task = _fetch_pages(web_task, subq)
 
-    st.write("🎓 Searching academic papers...")
-    academic_task = search_academic(subq)  # already async
+    emit("gather", "🎓 Searching academic papers...", subq)
+    academic_task = scheduler.run("academic", search_academic, subq)
 
     # Wait for tasks to finish
-    web_results, academic_results = await asyncio.gather(web_task, academic_task)
+    with span("gather.subquestion", kind="step", subquestion=subq) as sp:
+        web_results, academic_results = await asyncio.gather(web_task, academic_task)
+        sp.set(docs=len(web_results or []) + len(academic_results or []))
 
     # Ensure we always get lists
     web_results = web_results or []
@@ -49,52 +82,183 @@ async def gather_all(subq: str, local_pdfs: List[Document]) -> List[Document]:
             metadata={"source": r.get("url", "Web")}
         ))
     
-    # Convert Academic results to Documents
+    # Convert Academic results to Documents (one per paper)
     for r in academic_results:
         combined_docs.append(Document(
             page_content=r.get("content", ""),
-            metadata={"source": r.get("url", "Academic")}
+            metadata={"source": r.get("url", "Academic"),
+                      **{k: r[k] for k in ("arxiv_id", "title", "authors", "published") if r.get(k)}}
         ))
-    
-    # Add preloaded local PDFs
-    combined_docs.extend(local_pdfs)
 
-    st.write(f"✅ Collected {len(combined_docs)} documents for this sub-question.\n")
+    emit("gather", f"✅ Collected {len(combined_docs)} documents for this sub-question.", subq,
+         web=len(web_results), academic=len(academic_results), docs=len(combined_docs))
 
     return combined_docs
 
 
-async def gatherer_node(state):
+async def _fetch_pages(web_task, subq: str):
+    # Pages are fetched as soon as the web results are in, while arXiv is still searching
+    results = await web_task
+    if results:
+        emit("gather", f"📰 Fetching {len(results)} web pages...", subq)
+        results = await with_full_text(results)
+    return results
+
+
+async def _index_chunks(vectorstore: ScopedVectorStore, chunks: AsyncIterable[Document]) -> Tuple[int, int]:
+    """Upserts chunks in INDEX_BATCH_SIZE batches off the event loop; returns (chunks, inserted)."""
+    pending, total, inserted = [], 0, 0
+    async for chunk in chunks:
+        pending.append(chunk)
+        if len(pending) >= INDEX_BATCH_SIZE:
+            inserted += len(await asyncio.to_thread(vectorstore.add_documents, pending))
+            total += len(pending)
+            pending = []
+    if pending:
+        inserted += len(await asyncio.to_thread(vectorstore.add_documents, pending))
+        total += len(pending)
+    return total, inserted
+
+async def _batches(*batches):
+    for batch in batches:
+        yield batch
+
+
+async def _local_pdf_batches(seeded: Optional[SeededEmbeddings] = None) -> AsyncIterator[List[Document]]:
+    """
+    Local PDF chunks in batches as they are parsed and embedded (unchanged files come straight
+    from the ingest cache). Their vectors seed `seeded`, so indexing them reaches the model
+    only for text it has never embedded.
+    """
+    emit("pdf", "📄 Loading local PDFs once...")
+    batches = iter_local_pdfs(get_embedding_model(), get_ingest_cache())
+    total = 0
+    try:
+        while True:
+            # Parsing and embedding block; pull each batch off the event loop
+            batch = await asyncio.to_thread(next, batches, None)
+            if batch is None:
+                break
+            chunks, vectors = batch
+            if seeded is not None:
+                seeded.seeds.update((d.page_content, v) for d, v in zip(chunks, vectors))
+            total += len(chunks)
+            yield chunks
+    finally:
+        try:
+            close = getattr(batches, "close", None)   # any iterator will do; generators are closed early
+            if close is not None:
+                await asyncio.to_thread(close)
+        except ValueError:
+            pass  # cancelled mid-batch: the generator is still running in its thread and ends with it
+    emit("pdf", f"📄 Loaded {total} local PDF chunks.", chunks=total)
+
+
+@dataclass
+class SourceSession:
+    """
+    Gathering state shared by the sub-question branches of one run: the topic's vectorstore,
+    one deduplicator (so a source found by two branches is indexed once), one provider
+    scheduler, and a lock so branches take turns embedding and writing to the index.
+    Local PDFs are parsed and indexed by a background task (`pdfs`) while the branches search.
+    """
+    vectorstore: ScopedVectorStore
+    splitter: Any = field(default_factory=make_splitter)
+    dedup: SourceDeduplicator = field(default_factory=SourceDeduplicator)
+    scheduler: GatherScheduler = field(default_factory=GatherScheduler)
+    index_lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    embedded_before: dict = field(default_factory=lambda: dict(embedding_engine.totals))
+    seeded: Optional[SeededEmbeddings] = None
+    pdfs: Optional[asyncio.Task] = None
+
+
+async def _index_local_pdfs(session: SourceSession) -> None:
+    """
+    Dedupes and indexes local PDF chunks batch by batch, taking turns with the branches.
+    They go to the shared DOCS_SCOPE, so a new topic reuses chunks an earlier topic indexed.
+    """
+    docs_store = session.vectorstore.in_scope(DOCS_SCOPE)
+    with span("pdf.ingest", kind="step") as sp:
+        chunks = inserted = 0
+        try:
+            async for pdf_chunks in _local_pdf_batches(session.seeded):
+                kept = session.dedup.add_all(pdf_chunks)
+                async with session.index_lock:
+                    c, i = await _index_chunks(docs_store, achunk_stream(_batches(kept), session.splitter))
+                chunks, inserted = chunks + c, inserted + i
+        except (OSError, RuntimeError, ValueError) as e:
+            # Unreadable files, cache I/O or a dead worker pool: research goes on with web and
+            # academic sources alone (bad PDFs are skipped per file before this)
+            sp.set(error=f"{type(e).__name__}: {e}")
+            emit("pdf", f"⚠️ Local PDFs unavailable: {e}")
+        sp.set(chunks=chunks, inserted=inserted)
+
+def _start_local_pdfs(session: SourceSession) -> SourceSession:
+    if session.pdfs is None:
+        session.pdfs = asyncio.ensure_future(_index_local_pdfs(session))
+    return session
+
+async def wait_for_local_pdfs(session: SourceSession) -> None:
     """
-    Node to gather all documents for all sub-questions and create the Zilliz vectorstore.
+    Waits until the local PDFs are indexed, starting them if nothing has yet (resumed runs).
+    Shielded: one branch being cancelled doesn't stop them.
     """
-    subquestions = state["subquestions"]
+    await asyncio.shield(_start_local_pdfs(session).pdfs)
+
 
-    # Load local PDFs only once
-    st.write("📄 Loading local PDFs once...")
-    local_pdfs = load_local_pdfs()
-    st.write(f"📄 Loaded {len(local_pdfs)} local PDF documents.\n")
+async def open_sources(query: str) -> SourceSession:
+    """
+    Per-run setup before the branches fan out: opens the topic's index and starts parsing
+    and indexing the local PDFs in the background, so branch searches start right away.
+    """
+    embedded_before = dict(embedding_engine.totals)
+    seeded = SeededEmbeddings(get_embedding_model())
+    vectorstore = await asyncio.to_thread(open_vectorstore, seeded, scope_for(query))
+    return _start_local_pdfs(SourceSession(vectorstore, embedded_before=embedded_before, seeded=seeded))
+
+def resume_sources(vectorstore: ScopedVectorStore) -> SourceSession:
+    """
+    Session for a run resumed in a new process or loop. Local PDFs are only re-checked once a
+    branch runs (chunks already indexed are skipped by id); a run resumed at its reduce step
+    never touches them.
+    """
+    return SourceSession(vectorstore)
+
+
+async def gather_subquestion(subq: str, session: SourceSession) -> dict:
+    """
+    One branch's gathering: search web + arXiv for `subq`, drop sources other branches
+    already kept, and index the rest so this branch can retrieve them right away (once
+    the local PDFs are indexed too). Returns this sub-question's provenance:
+    {doc_id: [subq]} for every source it found.
+    """
+    _start_local_pdfs(session)
+    docs = await gather_all(subq, session.scheduler)
+    kept = session.dedup.add_all(docs, subq)
+    async with session.index_lock:
+        chunks, inserted = await _index_chunks(session.vectorstore, achunk_stream(_batches(kept), session.splitter))
+    emit("index", f"✅ Indexed {inserted} new chunks from {len(kept)} unique documents.", subq,
+         docs=len(docs), kept=len(kept), chunks=chunks, inserted=inserted)
+    await wait_for_local_pdfs(session)
+    return {doc_id: [subq] for doc_id, subqs in session.dedup.provenance.items() if subq in subqs}
 
-    all_docs = []
 
-    st.write("📥 Gathering sources for all sub-questions...\n")
-    for idx, subq in enumerate(subquestions, 1):
-        st.write(f"🔹 Sub-question {idx}/{len(subquestions)}: {subq}")
-        docs = await gather_all(subq, local_pdfs)
-        all_docs.extend(docs)
+async def close_sources(session: SourceSession) -> None:
+    """After the last branch: persist the index and report run totals."""
+    if session.pdfs is None:
+        return   # resumed at the reduce step: this session gathered and indexed nothing
+    await asyncio.shield(session.pdfs)
+    await asyncio.to_thread(session.vectorstore.persist)
+    _report_totals(session.dedup, session.embedded_before)
 
-    # Create vectorstore with auto_id=True to avoid ID issues
-    st.write("🧠 Creating vectorstore in Zilliz...")
-    vectorstore = Zilliz.from_documents(
-        all_docs,
-        embedding=embedding_model,
-        collection_name="research_agent_collection",
-        connection_args={
-            "uri": os.getenv("ZILLIZ_URI"),
-            "token": os.getenv("ZILLIZ_API_KEY"),
-        },
-        auto_id=True  # ✅ Let Zilliz handle IDs automatically
-    )
 
-    st.write("✅ Vectorstore successfully created and ready for semantic search!\n")
-    return {**state, "vectorstore": vectorstore}
+def _report_totals(dedup: SourceDeduplicator, embedded_before: dict) -> None:
+    gathered = len(dedup.documents) + dedup.dropped
+    current_span().set(docs_gathered=gathered, docs_kept=len(dedup.documents))
+    emit("dedupe", f"🧹 Kept {len(dedup.documents)} unique documents out of {gathered} gathered.",
+         kept=len(dedup.documents), gathered=gathered)
+    embedded = embedding_engine.totals["chunks"] - embedded_before["chunks"]
+    seconds = embedding_engine.totals["seconds"] - embedded_before["seconds"]
+    if embedded:
+        emit("embed", f"⚡ Embedded {embedded} new chunks at {embedded / max(seconds, 1e-9):.1f} chunks/sec.",
+             chunks=embedded, seconds=round(seconds, 3))
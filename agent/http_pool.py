@@ -0,0 +1,112 @@
+# agent/http_pool.py
+
+import os
+import sys
+import asyncio
+import logging
+import weakref
+from typing import Any, Callable, Dict, Optional
+
+import httpx
+
+log = logging.getLogger(__name__)
+
+# Sockets per provider (every async provider call of the process goes through these pools)
+HTTP_POOL_LIMITS: Dict[str, int] = {
+    "groq": int(os.getenv("HTTP_POOL_GROQ_MAX_CONNECTIONS", "20")),
+    "tavily": int(os.getenv("HTTP_POOL_TAVILY_MAX_CONNECTIONS", "10")),
+    "arxiv": int(os.getenv("HTTP_POOL_ARXIV_MAX_CONNECTIONS", "2")),
+    "arxiv_pdf": int(os.getenv("HTTP_POOL_ARXIV_PDF_MAX_CONNECTIONS", "4")),
+    "pages": int(os.getenv("FETCH_MAX_CONNECTIONS", "20")),   # full-text web pages (agent.fetch_web)
+}
+HTTP_POOL_DEFAULT_MAX_CONNECTIONS = int(os.getenv("HTTP_POOL_MAX_CONNECTIONS", "10"))
+HTTP_POOL_KEEPALIVE_SEC = float(os.getenv("HTTP_POOL_KEEPALIVE_SEC", "30"))
+HTTP_POOL_TIMEOUT_SEC = float(os.getenv("HTTP_POOL_TIMEOUT_SEC", "60"))
+
+# Transport overrides per provider (offline benchmarks and tests mount httpx.MockTransport here)
+TRANSPORTS: Dict[str, Any] = {}
+
+
+class _LoopPools:
+    def __init__(self):
+        self.clients: Dict[str, Any] = {}
+        self.objects: Dict[Any, Any] = {}
+
+# httpx connections belong to the event loop that opened them, so each loop gets its own set
+_pools: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _LoopPools]" = weakref.WeakKeyDictionary()
+
+def _loop_pools() -> _LoopPools:
+    loop = asyncio.get_running_loop()
+    pools = _pools.get(loop)
+    if pools is None:
+        pools = _pools[loop] = _LoopPools()
+    return pools
+
+
+def get_async_client(provider: str, factory: Optional[Callable[..., Any]] = None, **kwargs) -> httpx.AsyncClient:
+    """
+    The running loop's keep-alive connection pool for `provider`, created on first use with
+    HTTP_POOL_LIMITS. `factory` builds the client when an SDK needs its own httpx flavour
+    (e.g. openai.DefaultAsyncHttpxClient); extra kwargs (base_url, headers, ...) go to it.
+    """
+    pools = _loop_pools()
+    client = pools.clients.get(provider)
+    if client is None:
+        limit = HTTP_POOL_LIMITS.get(provider, HTTP_POOL_DEFAULT_MAX_CONNECTIONS)
+        build = factory or httpx.AsyncClient
+        options = {"limits": _httpx_of(build).Limits(max_connections=limit, max_keepalive_connections=limit,
+                                                     keepalive_expiry=HTTP_POOL_KEEPALIVE_SEC),
+                   "timeout": HTTP_POOL_TIMEOUT_SEC, **kwargs}
+        if provider in TRANSPORTS:
+            options["transport"] = TRANSPORTS[provider]
+        client = pools.clients[provider] = build(**options)
+        log.debug("[HTTP] opened %s pool (%d connections)", provider, limit)
+    return client
+
+def _httpx_of(build):
+    # SDKs may ship their own httpx fork; Limits must come from the one their client is built on
+    for base in getattr(build, "__mro__", ()):
+        if base.__name__ == "AsyncClient":
+            return sys.modules[base.__module__.split(".")[0]]
+    return httpx
+
+
+def loop_local(key: Any, build: Callable[[], Any]) -> Any:
+    """Memoizes an SDK client wrapped around a pool for the running loop (built on first use)."""
+    pools = _loop_pools()
+    if key not in pools.objects:
+        pools.objects[key] = build()
+    return pools.objects[key]
+
+
+async def aclose_pools() -> None:
+    """Closes the running loop's pools; call before the loop that owns them shuts down."""
+    pools = _pools.pop(asyncio.get_running_loop(), None)
+    if pools is None:
+        return
+    for provider, client in pools.clients.items():
+        try:
+            await client.aclose()
+        except Exception as e:
+            log.debug("[HTTP] closing %s pool: %s", provider, e)
+
+
+def pooled_chat_model(llm, provider: str = "groq"):
+    """
+    The chat model, with its async calls on the running loop's `provider` pool. Applies to
+    OpenAI-compatible models (ChatOpenAI pointed at Groq): a per-loop copy shares the pool
+    instead of each model opening its own. Anything else (fakes, ChatGroq) is returned as is.
+    """
+    root = getattr(llm, "root_async_client", None)
+    if root is None or not hasattr(root, "copy"):
+        return llm
+
+    def bind():
+        import openai
+        pooled = root.copy(http_client=get_async_client(provider, factory=openai.DefaultAsyncHttpxClient))
+        bound = llm.model_copy()
+        bound.root_async_client = pooled
+        bound.async_client = pooled.chat.completions
+        return bound
+
+    return loop_local(("chat", provider, id(llm)), bind)
@@ -0,0 +1,188 @@
+# agent/ingest_cache.py
+
+import os
+import json
+import shutil
+import hashlib
+import logging
+import tempfile
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from agent.chunker import CHUNK_OVERLAP, CHUNK_SIZE, chunk_documents
+from agent.gather_docs import PDF_MAX_PAGES, iter_pdf_pages
+from agent.events import emit
+
+log = logging.getLogger(__name__)
+
+INGEST_CACHE_DIR = os.getenv("INGEST_CACHE_DIR", ".cache/ingest")
+# Bump when parsing/chunking changes so old entries stop matching
+LOADER_VERSION = "pymupdf-2"
+
+
+def _file_sha256(path: str, block_size: int = 1 << 20) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            h.update(block)
+    return h.hexdigest()
+
+def _dump_docs(docs: List[Document]) -> list:
+    return [{"page_content": d.page_content, "metadata": d.metadata} for d in docs]
+
+def _load_docs(raw: list, path: str) -> List[Document]:
+    # Entries are content-addressed, so re-point path metadata at the current file
+    docs = []
+    for r in raw:
+        meta = dict(r.get("metadata") or {})
+        for key in ("source", "file_path"):
+            if key in meta:
+                meta[key] = path
+        docs.append(Document(page_content=r.get("page_content", ""), metadata=meta))
+    return docs
+
+
+class PDFIngestCache:
+    """
+    On-disk cache of parsed pages, chunks and chunk embeddings per PDF.
+    Entries live under <root>/<key>/ where key hashes the file content together with
+    the loader version, page limit, embedding model and chunking parameters.
+    """
+
+    def __init__(
+        self,
+        embedding_model_name: str,
+        root: str = INGEST_CACHE_DIR,
+        loader_version: str = LOADER_VERSION,
+        chunk_size: int = CHUNK_SIZE,
+        chunk_overlap: int = CHUNK_OVERLAP,
+        max_pages: int = PDF_MAX_PAGES,
+    ):
+        self.root = root
+        self.embedding_model_name = embedding_model_name
+        self.loader_version = loader_version
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.max_pages = max_pages
+
+    def key_for(self, path: str) -> str:
+        parts = [
+            _file_sha256(path),
+            self.loader_version,
+            f"pages<={self.max_pages}",
+            self.embedding_model_name,
+            f"{self.chunk_size}:{self.chunk_overlap}",
+        ]
+        return hashlib.sha256("|".join(parts).encode("utf-8")).hexdigest()
+
+    def load(self, path: str, key: str | None = None) -> Optional[Dict]:
+        """Returns {"pages", "chunks", "embeddings"} for an unchanged file, or None on a miss."""
+        key = key or self.key_for(path)
+        entry_dir = os.path.join(self.root, key)
+        try:
+            with open(os.path.join(entry_dir, "pages.json"), encoding="utf-8") as f:
+                pages = _load_docs(json.load(f), path)
+            with open(os.path.join(entry_dir, "chunks.json"), encoding="utf-8") as f:
+                chunks = _load_docs(json.load(f), path)
+            embeddings = np.load(os.path.join(entry_dir, "embeddings.npy"))
+        except (OSError, ValueError) as e:
+            if os.path.exists(entry_dir):
+                log.warning("[Ingest Cache] unreadable entry %s: %s", key, e)
+            return None
+        if len(embeddings) != len(chunks):
+            log.warning("[Ingest Cache] entry %s has %d vectors for %d chunks", key, len(embeddings), len(chunks))
+            return None
+        return {"pages": pages, "chunks": chunks, "embeddings": embeddings}
+
+    def store(self, key: str, pages: List[Document], chunks: List[Document], embeddings) -> None:
+        """Writes an entry atomically (temp dir + rename) so readers never see partial files."""
+        final_dir = os.path.join(self.root, key)
+        if os.path.exists(final_dir):
+            return
+        os.makedirs(self.root, exist_ok=True)   # created by the first entry, not on open
+        tmp_dir = tempfile.mkdtemp(prefix=".tmp-", dir=self.root)
+        try:
+            with open(os.path.join(tmp_dir, "pages.json"), "w", encoding="utf-8") as f:
+                json.dump(_dump_docs(pages), f, ensure_ascii=False, default=str)
+            with open(os.path.join(tmp_dir, "chunks.json"), "w", encoding="utf-8") as f:
+                json.dump(_dump_docs(chunks), f, ensure_ascii=False, default=str)
+            np.save(os.path.join(tmp_dir, "embeddings.npy"), np.asarray(embeddings, dtype=np.float32))
+            os.rename(tmp_dir, final_dir)
+        except OSError as e:
+            # Lost a race with another writer, or the disk is unhappy — the cache is best-effort
+            log.warning("[Ingest Cache] could not store entry %s: %s", key, e)
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def iter_local_pdfs(
+    embedding: Embeddings,
+    cache: PDFIngestCache,
+    directory: str = "./docs",
+    **parse_options,
+) -> Iterator[Tuple[List[Document], List[List[float]]]]:
+    """
+    Streams (chunks, vectors) for every PDF in the directory. Unchanged files come from the
+    cache first; the rest are parsed in parallel (agent.gather_docs.iter_pdf_pages), and each
+    page batch is chunked and embedded as soon as it is parsed. A file is cached once its
+    last batch is in; skipped or abandoned files are reported and never cached.
+    """
+    if not os.path.exists(directory):
+        return
+    misses = {}
+    for filename in sorted(os.listdir(directory)):
+        if filename.lower().endswith(".pdf"):
+            path = os.path.join(directory, filename)
+            key = cache.key_for(path)
+            entry = cache.load(path, key)
+            if entry is not None:
+                yield entry["chunks"], entry["embeddings"].tolist()
+            else:
+                misses[path] = key
+
+    parse_options.setdefault("max_pages", cache.max_pages)
+    partial: Dict[str, list] = {}
+    for batch in iter_pdf_pages(list(misses), **parse_options):
+        if batch.error:
+            log.warning("[Ingest] skipped %s: %s", batch.path, batch.error)
+            emit("pdf", f"⚠️ Skipped {os.path.basename(batch.path)}: {batch.error}", file=batch.path)
+            partial.pop(batch.path, None)
+            continue
+        chunks = chunk_documents(batch.pages, chunk_size=cache.chunk_size, chunk_overlap=cache.chunk_overlap)
+        vectors = embedding.embed_documents([c.page_content for c in chunks]) if chunks else []
+        if chunks:
+            yield chunks, vectors
+        parts = partial.setdefault(batch.path, [])
+        if batch.pages:
+            parts.append((batch.pages[0].metadata.get("page", 0), batch.pages, chunks, vectors))
+        if batch.last:
+            # Batches can arrive out of order; the entry is stored in page order
+            parts = sorted(partial.pop(batch.path), key=lambda part: part[0])
+            cache.store(
+                misses[batch.path],
+                [p for _, pages, _, _ in parts for p in pages],
+                [c for _, _, chunks, _ in parts for c in chunks],
+                np.asarray([v for _, _, _, vecs in parts for v in vecs], dtype=np.float32),
+            )
+
+
+class SeededEmbeddings(Embeddings):
+    """
+    Embeddings wrapper that answers from precomputed vectors (e.g. cached PDF chunks)
+    and only calls the base model for texts it hasn't seen.
+    """
+
+    def __init__(self, base: Embeddings, seeds: Dict[str, List[float]] | None = None):
+        self.base = base
+        self.seeds = dict(seeds or {})
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        misses = [t for t in dict.fromkeys(texts) if t not in self.seeds]
+        if misses:
+            self.seeds.update(zip(misses, self.base.embed_documents(misses)))
+        return [list(self.seeds[t]) for t in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.base.embed_query(text)
@@ -0,0 +1,208 @@
+# agent/jobs.py
+
+import os
+import time
+import uuid
+import asyncio
+import logging
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from agent.events import CallbackSink, Event, use_event_sinks
+from agent.http_pool import aclose_pools
+
+log = logging.getLogger(__name__)
+
+# Research runs executing at once; further submissions wait in the queue
+JOBS_MAX_WORKERS = int(os.getenv("JOBS_MAX_WORKERS", "2"))
+# Queued + running jobs accepted before submit() refuses new work
+JOBS_MAX_PENDING = int(os.getenv("JOBS_MAX_PENDING", "50"))
+# Finished jobs are kept this long so late polls still find their result
+JOBS_RETENTION_SEC = float(os.getenv("JOBS_RETENTION_SEC", "3600"))
+JOBS_MAX_EVENTS = int(os.getenv("JOBS_MAX_EVENTS", "500"))
+
+ACTIVE = ("queued", "running")
+
+
+class JobQueueFull(RuntimeError):
+    pass
+
+
+@dataclass
+class Job:
+    id: str
+    query: str
+    use_cache: bool
+    status: str = "queued"              # queued | running | done | failed | cancelled
+    submitted_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    events: List[Event] = field(default_factory=list)
+    events_dropped: int = 0
+    sections: Dict[str, Dict[str, str]] = field(default_factory=dict)   # key -> {"title", "text"}
+    result: Optional[Dict[str, Any]] = None
+    trace: Optional[Dict[str, Any]] = None
+    error: str = ""
+    future: Any = None
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def add_events(self, events: List[Event]) -> None:
+        with self.lock:
+            self.events.extend(events)
+            overflow = len(self.events) - JOBS_MAX_EVENTS
+            if overflow > 0:
+                del self.events[:overflow]
+                self.events_dropped += overflow
+
+    def on_token(self, key: str, title: str, delta: str) -> None:
+        with self.lock:
+            section = self.sections.setdefault(key, {"title": title, "text": ""})
+            section["text"] += delta
+
+    def snapshot(self, since_event: int = 0) -> Dict[str, Any]:
+        """
+        Copy safe to read from any thread. `since_event` is the number of events the caller
+        has already seen (the "next_event" of its previous poll), so polls only carry new events.
+        """
+        with self.lock:
+            first = self.events_dropped
+            new = self.events[max(0, since_event - first):]
+            return {
+                "id": self.id,
+                "query": self.query,
+                "status": self.status,
+                "submitted_at": self.submitted_at,
+                "started_at": self.started_at,
+                "finished_at": self.finished_at,
+                "events": [e.to_dict() for e in new],
+                "next_event": first + len(self.events),
+                "sections": [{"key": k, **v} for k, v in self.sections.items()],
+                "result": self.result,
+                "trace": self.trace,
+                "error": self.error,
+            }
+
+
+class JobService:
+    """
+    Runs research jobs on one persistent event loop (a daemon thread), at most
+    `max_workers` at a time. Callers submit, poll status() and cancel() by job id
+    from any thread; nothing they do blocks on a run.
+    """
+
+    def __init__(self, max_workers: int = JOBS_MAX_WORKERS, max_pending: int = JOBS_MAX_PENDING,
+                 retention: float = JOBS_RETENTION_SEC):
+        self.max_pending = max_pending
+        self.retention = retention
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+        self._loop = asyncio.new_event_loop()
+        self._slots = asyncio.Semaphore(max(1, max_workers))
+        self._thread = threading.Thread(target=self._loop.run_forever, name="job-service", daemon=True)
+        self._thread.start()
+
+    def submit(self, query: str, use_cache: bool = True) -> str:
+        """
+        Queues a research run and returns its job id. An identical query that is still
+        queued or running is joined instead of started twice (reruns, double clicks).
+        """
+        with self._lock:
+            self._prune()
+            for job in self._jobs.values():
+                if job.status in ACTIVE and job.query == query and job.use_cache == use_cache:
+                    return job.id
+            pending = sum(1 for j in self._jobs.values() if j.status in ACTIVE)
+            if pending >= self.max_pending:
+                raise JobQueueFull(f"{pending} research jobs already pending; try again shortly")
+            job = Job(id=uuid.uuid4().hex[:12], query=query, use_cache=use_cache)
+            self._jobs[job.id] = job
+        job.future = asyncio.run_coroutine_threadsafe(self._run(job), self._loop)
+        log.info("[Jobs] %s queued: %r", job.id, query)
+        return job.id
+
+    async def _run(self, job: Job) -> None:
+        from graph import run_research
+        from agent.tracing import start_trace
+
+        trace = None
+        try:
+            async with self._slots:
+                with job.lock:
+                    job.status, job.started_at = "running", time.time()
+                with start_trace(job.id, query=job.query) as trace, use_event_sinks(CallbackSink(job.add_events)):
+                    result = await run_research(job.query, config={"configurable": {"on_token": job.on_token}},
+                                                use_cache=job.use_cache)
+            with job.lock:
+                job.status = "done"
+                job.result = {k: v for k, v in (result or {}).items() if k != "vectorstore"}
+        except asyncio.CancelledError:
+            with job.lock:
+                job.status = "cancelled"
+            raise
+        except Exception as e:
+            log.exception("[Jobs] %s failed", job.id)
+            with job.lock:
+                job.status, job.error = "failed", f"{type(e).__name__}: {e}"
+        finally:
+            with job.lock:
+                job.finished_at = time.time()
+                if trace is not None:
+                    job.trace = trace.to_dict()
+
+    def status(self, job_id: str, since_event: int = 0) -> Optional[Dict[str, Any]]:
+        """Snapshot of the job, or None for unknown/expired ids."""
+        job = self._jobs.get(job_id)
+        return job.snapshot(since_event) if job is not None else None
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancels a queued or running job; False if it already finished (or is unknown)."""
+        job = self._jobs.get(job_id)
+        if job is None or job.future is None or job.future.done():
+            return False
+        cancelled = job.future.cancel()   # cancels the task on the loop, wherever it is awaiting
+        if cancelled:
+            with job.lock:
+                if job.status == "queued":
+                    # Never started: _run's handlers may not get to record it
+                    job.status, job.finished_at = "cancelled", time.time()
+        return cancelled
+
+    def jobs(self) -> List[Dict[str, Any]]:
+        """Lightweight listing of every job this process still remembers."""
+        with self._lock:
+            jobs = list(self._jobs.values())
+        return [{"id": j.id, "query": j.query, "status": j.status, "submitted_at": j.submitted_at} for j in jobs]
+
+    def _prune(self) -> None:
+        cutoff = time.time() - self.retention
+        for job_id in [j.id for j in self._jobs.values()
+                       if j.status not in ACTIVE and (j.finished_at or j.submitted_at) < cutoff]:
+            del self._jobs[job_id]
+
+    async def _cancel_all(self) -> None:
+        tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await aclose_pools()   # the loop's provider connections go with it
+
+    def close(self) -> None:
+        """Cancels every job and stops the loop thread."""
+        try:
+            asyncio.run_coroutine_threadsafe(self._cancel_all(), self._loop).result(timeout=5)
+        finally:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout=5)
+
+
+_service: Optional[JobService] = None
+_service_lock = threading.Lock()
+
+def get_job_service() -> JobService:
+    """Process-wide job service, shared by every Streamlit session."""
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = JobService()
+    return _service
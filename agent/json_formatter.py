@@ -8,6 +8,9 @@ from dotenv import load_dotenv
 from langchain_groq import ChatGroq
 from langchain_core.prompts import ChatPromptTemplate
 
+from agent.llm_cache import invoke_cached
+from agent.tracing import current_span, traced
+
 load_dotenv()
 
 # -------- Groq client (guardrails: max_tokens + timeout) --------
@@ -205,15 +208,18 @@ def _extract_json(text: str) -> Dict[str, Any]:
 
 
 # ----------------- public API -----------------
+@traced("kg.generate")
 def generate_graph_json(
     report: str,
     topic: str = "Knowledge Graph",
     strict: bool = True,     # kept for API compatibility; not used by the prompt
     add_degree: bool = True,
+    use_cache: bool = True,
 ) -> Dict[str, Any]:
     """
     Calls Groq with your prompt, parses JSON safely, validates schema,
     and (optionally) adds degree for sizing in the UI.
+    The raw completion is served from the LLM cache unless use_cache=False.
     Always returns a valid elements dict for st-link-analysis/cytoscape:
 
     {
@@ -226,8 +232,8 @@ def generate_graph_json(
 
     # 1) LLM call with guardrails
     try:
-        ai = chain.invoke({"topic": topic, "report": report[:15000]})
-        raw = getattr(ai, "content", str(ai)).strip()
+        messages = prompt.format_messages(topic=topic, report=report[:15000])
+        raw = invoke_cached(client, messages, use_cache=use_cache).strip()
     except Exception:
         # Graceful fallback so the app still renders
         return {"nodes": [{"data": {"id": "query", "label": "QUERY", "name": topic}}], "edges": []}
@@ -252,4 +258,5 @@ def generate_graph_json(
     if not elements["nodes"] and not elements["edges"]:
         elements = {"nodes": [{"data": {"id": "query", "label": "QUERY", "name": topic}}], "edges": []}
 
+    current_span().set(nodes=len(elements["nodes"]), edges=len(elements["edges"]))
     return elements
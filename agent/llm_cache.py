@@ -0,0 +1,142 @@
+# agent/llm_cache.py
+
+import os
+import json
+import asyncio
+import hashlib
+from typing import Any, Callable, Optional
+
+from agent.cache_store import SQLiteTTLCache
+from agent.rate_limit import get_limiter
+from agent.tracing import span
+from agent.http_pool import pooled_chat_model
+
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE", "1") != "0"
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", ".cache/llm.sqlite")
+LLM_CACHE_TTL_SEC = float(os.getenv("LLM_CACHE_TTL_SEC", str(7 * 24 * 3600)))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "5000"))
+
+_cache: Optional[SQLiteTTLCache] = None
+
+def get_llm_cache() -> SQLiteTTLCache:
+    # Opened lazily so importing an agent module never touches the disk
+    global _cache
+    if _cache is None:
+        _cache = SQLiteTTLCache(LLM_CACHE_PATH, table="llm", max_entries=LLM_CACHE_MAX_ENTRIES,
+                                default_ttl=LLM_CACHE_TTL_SEC)
+    return _cache
+
+
+def _prompt_text(prompt: Any) -> str:
+    """Stable text for a str prompt or a list of chat messages."""
+    if isinstance(prompt, str):
+        return prompt
+    if hasattr(prompt, "to_messages"):
+        prompt = prompt.to_messages()
+    return "\n".join(f"{getattr(m, 'type', 'message')}: {getattr(m, 'content', m)}" for m in prompt)
+
+def llm_params(llm) -> dict:
+    """Generation parameters that change the output (part of the cache key)."""
+    return {
+        "model": getattr(llm, "model_name", None) or getattr(llm, "model", None),
+        "temperature": getattr(llm, "temperature", None),
+        "max_tokens": getattr(llm, "max_tokens", None),
+        "top_p": getattr(llm, "top_p", None),
+    }
+
+def cache_key(llm, prompt: Any) -> str:
+    params = llm_params(llm)
+    payload = json.dumps({"params": params, "prompt": hashlib.sha256(_prompt_text(prompt).encode("utf-8")).hexdigest()},
+                         sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _limiter(llm):
+    # Every chat model in this repo is served by Groq; quotas are per model
+    return get_limiter("groq", llm_params(llm)["model"])
+
+def _record_usage(sp, usage: Optional[dict], prompt: Any, content: str) -> None:
+    """Token counts on the LLM span: provider-reported when available, else ~4 chars/token."""
+    if usage:
+        sp.set(tokens_in=usage.get("input_tokens"), tokens_out=usage.get("output_tokens"))
+    else:
+        sp.set(tokens_in=len(_prompt_text(prompt)) // 4, tokens_out=len(content or "") // 4, tokens_estimated=True)
+
+def _invoke(llm, prompt: Any, sp) -> str:
+    message = _limiter(llm).call(llm.invoke, prompt)
+    _record_usage(sp, getattr(message, "usage_metadata", None), prompt, message.content)
+    return message.content
+
+
+class StreamInterrupted(RuntimeError):
+    """A stream failed after tokens were delivered; retrying would duplicate them."""
+
+
+def invoke_cached(llm, prompt: Any, use_cache: bool = True) -> str:
+    """llm.invoke(prompt).content, served from the on-disk cache when possible."""
+    with span("llm.invoke", kind="llm", provider="groq", model=llm_params(llm)["model"]) as sp:
+        if not (use_cache and LLM_CACHE_ENABLED):
+            return _invoke(llm, prompt, sp)
+        key = cache_key(llm, prompt)
+        hit = get_llm_cache().get(key)
+        sp.set(cache="hit" if hit is not None else "miss")
+        if hit is not None:
+            return hit
+        content = _invoke(llm, prompt, sp)
+        if content:
+            get_llm_cache().set(key, content)
+        return content
+
+async def ainvoke_cached(
+    llm,
+    prompt: Any,
+    use_cache: bool = True,
+    on_token: Optional[Callable[[str], None]] = None,
+) -> str:
+    """
+    Async variant. With on_token the completion is streamed; a cache hit is
+    delivered to on_token in one piece.
+    """
+    with span("llm.stream" if on_token else "llm.invoke", kind="llm", provider="groq",
+              model=llm_params(llm)["model"]) as sp:
+        key = cache_key(llm, prompt) if (use_cache and LLM_CACHE_ENABLED) else None
+        if key is not None:
+            # Off the loop: a read updates last_used and may wait on another process's lock
+            hit = await asyncio.to_thread(lambda: get_llm_cache().get(key))
+            sp.set(cache="hit" if hit is not None else "miss")
+            if hit is not None:
+                if on_token:
+                    on_token(hit)
+                return hit
+
+        usage = {}
+        chat = pooled_chat_model(llm)   # same model, on the shared Groq connection pool
+
+        async def _ainvoke():
+            message = await chat.ainvoke(prompt)
+            usage.update(getattr(message, "usage_metadata", None) or {})
+            return message.content
+
+        async def _astream():
+            parts = []
+            try:
+                async for chunk in chat.astream(prompt):
+                    if getattr(chunk, "usage_metadata", None):
+                        usage.update(chunk.usage_metadata)
+                    if chunk.content:
+                        if not parts:
+                            sp.mark("first_token_ms")
+                        parts.append(chunk.content)
+                        on_token(chunk.content)
+            except Exception as e:
+                if parts:
+                    raise StreamInterrupted(f"stream failed after {len(parts)} chunks: {type(e).__name__}") from e
+                raise
+            return "".join(parts)
+
+        content = await _limiter(llm).acall(_ainvoke if on_token is None else _astream)
+        _record_usage(sp, usage, prompt, content)
+
+        if key is not None and content:
+            await asyncio.to_thread(lambda: get_llm_cache().set(key, content))
+        return content
@@ -0,0 +1,310 @@
+# agent/local_index.py
+
+import os
+import json
+import glob
+import uuid
+import logging
+import tempfile
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+log = logging.getLogger(__name__)
+
+# 0 = exact (flat) search; N > 0 = IVF with N partitions once the index is big enough
+LOCAL_INDEX_IVF_LISTS = int(os.getenv("LOCAL_INDEX_IVF_LISTS", "0"))
+LOCAL_INDEX_IVF_PROBES = int(os.getenv("LOCAL_INDEX_IVF_PROBES", "4"))
+LOCAL_INDEX_IVF_MIN_SIZE = int(os.getenv("LOCAL_INDEX_IVF_MIN_SIZE", "20000"))
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if vectors.ndim == 1:
+        vectors = vectors[None, :]
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k highest scores, best first (argpartition, then sort only k)."""
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    idx = np.argpartition(-scores, k - 1)[:k]
+    return idx[np.argsort(-scores[idx], kind="stable")]
+
+def _as_predicate(filter) -> Optional[Callable[[Document], bool]]:
+    """Accepts a callable or a {metadata_key: value} dict."""
+    if filter is None or callable(filter):
+        return filter
+    return lambda doc: all(doc.metadata.get(key) == value for key, value in filter.items())
+
+def _kmeans(vectors: np.ndarray, n_lists: int, iters: int = 10, seed: int = 0) -> np.ndarray:
+    """Spherical k-means on unit vectors; returns unit-norm centroids."""
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(len(vectors), size=n_lists, replace=False)].copy()
+    for _ in range(iters):
+        assign = np.argmax(vectors @ centroids.T, axis=1)
+        for c in range(n_lists):
+            members = vectors[assign == c]
+            if len(members):
+                centroids[c] = members.sum(axis=0)
+        centroids = _normalize(centroids)
+    return centroids
+
+
+def _write_atomic(directory: str, name: str, write: Callable[[Any], Any]) -> None:
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=f".{name}.", suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            write(f)
+        os.replace(tmp, os.path.join(directory, name))
+    except BaseException:
+        os.remove(tmp)
+        raise
+
+
+class LocalVectorStore(VectorStore):
+    """
+    In-process vector index: a NumPy matrix of unit vectors with vectorized cosine top-k.
+
+    - flat mode scores every row (exact)
+    - IVF mode (ivf_lists > 0 and at least ivf_min_size rows) clusters rows into
+      partitions and only scores the ivf_probes partitions closest to the query
+    - rows are indexed by their metadata "scope", so a scoped search or id lookup only
+      touches that scope's rows, however many other scopes share the index
+    - save()/load() persist to a directory; load() memory-maps the vectors
+
+    `embedding` may be None for a store that is only fed vectors (add_vectors) and searched
+    by vector, like the process-wide store behind agent.vectorstore.LocalBackend.
+    """
+
+    def __init__(
+        self,
+        embedding: Optional[Embeddings],
+        ivf_lists: int = LOCAL_INDEX_IVF_LISTS,
+        ivf_probes: int = LOCAL_INDEX_IVF_PROBES,
+        ivf_min_size: int = LOCAL_INDEX_IVF_MIN_SIZE,
+    ):
+        self._embedding = embedding
+        self.ivf_lists = ivf_lists
+        self.ivf_probes = max(1, ivf_probes)
+        self.ivf_min_size = ivf_min_size
+        self.ids: List[str] = []
+        self.documents: List[Document] = []
+        self._vectors = np.zeros((0, 0), dtype=np.float32)
+        self._pending: List[np.ndarray] = []
+        self._centroids: Optional[np.ndarray] = None
+        self._assign: Optional[np.ndarray] = None
+        self._id_set: Set[str] = set()
+        self._scope_rows: Dict[Any, List[int]] = {}
+        self._scope_arrays: Dict[Any, np.ndarray] = {}   # _scope_rows as arrays, rebuilt after adds
+        self._lock = threading.RLock()
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self._embedding
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    # ---------- writes ----------
+    def add_vectors(self, vectors, documents: List[Document], ids: Optional[List[str]] = None) -> List[str]:
+        """
+        Adds precomputed vectors (one per document). An id already in the index, or repeated
+        in the batch, is skipped, so concurrent upserts of the same chunk add it once.
+        Returns the ids actually added.
+        """
+        ids = list(ids) if ids else [uuid.uuid4().hex for _ in documents]
+        if len(ids) != len(documents):
+            raise ValueError("ids and documents must have the same length")
+        if not documents:
+            return []
+        vectors = _normalize(vectors)
+        with self._lock:
+            batch, keep = set(), []
+            for i, x in enumerate(ids):
+                if x not in self._id_set and x not in batch:
+                    batch.add(x)
+                    keep.append(i)
+            if not keep:
+                return []
+            if len(keep) < len(ids):
+                vectors, documents, ids = vectors[keep], [documents[i] for i in keep], [ids[i] for i in keep]
+            self._pending.append(vectors)
+            self._index_rows(len(self.ids), documents, ids)
+            self.documents.extend(documents)
+            self.ids.extend(ids)
+            self._centroids = self._assign = None  # partitions are rebuilt lazily
+        return ids
+
+    def _index_rows(self, start: int, documents: List[Document], ids: List[str]) -> None:
+        self._id_set.update(ids)
+        for row, doc in enumerate(documents, start):
+            scope = doc.metadata.get("scope")
+            if scope is not None:
+                self._scope_rows.setdefault(scope, []).append(row)
+                self._scope_arrays.pop(scope, None)
+
+    def known_ids(self, ids: Iterable[str]) -> Set[str]:
+        """The given ids that are already in the index (a set lookup, not a scan)."""
+        with self._lock:
+            return {x for x in ids if x in self._id_set}
+
+    def _rows_in_scope(self, scope) -> np.ndarray:
+        rows = self._scope_arrays.get(scope)
+        if rows is None:
+            rows = self._scope_arrays[scope] = np.array(self._scope_rows.get(scope, []), dtype=np.int64)
+        return rows
+
+    def add_texts(self, texts: Iterable[str], metadatas: Optional[List[dict]] = None, *, ids: Optional[List[str]] = None, **kwargs: Any) -> List[str]:
+        texts = list(texts)
+        metadatas = metadatas or [{} for _ in texts]
+        docs = [Document(page_content=t, metadata=dict(m or {})) for t, m in zip(texts, metadatas)]
+        if not texts:
+            return []
+        return self.add_vectors(self._embedding.embed_documents(texts), docs, ids)
+
+    def _matrix(self) -> np.ndarray:
+        # Appends are buffered and concatenated once, at query or save time
+        with self._lock:
+            if self._pending:
+                blocks = ([np.asarray(self._vectors)] if len(self._vectors) else []) + self._pending
+                self._vectors = np.concatenate(blocks, axis=0)
+                self._pending = []
+            return self._vectors
+
+    # ---------- IVF ----------
+    def _use_ivf(self) -> bool:
+        return self.ivf_lists > 0 and len(self) >= max(self.ivf_min_size, self.ivf_lists)
+
+    def build_ivf(self) -> None:
+        with self._lock:
+            matrix = self._matrix()
+            centroids = _kmeans(np.asarray(matrix), self.ivf_lists)
+            self._assign = np.argmax(matrix @ centroids.T, axis=1).astype(np.int32)
+            self._centroids = centroids
+
+    def _candidates(self, q: np.ndarray, scope=None) -> Optional[np.ndarray]:
+        if scope is not None:
+            scopes = [scope] if isinstance(scope, str) else list(scope)
+            rows = (self._rows_in_scope(scopes[0]) if len(scopes) == 1
+                    else np.concatenate([self._rows_in_scope(x) for x in scopes] or [np.empty(0, dtype=np.int64)]))
+            # A scope smaller than the IVF threshold is cheaper (and exact) to scan in full
+            if len(rows) < max(self.ivf_min_size, self.ivf_lists) or not self._use_ivf():
+                return rows
+        elif not self._use_ivf():
+            return None
+        if self._centroids is None:
+            self.build_ivf()
+        probes = _top_k(self._centroids @ q, self.ivf_probes)
+        if scope is not None:
+            return rows[np.isin(self._assign[rows], probes)]
+        return np.flatnonzero(np.isin(self._assign, probes))
+
+    # ---------- reads ----------
+    def _search(self, embedding: List[float], k: int, filter=None, scope=None) -> List[Tuple[Document, float]]:
+        filter = _as_predicate(filter)
+        # Held throughout: a concurrent add must not grow documents/partitions under the matrix we score
+        with self._lock:
+            matrix = self._matrix()
+            if not len(matrix):
+                return []
+            q = _normalize(embedding)[0]
+            rows = self._candidates(q, scope)
+            if filter is not None:
+                rows = np.array([i for i in (rows if rows is not None else range(len(matrix)))
+                                 if filter(self.documents[i])], dtype=np.int64)
+            if rows is None:
+                scores = matrix @ q
+                best = _top_k(scores, k)
+                return [(self.documents[i], float(scores[i])) for i in best]
+            if not len(rows):
+                return []
+            scores = matrix[rows] @ q
+            best = _top_k(scores, k)
+            return [(self.documents[rows[i]], float(scores[i])) for i in best]
+
+    # `scope=` limits a search to the rows of one scope, or of a list of scopes (see the class
+    # docstring); `filter=` is a general metadata predicate and still checks every candidate row
+    def similarity_search_with_score(self, query: str, k: int = 4, **kwargs: Any) -> List[Tuple[Document, float]]:
+        return self._search(self._embedding.embed_query(query), k, kwargs.get("filter"), kwargs.get("scope"))
+
+    def similarity_search_with_score_by_vector(self, embedding: List[float], k: int = 4, **kwargs: Any) -> List[Tuple[Document, float]]:
+        return self._search(embedding, k, kwargs.get("filter"), kwargs.get("scope"))
+
+    def similarity_search_by_vector(self, embedding: List[float], k: int = 4, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self._search(embedding, k, kwargs.get("filter"), kwargs.get("scope"))]
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k, **kwargs)]
+
+    def _select_relevance_score_fn(self):
+        return lambda score: (score + 1.0) / 2.0  # cosine [-1, 1] → [0, 1]
+
+    # ---------- persistence ----------
+    def save(self, directory: str) -> None:
+        """
+        Writes the index atomically. Arrays go to new uniquely named files and index.json,
+        replaced last, points at them; so a store loaded (memory-mapped) from `directory`
+        can be saved back into it, and a crash mid-save leaves the previous index intact.
+        """
+        os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            arrays = {"vectors": np.asarray(self._matrix(), dtype=np.float32)}
+            if self._use_ivf():
+                if self._centroids is None:
+                    self.build_ivf()
+                arrays.update(centroids=self._centroids, assign=self._assign)
+            meta = {
+                "ids": list(self.ids),
+                "documents": [{"page_content": d.page_content, "metadata": d.metadata} for d in self.documents],
+                "ivf_lists": self.ivf_lists,
+                "ivf_probes": self.ivf_probes,
+                "ivf_min_size": self.ivf_min_size,
+            }
+        tag = uuid.uuid4().hex[:12]
+        meta["files"] = {name: f"{name}-{tag}.npy" for name in arrays}
+        for name, array in arrays.items():
+            _write_atomic(directory, meta["files"][name], lambda f, a=array: np.save(f, a))
+        _write_atomic(directory, "index.json",
+                      lambda f: f.write(json.dumps(meta, ensure_ascii=False, default=str).encode("utf-8")))
+
+        # Arrays of earlier saves are unreferenced now; a file still mapped elsewhere (Windows) stays for next time
+        keep = set(meta["files"].values())
+        for path in glob.glob(os.path.join(directory, "*.npy")):
+            if os.path.basename(path) not in keep and os.path.basename(path).startswith(("vectors", "centroids", "assign")):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    @classmethod
+    def load(cls, directory: str, embedding: Embeddings, mmap: bool = True) -> "LocalVectorStore":
+        with open(os.path.join(directory, "index.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        # Indexes saved before arrays were versioned use the fixed names
+        files = meta.get("files") or {name: f"{name}.npy" for name in ("vectors", "centroids", "assign")}
+        store = cls(embedding, meta["ivf_lists"], meta["ivf_probes"], meta["ivf_min_size"])
+        store.ids = meta["ids"]
+        store.documents = [Document(page_content=d["page_content"], metadata=d["metadata"]) for d in meta["documents"]]
+        store._index_rows(0, store.documents, store.ids)
+        mode = "r" if mmap else None
+        store._vectors = np.load(os.path.join(directory, files["vectors"]), mmap_mode=mode)
+        centroids = os.path.join(directory, files.get("centroids", ""))
+        if files.get("centroids") and os.path.exists(centroids):
+            store._centroids = np.load(centroids)
+            store._assign = np.load(os.path.join(directory, files["assign"]), mmap_mode=mode)
+        return store
+
+    # ---------- constructors ----------
+    @classmethod
+    def from_texts(cls, texts: List[str], embedding: Embeddings, metadatas: Optional[List[dict]] = None, *, ids: Optional[List[str]] = None, **kwargs: Any) -> "LocalVectorStore":
+        store = cls(embedding, **kwargs)
+        store.add_texts(texts, metadatas, ids=ids)
+        return store
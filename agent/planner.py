@@ -1,8 +1,11 @@
 # agent/planner.py
 
 from langchain_openai import ChatOpenAI
+from langchain_core.runnables import RunnableConfig
 import os
 from dotenv import load_dotenv
+from agent.llm_cache import ainvoke_cached
+from agent.events import emit
 load_dotenv()
 
 # Initialize the LLM (LLaMA 3.1 via GROQ API)
@@ -12,9 +15,10 @@ llm = ChatOpenAI(
     base_url="https://api.groq.com/openai/v1"
 )
 
-def planner_node(state: dict) -> dict:
+async def planner_node(state: dict, config: RunnableConfig | None = None) -> dict:
     """
     Decomposes a research query into 3–5 sub-questions using LLM.
+    Plans are served from the LLM cache unless config["configurable"]["llm_cache"] is False.
     Input:
         state: {"query": "<main research question>"}
     Output:
@@ -30,13 +34,14 @@ def planner_node(state: dict) -> dict:
         f"{query}\n\nReturn the list in a numbered format like 1. ..., 2. ..., etc."
     )
 
-    response = llm.invoke(prompt)
-    raw_lines = response.content.strip().splitlines()
+    use_cache = ((config or {}).get("configurable") or {}).get("llm_cache", True)
+    raw_lines = (await ainvoke_cached(llm, prompt, use_cache=use_cache)).strip().splitlines()
 
     # Extract sub-questions from the response
     subqs = [line.split('.', 1)[-1].strip() 
              for line in raw_lines if line and line[0].isdigit()]
 
+    emit("planner", f"🧭 Planned {len(subqs)} sub-questions.", subquestions=len(subqs))
     return {
         "query": query,
         "subquestions": subqs
@@ -0,0 +1,166 @@
+# agent/rate_limit.py
+
+import os
+import time
+import random
+import asyncio
+import logging
+import threading
+from typing import Dict, Optional, Tuple
+
+log = logging.getLogger(__name__)
+
+# Requests per minute and burst size per provider (shared by every session in the process)
+PROVIDER_LIMITS: Dict[str, Tuple[float, int]] = {
+    "groq": (float(os.getenv("RATE_LIMIT_GROQ_RPM", "30")), int(os.getenv("RATE_LIMIT_GROQ_BURST", "5"))),
+    "tavily": (float(os.getenv("RATE_LIMIT_TAVILY_RPM", "100")), int(os.getenv("RATE_LIMIT_TAVILY_BURST", "5"))),
+    # arXiv asks clients to stay at about one request every three seconds
+    "arxiv": (float(os.getenv("RATE_LIMIT_ARXIV_RPM", "20")), int(os.getenv("RATE_LIMIT_ARXIV_BURST", "1"))),
+}
+DEFAULT_LIMIT = (60.0, 5)
+
+RATE_LIMIT_MAX_RETRIES = int(os.getenv("RATE_LIMIT_MAX_RETRIES", "4"))
+RATE_LIMIT_BACKOFF_BASE_SEC = float(os.getenv("RATE_LIMIT_BACKOFF_BASE_SEC", "1.0"))
+RATE_LIMIT_BACKOFF_MAX_SEC = float(os.getenv("RATE_LIMIT_BACKOFF_MAX_SEC", "30.0"))
+
+_RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+_RETRYABLE_TEXT = ("429", "rate limit", "rate_limit", "too many requests", "overloaded", "503")
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket. reserve() books the next slot and returns how long the
+    caller must wait for it, so the lock is never held while sleeping and waiters
+    are served in arrival order (sync and async callers alike).
+    """
+
+    def __init__(self, rate_per_sec: float, burst: int):
+        self.rate = max(rate_per_sec, 1e-6)
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1.0
+            wait = max(0.0, -self._tokens / self.rate)
+            return max(wait, self._paused_until - now)
+
+    def pause(self, seconds: float) -> None:
+        """Provider pushed back (429 / Retry-After): hold every caller, not just the one that failed."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._tokens = min(self._tokens, 0.0)
+
+
+class RateLimiter:
+    """One bucket + retry policy + counters for a provider (or provider:model)."""
+
+    def __init__(self, name: str, rpm: float, burst: int, max_retries: int = RATE_LIMIT_MAX_RETRIES):
+        self.name = name
+        self.bucket = TokenBucket(rpm / 60.0, burst)
+        self.max_retries = max_retries
+        self._lock = threading.Lock()
+        self.stats = {"calls": 0, "throttled": 0, "retries": 0, "failures": 0,
+                      "queue_delay_sec": 0.0, "max_queue_delay_sec": 0.0}
+
+    def _record_wait(self, wait: float) -> None:
+        with self._lock:
+            self.stats["calls"] += 1
+            if wait > 0:
+                self.stats["throttled"] += 1
+                self.stats["queue_delay_sec"] += wait
+                self.stats["max_queue_delay_sec"] = max(self.stats["max_queue_delay_sec"], wait)
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self.stats[key] += 1
+
+    def _backoff(self, attempt: int, exc: BaseException) -> Optional[float]:
+        """Delay before the next attempt, or None if the error is not worth retrying."""
+        if attempt >= self.max_retries or not is_retryable(exc):
+            return None
+        hinted = retry_after(exc)
+        # Exponential backoff with full jitter, unless the provider told us how long to wait
+        delay = hinted if hinted is not None else random.uniform(0, min(RATE_LIMIT_BACKOFF_MAX_SEC, RATE_LIMIT_BACKOFF_BASE_SEC * 2 ** attempt))
+        self.bucket.pause(delay)
+        self._count("retries")
+        log.warning("[RateLimit:%s] %s; retry %d/%d in %.1fs", self.name, exc, attempt + 1, self.max_retries, delay)
+        return delay
+
+    def call(self, fn, *args, **kwargs):
+        """Blocking call: waits for a token, retries rate-limit/5xx errors."""
+        attempt = 0
+        while True:
+            wait = self.bucket.reserve()
+            self._record_wait(wait)
+            if wait > 0:
+                time.sleep(wait)
+            try:
+                return fn(*args, **kwargs)
+            except Exception as e:
+                if self._backoff(attempt, e) is None:
+                    self._count("failures")
+                    raise
+                attempt += 1
+
+    async def acall(self, fn, *args, **kwargs):
+        """Async variant for coroutine functions; waiting never blocks the event loop."""
+        attempt = 0
+        while True:
+            wait = self.bucket.reserve()
+            self._record_wait(wait)
+            if wait > 0:
+                await asyncio.sleep(wait)
+            try:
+                return await fn(*args, **kwargs)
+            except Exception as e:
+                if self._backoff(attempt, e) is None:
+                    self._count("failures")
+                    raise
+                attempt += 1
+
+
+def _status_code(exc: BaseException) -> Optional[int]:
+    code = getattr(exc, "status_code", None)
+    if code is None:
+        code = getattr(getattr(exc, "response", None), "status_code", None)
+    return code if isinstance(code, int) else None
+
+def is_retryable(exc: BaseException) -> bool:
+    code = _status_code(exc)
+    if code is not None:
+        return code in _RETRYABLE_STATUS
+    text = str(exc).lower()
+    return any(t in text for t in _RETRYABLE_TEXT)
+
+def retry_after(exc: BaseException) -> Optional[float]:
+    """Seconds from a Retry-After header on the error's HTTP response, if any."""
+    headers = getattr(getattr(exc, "response", None), "headers", None) or {}
+    try:
+        value = headers.get("retry-after") or headers.get("Retry-After")
+        return min(float(value), RATE_LIMIT_BACKOFF_MAX_SEC) if value is not None else None
+    except (TypeError, ValueError, AttributeError):
+        return None
+
+
+_limiters: Dict[str, RateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+def get_limiter(provider: str, model: Optional[str] = None) -> RateLimiter:
+    """Process-wide limiter for a provider, optionally per model (models have separate quotas)."""
+    name = f"{provider}:{model}" if model else provider
+    with _limiters_lock:
+        if name not in _limiters:
+            rpm, burst = PROVIDER_LIMITS.get(provider, DEFAULT_LIMIT)
+            _limiters[name] = RateLimiter(name, rpm, burst)
+        return _limiters[name]
+
+def rate_limit_stats() -> Dict[str, dict]:
+    with _limiters_lock:
+        return {name: dict(limiter.stats) for name, limiter in _limiters.items()}
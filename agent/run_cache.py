@@ -0,0 +1,115 @@
+# agent/run_cache.py
+
+import os
+import time
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+from langchain_core.embeddings import Embeddings
+
+from agent.cache_store import SQLiteTTLCache
+from agent.local_index import LocalVectorStore
+from agent.vectorstore import scope_for
+
+log = logging.getLogger(__name__)
+
+RUN_CACHE_ENABLED = os.getenv("RUN_CACHE", "1") != "0"
+RUN_CACHE_DIR = os.getenv("RUN_CACHE_DIR", ".cache/runs")
+# Cosine similarity between two queries above which a past run is reused
+RUN_CACHE_THRESHOLD = float(os.getenv("RUN_CACHE_THRESHOLD", "0.9"))
+# Hits younger than this are served as-is; older hits are served and refreshed in the background
+RUN_CACHE_FRESH_SEC = float(os.getenv("RUN_CACHE_FRESH_SEC", str(24 * 3600)))
+# Hits older than this are dropped (a full run happens instead)
+RUN_CACHE_TTL_SEC = float(os.getenv("RUN_CACHE_TTL_SEC", str(7 * 24 * 3600)))
+RUN_CACHE_MAX_ENTRIES = int(os.getenv("RUN_CACHE_MAX_ENTRIES", "2000"))
+
+# Result fields worth keeping (the vectorstore handle etc. is per-run)
+CACHED_FIELDS = ("query", "subquestions", "answers", "sources", "report", "executive_summary")
+
+
+@dataclass
+class RunCacheHit:
+    query: str          # the past query that matched
+    similarity: float
+    age_sec: float
+    result: Dict[str, Any]
+
+    @property
+    def stale(self) -> bool:
+        return self.age_sec > RUN_CACHE_FRESH_SEC
+
+
+class SemanticRunCache:
+    """
+    Past research runs, looked up by meaning rather than exact text.
+
+    - each stored query is embedded into a small LocalVectorStore (saved under `directory`)
+    - the run result is kept in a SQLite TTL cache keyed by the normalized query
+    - lookup() returns the closest past run whose similarity is >= threshold
+    """
+
+    def __init__(
+        self,
+        embedding: Embeddings,
+        directory: str = RUN_CACHE_DIR,
+        threshold: float = RUN_CACHE_THRESHOLD,
+        ttl: float = RUN_CACHE_TTL_SEC,
+        max_entries: int = RUN_CACHE_MAX_ENTRIES,
+    ):
+        self.embedding = embedding
+        self.directory = directory
+        self.threshold = threshold
+        self.results = SQLiteTTLCache(os.path.join(directory, "runs.sqlite"), table="runs",
+                                      max_entries=max_entries, default_ttl=ttl)
+        self._lock = threading.Lock()
+        if os.path.exists(os.path.join(directory, "index.json")):
+            self.index = LocalVectorStore.load(directory, embedding, mmap=False)
+        else:
+            self.index = LocalVectorStore(embedding)
+
+    def lookup(self, query: str) -> Optional[RunCacheHit]:
+        if not query.strip() or not len(self.index):
+            return None
+        vector = self.embedding.embed_query(query)
+        # A few candidates: the nearest one may have expired or been evicted
+        for doc, score in self.index.similarity_search_with_score_by_vector(vector, k=4):
+            if score < self.threshold:
+                break
+            entry = self.results.get(doc.metadata["key"])
+            if entry is not None:
+                log.info("[RunCache] hit %.3f: %r ~ %r", score, query, entry["result"].get("query"))
+                return RunCacheHit(
+                    query=entry["result"].get("query", doc.page_content),
+                    similarity=score,
+                    age_sec=time.time() - entry["created_at"],
+                    result=entry["result"],
+                )
+        return None
+
+    def store(self, query: str, result: Dict[str, Any]) -> None:
+        if not query.strip() or not (result or {}).get("report"):
+            return  # failed or empty runs are not worth serving again
+        key = scope_for(query, "topic")
+        payload = {k: result[k] for k in CACHED_FIELDS if k in result}
+        payload.setdefault("query", query)
+        with self._lock:
+            if key not in set(self.index.ids):
+                self.index.add_texts([query], [{"key": key}], ids=[key])
+                self.index.save(self.directory)
+            self.results.set(key, {"created_at": time.time(), "result": payload})
+
+
+_cache: Optional[SemanticRunCache] = None
+_cache_lock = threading.Lock()
+
+def get_run_cache(embedding: Embeddings) -> Optional[SemanticRunCache]:
+    """Process-wide run cache (None when RUN_CACHE=0)."""
+    global _cache
+    if not RUN_CACHE_ENABLED:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = SemanticRunCache(embedding)
+    return _cache
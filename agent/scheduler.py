@@ -0,0 +1,53 @@
+# agent/scheduler.py
+
+import os
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Awaitable, Callable, Dict, TypeVar
+
+T = TypeVar("T")
+
+# Concurrency caps (global + per provider)
+GATHER_MAX_CONCURRENCY = int(os.getenv("GATHER_MAX_CONCURRENCY", "8"))
+GATHER_PROVIDER_LIMITS = {
+    "web": int(os.getenv("GATHER_WEB_CONCURRENCY", "4")),
+    "academic": int(os.getenv("GATHER_ACADEMIC_CONCURRENCY", "2")),
+}
+
+
+class GatherScheduler:
+    """
+    Bounded scheduler for fanning out provider calls across sub-questions.
+
+    Every provider call holds one slot of the global limit plus one slot of
+    its provider's limit, so a slow provider can't starve the others.
+    Semaphores are created lazily so the scheduler binds to the running loop.
+    """
+
+    def __init__(self, max_concurrency: int | None = None, provider_limits: Dict[str, int] | None = None):
+        self.max_concurrency = max(1, max_concurrency or GATHER_MAX_CONCURRENCY)
+        self.provider_limits = {**GATHER_PROVIDER_LIMITS, **(provider_limits or {})}
+        self._global = None
+        self._providers: Dict[str, asyncio.Semaphore] = {}
+
+    def _semaphores(self, provider: str):
+        if self._global is None:
+            self._global = asyncio.Semaphore(self.max_concurrency)
+        if provider not in self._providers:
+            limit = self.provider_limits.get(provider, self.max_concurrency)
+            self._providers[provider] = asyncio.Semaphore(max(1, limit))
+        return self._global, self._providers[provider]
+
+    @asynccontextmanager
+    async def slot(self, provider: str):
+        """Hold a provider slot first, then a global one, for the duration of the block."""
+        global_sem, provider_sem = self._semaphores(provider)
+        async with provider_sem:
+            async with global_sem:
+                yield
+
+    async def run(self, provider: str, fn: Callable[..., Awaitable[T]], *args, **kwargs) -> T:
+        """Await fn(*args, **kwargs) inside a provider slot."""
+        async with self.slot(provider):
+            return await fn(*args, **kwargs)
+
@@ -0,0 +1,57 @@
+# agent/search_cache.py
+
+import os
+import json
+import asyncio
+import hashlib
+from typing import List, Optional
+
+from agent.cache_store import SQLiteTTLCache
+
+SEARCH_CACHE_ENABLED = os.getenv("SEARCH_CACHE", "1") != "0"
+SEARCH_CACHE_PATH = os.getenv("SEARCH_CACHE_PATH", ".cache/search.sqlite")
+SEARCH_CACHE_MAX_ENTRIES = int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "20000"))
+
+# Per-provider TTLs (seconds): web results go stale faster than paper listings
+SEARCH_CACHE_TTL = {
+    "tavily": float(os.getenv("SEARCH_CACHE_TTL_WEB_SEC", str(6 * 3600))),
+    "arxiv": float(os.getenv("SEARCH_CACHE_TTL_ARXIV_SEC", str(3 * 24 * 3600))),
+}
+
+_cache: Optional[SQLiteTTLCache] = None
+
+def get_search_cache() -> SQLiteTTLCache:
+    # Opened lazily so importing a gatherer never touches the disk
+    global _cache
+    if _cache is None:
+        _cache = SQLiteTTLCache(SEARCH_CACHE_PATH, table="search", max_entries=SEARCH_CACHE_MAX_ENTRIES)
+    return _cache
+
+
+def search_key(provider: str, query: str, max_results: int) -> str:
+    """`query` is expected to be the clamped query the provider actually receives."""
+    payload = json.dumps({"provider": provider, "query": query, "max_results": max_results}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def get_cached_results(provider: str, query: str, max_results: int) -> Optional[List[dict]]:
+    if not SEARCH_CACHE_ENABLED:
+        return None
+    return get_search_cache().get(search_key(provider, query, max_results))
+
+def store_results(provider: str, query: str, max_results: int, results: List[dict]) -> None:
+    # Empty lists are usually errors or transient outages; never pin them for a whole TTL
+    if not SEARCH_CACHE_ENABLED or not results:
+        return
+    get_search_cache().set(search_key(provider, query, max_results), results, ttl=SEARCH_CACHE_TTL.get(provider))
+
+
+# Async callers: SQLite may wait up to its busy timeout on another process's write lock,
+# which must not stall the event loop every other run shares
+async def aget_cached_results(provider: str, query: str, max_results: int) -> Optional[List[dict]]:
+    if not SEARCH_CACHE_ENABLED:
+        return None
+    return await asyncio.to_thread(get_cached_results, provider, query, max_results)
+
+async def astore_results(provider: str, query: str, max_results: int, results: List[dict]) -> None:
+    if SEARCH_CACHE_ENABLED and results:
+        await asyncio.to_thread(store_results, provider, query, max_results, results)
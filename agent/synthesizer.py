@@ -1,12 +1,20 @@
 # agent/synthesizer.py
 
+import os
 import asyncio
+import logging
 from langchain_openai import ChatOpenAI
-import os
 from dotenv import load_dotenv
 from agent.vectorstore import query_vectorstore
+from agent.llm_cache import ainvoke_cached
+from agent.tracing import span
 
 load_dotenv()
+log = logging.getLogger(__name__)
+
+# Concurrency + guardrails for per-sub-question synthesis
+SYNTH_MAX_CONCURRENCY = int(os.getenv("SYNTH_MAX_CONCURRENCY", "4"))
+SYNTH_TIMEOUT_SEC = float(os.getenv("SYNTH_TIMEOUT_SEC", "60"))
 
 llm = ChatOpenAI(
     model="llama-3.1-8b-instant",
@@ -14,8 +22,31 @@ llm = ChatOpenAI(
     base_url="https://api.groq.com/openai/v1"
 )
 
-async def synthesize_subquestion(subq, vectorstore):
-    chunks = query_vectorstore(subq, vectorstore)
+def _token_sink(config):
+    """Optional on_token(key, title, delta) callback passed via config["configurable"]."""
+    return ((config or {}).get("configurable") or {}).get("on_token")
+
+
+def _use_llm_cache(config):
+    """Per-run opt-out: config["configurable"]["llm_cache"] = False."""
+    return ((config or {}).get("configurable") or {}).get("llm_cache", True)
+
+
+async def _complete(prompt, timeout=None, on_token=None, use_cache=True):
+    """
+    One completion with a timeout (SYNTH_TIMEOUT_SEC by default), served from the
+    LLM cache when possible. With on_token, tokens are streamed to the callback as
+    the model produces them; the full text is returned either way.
+    """
+    return await asyncio.wait_for(
+        ainvoke_cached(llm, prompt, use_cache=use_cache, on_token=on_token),
+        timeout or SYNTH_TIMEOUT_SEC,
+    )
+
+
+async def synthesize_subquestion(subq, vectorstore, timeout=None, on_token=None, use_cache=True):
+    # Retrieval is a blocking client call; keep it off the event loop
+    chunks = await asyncio.wait_for(asyncio.to_thread(query_vectorstore, subq, vectorstore), timeout or SYNTH_TIMEOUT_SEC)
     context = "\n\n".join(c.page_content for c in chunks)
 
     prompt = (
@@ -25,11 +56,11 @@ async def synthesize_subquestion(subq, vectorstore):
         "for each key claim as percentages (e.g., 85%, 92%) in parentheses. "
         "At the end of the answer, include a References section for the citations used."
     )
-    response = llm.invoke(prompt)
-    return response.content, {c.metadata.get("source", "") for c in chunks}
+    answer = await _complete(prompt, timeout, on_token, use_cache)
+    return answer, {c.metadata.get("source", "") for c in chunks}
 
 
-async def generate_executive_summary(subquestions, answers):
+async def generate_executive_summary(subquestions, answers, timeout=None, on_token=None, use_cache=True):
     findings = "\n\n".join(
         f"Sub-question: {sq}\nAnswer:\n{ans}" for sq, ans in zip(subquestions, answers)
     )
@@ -39,22 +70,75 @@ async def generate_executive_summary(subquestions, answers):
         "summarizes the key insights, trends, and conclusions. Keep it under 150 words. "
         "Do NOT include a heading like 'Executive Summary' — just write the paragraph."
     )
-    response = llm.invoke(f"{findings}\n\n{prompt}")
-    return response.content.strip()
-
-
-async def synthesizer_node(state):
-    answers, all_sources = [], set()
-    vectorstore = state["vectorstore"]
-
-    for subq in state["subquestions"]:
-        answer, sources = await synthesize_subquestion(subq, vectorstore)
-        answers.append(answer)
-        all_sources.update(sources)
-
-    executive_summary = await generate_executive_summary(state["subquestions"], answers)
-
-    return {**state, "answers": answers, "sources": list(all_sources), "executive_summary": executive_summary}
+    summary = await _complete(f"{findings}\n\n{prompt}", timeout, on_token, use_cache)
+    return summary.strip()
+
+
+def _stream_to(sink, key, title, announce=True):
+    """Per-section token callback for `sink` (None without one). Announcing opens the section
+    with an empty delta, so sections appear in order before tokens interleave."""
+    if sink is None:
+        return None
+    if announce:
+        sink(key, title, "")
+    return lambda delta: sink(key, title, delta)
+
+def _section_title(idx, subq):
+    return f"{idx + 1}. {subq}"
+
+
+def announce_sections(subquestions, config=None):
+    """Opens one section per sub-question, in order, before the fan-out branches stream into them."""
+    sink = _token_sink(config)
+    for idx, subq in enumerate(subquestions):
+        _stream_to(sink, idx, _section_title(idx, subq))
+
+
+async def answer_subquestion(subq, vectorstore, semaphore, on_token=None, use_cache=True):
+    """One sub-question's answer and sources inside a synthesis slot; a timeout becomes a note, not an error."""
+    with span("synthesize.subquestion", kind="step", subquestion=subq) as sp:
+        async with semaphore:
+            sp.mark("slot_acquired_ms")
+            try:
+                answer, sources = await synthesize_subquestion(subq, vectorstore, on_token=on_token, use_cache=use_cache)
+                sp.set(sources=len(sources))
+                return answer, sources
+            except asyncio.TimeoutError:
+                log.warning("[Synthesis Timeout] %.0fs exceeded for: %s", SYNTH_TIMEOUT_SEC, subq)
+                sp.set(timed_out=True)
+                note = f"_No answer: synthesis timed out after {SYNTH_TIMEOUT_SEC:.0f}s._"
+                if on_token:
+                    on_token(note)
+                return note, set()
+
+
+async def synthesize_branch(idx, subq, vectorstore, semaphore, config=None):
+    """
+    Synthesis for one fan-out branch. Returns a finding
+    {"index", "subquestion", "answer", "sources"} for summarize_node to reduce.
+    """
+    on_token = _stream_to(_token_sink(config), idx, _section_title(idx, subq), announce=False)
+    answer, sources = await answer_subquestion(subq, vectorstore, semaphore, on_token, _use_llm_cache(config))
+    return {"index": idx, "subquestion": subq, "answer": answer, "sources": sorted(sources)}
+
+
+async def summarize_node(state, config=None):
+    """
+    Reduce step of the fan-out: puts the branch findings back in sub-question order
+    and writes the executive summary (streamed as the "summary" section).
+    """
+    findings = sorted(state.get("findings") or [], key=lambda f: f["index"])
+    subquestions = [f["subquestion"] for f in findings]
+    answers = [f["answer"] for f in findings]
+    sources = set().union(*(f["sources"] for f in findings))
+
+    with span("synthesize.summary", kind="step"):
+        executive_summary = await generate_executive_summary(
+            subquestions, answers, on_token=_stream_to(_token_sink(config), "summary", "Executive Summary"),
+            use_cache=_use_llm_cache(config),
+        )
+    return {"subquestions": subquestions, "answers": answers, "sources": list(sources),
+            "executive_summary": executive_summary}
 
 
 def output_node(state):
@@ -0,0 +1,177 @@
+# agent/tracing.py
+
+import os
+import json
+import time
+import uuid
+import asyncio
+import functools
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+
+# When set, every finished trace is also written to <TRACE_DIR>/<run_id>.json
+TRACE_DIR = os.getenv("TRACE_DIR", "")
+
+
+class Span:
+    """One timed step: a graph node, a provider call, an embedding batch, a cache lookup..."""
+
+    __slots__ = ("span_id", "parent_id", "name", "kind", "start", "end", "attrs", "error")
+
+    def __init__(self, name: str, kind: str, parent_id: Optional[str], attrs: Dict[str, Any]):
+        self.span_id = uuid.uuid4().hex[:12]
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.start = time.time()
+        self.end: Optional[float] = None
+        self.attrs = attrs
+        self.error: Optional[str] = None
+
+    def set(self, **attrs) -> None:
+        self.attrs.update(attrs)
+
+    def incr(self, key: str, amount: float = 1) -> None:
+        self.attrs[key] = self.attrs.get(key, 0) + amount
+
+    def mark(self, key: str) -> None:
+        """Records ms since the span started (e.g. time to first token)."""
+        self.attrs[key] = round((time.time() - self.start) * 1000, 2)
+
+    def to_dict(self, origin: float) -> dict:
+        end = self.end if self.end is not None else time.time()
+        return {
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "kind": self.kind,
+            "start_ms": round((self.start - origin) * 1000, 2),
+            "duration_ms": round((end - self.start) * 1000, 2),
+            "attrs": self.attrs,
+            "error": self.error,
+        }
+
+
+class _NoopSpan:
+    """Returned when no trace is active, so instrumented code never needs to check."""
+
+    def set(self, **attrs) -> None:
+        pass
+
+    def incr(self, key: str, amount: float = 1) -> None:
+        pass
+
+    def mark(self, key: str) -> None:
+        pass
+
+_NOOP = _NoopSpan()
+
+
+class Trace:
+    """All spans of one research run; safe to append to from tasks and worker threads."""
+
+    def __init__(self, run_id: Optional[str] = None, **attrs):
+        self.run_id = run_id or uuid.uuid4().hex[:8]
+        self.attrs = attrs
+        self.start = time.time()
+        self.spans: List[Span] = []
+        self._lock = threading.Lock()
+
+    def _add(self, span: Span) -> None:
+        with self._lock:
+            self.spans.append(span)
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            spans = sorted(self.spans, key=lambda s: s.start)
+        return {
+            "run_id": self.run_id,
+            "started_at": self.start,
+            "attrs": self.attrs,
+            "spans": [s.to_dict(self.start) for s in spans],
+        }
+
+    def to_json(self, indent: int = 2) -> str:
+        return json.dumps(self.to_dict(), indent=indent, default=str)
+
+    def save(self, directory: str) -> str:
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{self.run_id}.json")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(self.to_json())
+        return path
+
+
+_trace: ContextVar[Optional[Trace]] = ContextVar("research_trace", default=None)
+_span: ContextVar[Optional[Span]] = ContextVar("research_span", default=None)
+
+def current_trace() -> Optional[Trace]:
+    return _trace.get()
+
+def current_span():
+    return _span.get() or _NOOP
+
+
+@contextmanager
+def start_trace(run_id: Optional[str] = None, **attrs):
+    """
+    Collects every span opened in this context (including tasks and asyncio.to_thread
+    calls started from it). Re-entering while a trace is active reuses that trace.
+    """
+    active = _trace.get()
+    if active is not None:
+        yield active
+        return
+    trace = Trace(run_id, **attrs)
+    token = _trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _trace.reset(token)
+        if TRACE_DIR:
+            trace.save(TRACE_DIR)
+
+
+@contextmanager
+def span(name: str, kind: str = "step", **attrs):
+    """Times the enclosed block as a child of the current span; a no-op outside a trace."""
+    trace = _trace.get()
+    if trace is None:
+        yield _NOOP
+        return
+    parent = _span.get()
+    s = Span(name, kind, parent.span_id if parent else None, attrs)
+    trace._add(s)
+    token = _span.set(s)
+    try:
+        yield s
+    except BaseException as e:
+        s.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        s.end = time.time()
+        _span.reset(token)
+
+
+def traced(name: str, kind: str = "step"):
+    """Decorator: runs a sync or async function inside a span, keeping its signature."""
+    def decorate(fn):
+        if asyncio.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with span(name, kind=kind):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name, kind=kind):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+def traced_node(name: str, fn):
+    """Wraps a LangGraph node in a `node` span (LangGraph still sees its config parameter)."""
+    return traced(name, kind="node")(fn)
@@ -1,4 +1,232 @@
 # agent/vectorstore.py
 
+import os
+import re
+import uuid
+import hashlib
+import logging
+import threading
+from typing import Dict, List, Set, Tuple
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+from agent.tracing import span
+
+log = logging.getLogger(__name__)
+
+# Which backend the gatherer indexes into: "zilliz" (remote) or "local" (in-process NumPy index)
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "zilliz")
+# How runs are sliced: "topic" (re-runs of the same query share and reuse a slice) or "run"
+VECTOR_SCOPE = os.getenv("VECTOR_SCOPE", "topic")
+ZILLIZ_COLLECTION = os.getenv("ZILLIZ_COLLECTION", "research_agent_chunks")
+LOCAL_INDEX_DIR = os.getenv("LOCAL_INDEX_DIR", "")  # empty = keep the local index in memory only
+# Local PDFs (docs/) are the same corpus for every topic: indexed once into this scope,
+# which every topic's searches include
+DOCS_SCOPE = os.getenv("VECTOR_DOCS_SCOPE", "local-docs")
+
+_ID_QUERY_BATCH = 500
+
+
+def scope_for(query: str, mode: str | None = None) -> str:
+    """Scope key for a run: a hash of the normalized topic, or a fresh id per run."""
+    if (mode or VECTOR_SCOPE) == "run":
+        return uuid.uuid4().hex[:16]
+    normalized = " ".join(re.findall(r"\w+", (query or "").lower()))
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()[:16]
+
+def chunk_id(scope: str, doc: Document) -> str:
+    """Stable primary key: the same chunk in the same scope always gets the same id."""
+    digest = hashlib.sha256(doc.page_content.encode("utf-8")).hexdigest()[:32]
+    return f"{scope}-{digest}"
+
+
+# ----------------- backends -----------------
+class ZillizBackend:
+    """
+    One long-lived Zilliz collection with string primary keys and `scope` as partition key,
+    so each run/topic only searches (and grows) its own slice.
+    """
+    name = "zilliz"
+
+    def open(self, embedding: Embeddings) -> VectorStore:
+        from langchain_community.vectorstores import Zilliz
+        return Zilliz(
+            embedding_function=embedding,
+            collection_name=ZILLIZ_COLLECTION,
+            connection_args={
+                "uri": os.getenv("ZILLIZ_URI"),
+                "token": os.getenv("ZILLIZ_API_KEY"),
+            },
+            auto_id=False,
+            partition_key_field="scope",
+        )
+
+    def prepare(self, doc: Document, scope: str) -> Document:
+        # Milvus derives a fixed column schema from the first insert, so every row
+        # gets exactly the same metadata keys
+        meta = doc.metadata
+        try:
+            page = int(meta.get("page", -1))
+        except (TypeError, ValueError):
+            page = -1
+        return Document(page_content=doc.page_content, metadata={
+            "source": str(meta.get("source", "")),
+            "page": page,
+            "doc_id": str(meta.get("doc_id", "")),
+            "scope": scope,
+        })
+
+    def insert(self, store, docs: List[Document], ids: List[str], embedding: Embeddings) -> List[str]:
+        # The store was opened with this run's embedding. Upsert (by primary key) so a chunk another
+        # process inserted meanwhile is replaced, not duplicated; the collection is created on first insert
+        if getattr(store, "col", None) is None:
+            return store.add_documents(docs, ids=ids)
+        return store.upsert(ids=ids, documents=docs) or []
+
+    def existing_ids(self, store, ids: List[str]) -> Set[str]:
+        if getattr(store, "col", None) is None:
+            return set()  # collection is created on first insert
+        found = set()
+        for i in range(0, len(ids), _ID_QUERY_BATCH):
+            batch = ids[i:i + _ID_QUERY_BATCH]
+            quoted = ", ".join(f'"{x}"' for x in batch)
+            found.update(store.get_pks(f"pk in [{quoted}]") or [])
+        return found
+
+    def search(self, store, query: str, k: int, scopes: List[str], embedding: Embeddings) -> List[Document]:
+        if getattr(store, "col", None) is None:
+            return []
+        quoted = ", ".join(f'"{x}"' for x in scopes)
+        return store.similarity_search(query, k=k, expr=f"scope in [{quoted}]")
+
+    def persist(self, store) -> None:
+        pass
+
+
+class LocalBackend:
+    """
+    Process-wide in-memory NumPy index (agent/local_index.py), optionally loaded from and
+    saved to LOCAL_INDEX_DIR so slices survive restarts. The shared store holds vectors
+    only: each run embeds with its own embedding, and rows are indexed by scope, so
+    upserts and searches only touch the run's own slice.
+    """
+    name = "local"
+
+    def __init__(self):
+        self._store = None
+
+    def open(self, embedding: Embeddings) -> VectorStore:
+        from agent.local_index import LocalVectorStore
+        if self._store is None:
+            if LOCAL_INDEX_DIR and os.path.exists(os.path.join(LOCAL_INDEX_DIR, "index.json")):
+                self._store = LocalVectorStore.load(LOCAL_INDEX_DIR, None)
+            else:
+                self._store = LocalVectorStore(None)
+        return self._store
+
+    def prepare(self, doc: Document, scope: str) -> Document:
+        return Document(page_content=doc.page_content, metadata={**doc.metadata, "scope": scope})
+
+    def insert(self, store, docs: List[Document], ids: List[str], embedding: Embeddings) -> List[str]:
+        # add_vectors skips ids already present, so a racing insert of the same chunk is dropped
+        return store.add_vectors(embedding.embed_documents([d.page_content for d in docs]), docs, ids)
+
+    def existing_ids(self, store, ids: List[str]) -> Set[str]:
+        return store.known_ids(ids)
+
+    def search(self, store, query: str, k: int, scopes: List[str], embedding: Embeddings) -> List[Document]:
+        return store.similarity_search_by_vector(embedding.embed_query(query), k=k, scope=scopes)
+
+    def persist(self, store) -> None:
+        if LOCAL_INDEX_DIR:
+            store.save(LOCAL_INDEX_DIR)
+
+
+# Backend name -> backend object (open / prepare / insert / existing_ids / search / persist)
+BACKENDS: Dict[str, object] = {
+    "zilliz": ZillizBackend(),
+    "local": LocalBackend(),
+}
+
+def register_backend(name: str, backend) -> None:
+    BACKENDS[name] = backend
+
+
+# Writers to the same scope take turns (striped, so the lock table stays bounded)
+_SCOPE_LOCKS = [threading.Lock() for _ in range(64)]
+
+def _scope_lock(backend, scope: str) -> threading.Lock:
+    return _SCOPE_LOCKS[hash((backend.name, scope)) % len(_SCOPE_LOCKS)]
+
+
+class ScopedVectorStore:
+    """
+    A backend store confined to one scope (run or topic).
+
+    add_documents() upserts by stable content-hash ids and skips chunks already
+    present in the scope; the check and the insert happen under the scope's lock, so
+    concurrent writers add a chunk once. similarity_search() searches the scope plus
+    `shared_scopes` (the local PDF corpus, see DOCS_SCOPE). Texts and queries are
+    embedded with this view's `embedding`, never the shared store's.
+    """
+
+    def __init__(self, backend, store: VectorStore, scope: str, embedding: Embeddings,
+                 shared_scopes: Tuple[str, ...] = ()):
+        self.backend = backend
+        self.store = store
+        self.scope = scope
+        self.embedding = embedding
+        self.shared_scopes = tuple(x for x in shared_scopes if x != scope)
+
+    def in_scope(self, scope: str) -> "ScopedVectorStore":
+        """A view of the same store that writes to (and searches) `scope`."""
+        return ScopedVectorStore(self.backend, self.store, scope, self.embedding)
+
+    def add_documents(self, docs: List[Document]) -> List[str]:
+        with span("vectorstore.insert", kind="vectorstore", backend=self.backend.name, chunks=len(docs)) as sp:
+            by_id = {}
+            for doc in docs:
+                by_id.setdefault(chunk_id(self.scope, doc), doc)
+            inserted = []
+            with _scope_lock(self.backend, self.scope):
+                present = self.backend.existing_ids(self.store, list(by_id))
+                new_ids = [x for x in by_id if x not in present]
+                if new_ids:
+                    prepared = [self.backend.prepare(by_id[x], self.scope) for x in new_ids]
+                    inserted = list(self.backend.insert(self.store, prepared, new_ids, self.embedding))
+            sp.set(inserted=len(inserted), skipped=len(by_id) - len(inserted))
+        log.info("[Vectorstore] scope=%s inserted=%d skipped=%d", self.scope, len(inserted), len(by_id) - len(inserted))
+        return inserted
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs) -> List[Document]:
+        with span("vectorstore.search", kind="vectorstore", backend=self.backend.name, k=k) as sp:
+            docs = self.backend.search(self.store, query, k, [self.scope, *self.shared_scopes], self.embedding)
+            sp.set(docs=len(docs))
+            return docs
+
+    def persist(self) -> None:
+        self.backend.persist(self.store)
+
+
+def open_vectorstore(embedding: Embeddings, scope: str, backend: str | None = None) -> ScopedVectorStore:
+    """A view of `scope` in the backend; its searches also cover the shared local PDF scope."""
+    name = backend or VECTOR_BACKEND
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown vector backend '{name}'. Choose from: {', '.join(sorted(BACKENDS))}")
+    impl = BACKENDS[name]
+    return ScopedVectorStore(impl, impl.open(embedding), scope, embedding, shared_scopes=(DOCS_SCOPE,))
+
+def vectorstore_handle(store: ScopedVectorStore) -> Dict[str, str]:
+    """Serializable reference to a scoped store (graph state is checkpointed); see resolve_vectorstore."""
+    return {"backend": store.backend.name, "scope": store.scope}
+
+def resolve_vectorstore(ref, embedding: Embeddings) -> ScopedVectorStore:
+    """Reopens the store a handle points to; an open store passes through unchanged."""
+    if isinstance(ref, dict):
+        return open_vectorstore(embedding, ref["scope"], ref["backend"])
+    return ref
+
 def query_vectorstore(query, vectorstore, k=4):
     return vectorstore.similarity_search(query, k=k)
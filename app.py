@@ -1,7 +1,6 @@
 import os
 import json
 import uuid
-import asyncio
 import logging
 from collections import deque, defaultdict
 
@@ -94,16 +93,65 @@ def render_graph(elements_list, stylesheet, layout_name="concentric"):
 # -----------------------------------------------------------
 # Import your agent + formatter
 # -----------------------------------------------------------
-from graph import build_graph
+from agent.jobs import JobQueueFull, get_job_service
 from agent.json_generator_adapter import json_generator  # uses Groq-based formatter
 
 
 # -----------------------------------------------------------
-# Async runner
+# Background jobs
 # -----------------------------------------------------------
-async def run_async_graph(user_query: str):
-    graph = build_graph()
-    return await graph.ainvoke({"query": user_query})
+# Runs execute on the process-wide job service, not in this script: the page polls
+# for progress, so reruns never restart or block a run and sessions don't queue behind each other
+JOBS_POLL_SEC = float(os.getenv("JOBS_POLL_SEC", "1.0"))
+
+
+def render_sections(sections):
+    """Answers and the executive summary streamed so far, in the order the synthesizer announced them."""
+    for section in sections:
+        st.markdown(f"**{section['title']}**")
+        st.markdown(section["text"] + " ▌")
+
+
+def render_trace(trace: dict):
+    """Timing waterfall of one run: one bar per span, nested spans indented under their parent."""
+    import altair as alt
+
+    spans = trace["spans"]
+    by_id = {s["span_id"]: s for s in spans}
+
+    def depth(s):
+        d = 0
+        while s.get("parent_id") in by_id:
+            s = by_id[s["parent_id"]]
+            d += 1
+        return d
+
+    rows = []
+    for i, s in enumerate(spans):
+        attrs = s.get("attrs") or {}
+        label = attrs.get("subquestion") or attrs.get("model") or attrs.get("provider") or ""
+        rows.append({
+            "row": f"{i:03d} " + "  " * depth(s) + s["name"] + (f" · {label[:40]}" if label else ""),
+            "kind": s["kind"],
+            "start_ms": s["start_ms"],
+            "end_ms": s["start_ms"] + s["duration_ms"],
+            "duration_ms": s["duration_ms"],
+            "details": json.dumps(attrs, default=str)[:300],
+            "error": s.get("error") or "",
+        })
+
+    chart = alt.Chart(alt.Data(values=rows)).mark_bar().encode(
+        x=alt.X("start_ms:Q", title="ms since run start"),
+        x2="end_ms:Q",
+        y=alt.Y("row:N", sort=None, title=None, axis=alt.Axis(labelLimit=400)),
+        color=alt.Color("kind:N"),
+        tooltip=["row:N", "duration_ms:Q", "details:N", "error:N"],
+    ).properties(height=max(120, 18 * len(rows)))
+    st.altair_chart(chart, use_container_width=True)
+
+    nodes = [s for s in spans if s["kind"] == "node"]
+    if nodes:
+        st.caption(" · ".join(f"{s['name']}: {s['duration_ms'] / 1000:.2f}s" for s in nodes))
 
 
 # -----------------------------------------------------------
@@ -425,6 +473,15 @@ with st.sidebar.expander("🎨 Theme", expanded=False):
         st.rerun()
     st.caption("Muted, desaturated colors for long sessions without eye strain.")
 
+# Provider quota pressure (shared by every session in this process)
+with st.sidebar.expander("⏱️ Provider rate limits", expanded=False):
+    from agent.rate_limit import rate_limit_stats
+    stats = rate_limit_stats()
+    if stats:
+        st.json(stats)
+    else:
+        st.caption("No provider calls yet.")
+
 # Init state
 for k, v in {
     "run_id": None,
@@ -434,6 +491,11 @@ for k, v in {
     "elements": None,
     "stylesheet": None,
     "error_text": "",
+    "cache_note": "",
+    "trace": None,
+    "job_id": None,
+    "job_events": [],
+    "job_next_event": 0,
 }.items():
     st.session_state.setdefault(k, v)
 
@@ -441,43 +503,93 @@ for k, v in {
 with st.form("query_form", clear_on_submit=False):
     q = st.text_input("Enter research topic:", value=st.session_state.get("query", ""))
     submitted = st.form_submit_button("Run Research", type="primary", use_container_width=True)
+    force_fresh = st.checkbox("Ignore cached results for similar queries", value=False)
 
 if submitted:
-    st.session_state.error_text = ""
+    for k, v in {"error_text": "", "cache_note": "", "report_text": "", "graph_dict": None, "trace": None,
+                 "job_events": [], "job_next_event": 0}.items():
+        st.session_state[k] = v
     st.session_state.run_id = uuid.uuid4().hex[:8]
     st.session_state.query = q
-
-    with st.spinner("⏳ Running research agent…"):
-        # Run agent safely
-        try:
-            try:
-                result = asyncio.run(run_async_graph(q))
-            except RuntimeError:
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-                try:
-                    result = loop.run_until_complete(run_async_graph(q))
-                finally:
-                    loop.close()
-        except Exception as e:
-            st.session_state.error_text = f"Agent failed: {e}"
-            result = {}
-
-        report_text = (result or {}).get("report", "") or (result or {}).get("final_report", "")
-        st.session_state.report_text = report_text
-
-        if report_text.strip():
+    try:
+        st.session_state.job_id = get_job_service().submit(q, use_cache=not force_fresh)
+    except JobQueueFull as e:
+        st.session_state.job_id = None
+        st.session_state.error_text = str(e)
+
+
+def finish_job(job: dict):
+    """Moves a finished job into the session (once) and builds the KG from its report."""
+    st.session_state.job_id = None
+    st.session_state.trace = job.get("trace")
+    if job["status"] == "cancelled":
+        st.session_state.error_text = "Research cancelled."
+        return
+    if job["status"] == "failed":
+        st.session_state.error_text = f"Agent failed: {job['error']}"
+        return
+
+    result = job.get("result") or {}
+    cache = result.get("cache")
+    if cache:
+        note = (f"Served from a previous run of \"{cache['query']}\" "
+                f"(similarity {cache['similarity']:.2f}, {cache['age_sec'] / 3600:.1f}h old).")
+        if cache["stale"]:
+            # Refreshed as a regular job: bounded by the worker limit, and joined if already queued
             try:
-                graph_dict = _formatter_to_adjacency(report_text, q)
-                st.session_state.graph_dict = graph_dict
-                elements, stylesheet = _adjacency_to_elements(graph_dict)
-                st.session_state.elements = elements
-                st.session_state.stylesheet = stylesheet
-            except Exception as e:
-                st.session_state.error_text = f"KG build failed: {e}"
-        else:
-            if not st.session_state.error_text:
-                st.session_state.error_text = "Research completed, but no report text was returned."
+                get_job_service().submit(job["query"], use_cache=False)
+                note += " A fresh run has started in the background; submit again later for updated results."
+            except JobQueueFull:
+                pass
+        st.session_state.cache_note = note
+    elif (result.get("checkpoint") or {}).get("resumed"):
+        st.session_state.cache_note = "Resumed the interrupted run of this query from its last completed step."
+
+    report_text = result.get("report", "") or result.get("final_report", "")
+    st.session_state.report_text = report_text
+    if not report_text.strip():
+        st.session_state.error_text = "Research completed, but no report text was returned."
+        return
+    try:
+        graph_dict = _formatter_to_adjacency(report_text, job["query"])
+        st.session_state.graph_dict = graph_dict
+        elements, stylesheet = _adjacency_to_elements(graph_dict)
+        st.session_state.elements = elements
+        st.session_state.stylesheet = stylesheet
+    except Exception as e:
+        st.session_state.error_text = f"KG build failed: {e}"
+
+
+@st.fragment(run_every=JOBS_POLL_SEC)
+def job_panel():
+    """Polls the running job: progress events, streamed sections, and a cancel button."""
+    job_id = st.session_state.get("job_id")
+    if not job_id:
+        return
+    service = get_job_service()
+    job = service.status(job_id, since_event=st.session_state.job_next_event)
+    if job is None:
+        st.session_state.job_id = None
+        st.session_state.error_text = "The research job expired before its result was collected."
+        st.rerun()
+
+    st.session_state.job_events = (st.session_state.job_events + [e["message"].strip() for e in job["events"]])[-200:]
+    st.session_state.job_next_event = job["next_event"]
+
+    if job["status"] not in ("queued", "running"):
+        with st.spinner("🕸️ Building knowledge graph…"):
+            finish_job(job)
+        st.rerun()  # whole page: render the persisted results below
+
+    label = "⏳ Queued, waiting for a free worker…" if job["status"] == "queued" else "⏳ Running research agent…"
+    with st.status(label, state="running", expanded=True):
+        st.markdown("  \n".join(st.session_state.job_events) or "Starting…")
+    render_sections(job["sections"])
+    if st.button("⏹ Cancel research", key=f"cancel_{job_id}"):
+        service.cancel(job_id)
+
+
+job_panel()
 
 # ---- Render persisted results ----
 if st.session_state.error_text:
@@ -485,6 +597,8 @@ if st.session_state.error_text:
 
 if st.session_state.report_text:
     st.success("Research completed!")
+    if st.session_state.cache_note:
+        st.info(st.session_state.cache_note)
     st.markdown("### Research Summary Report")
     st.markdown(st.session_state.report_text)
 
@@ -495,6 +609,17 @@ if st.session_state.report_text:
         use_container_width=True,
     )
 
+if st.session_state.trace and st.session_state.trace.get("spans"):
+    with st.expander("⏱️ Run timing (trace)", expanded=False):
+        render_trace(st.session_state.trace)
+        st.download_button(
+            "⬇️ Download trace.json",
+            data=json.dumps(st.session_state.trace, indent=2, default=str),
+            file_name=f"trace_{st.session_state.trace['run_id']}.json",
+            mime="application/json",
+            use_container_width=True,
+        )
+
 if st.session_state.graph_dict:
     st.markdown("### 🧠 Knowledge Graph JSON (from Final Summary)")
     st.caption(f"KG size → nodes: {len(st.session_state.graph_dict['nodes'])}, edges: {len(st.session_state.graph_dict['edges'])}")
@@ -642,7 +767,8 @@ if st.session_state.graph_dict:
 # Reset button
 if st.session_state.report_text or st.session_state.graph_dict or st.session_state.error_text:
     if st.button("🔄 Reset", key="reset_btn", use_container_width=True):
-        for k in ["run_id", "query", "report_text", "graph_dict", "elements", "stylesheet", "error_text"]:
+        for k in ["run_id", "query", "report_text", "graph_dict", "elements", "stylesheet", "error_text", "cache_note", "trace",
+                  "job_id", "job_events", "job_next_event"]:
             st.session_state.pop(k, None)
         st.rerun()
 
@@ -0,0 +1,199 @@
+# batch.py
+#
+# Headless batch runner: research many topics without Streamlit.
+#
+#   python batch.py queries.jsonl --out reports/ --concurrency 3
+#
+# queries.jsonl holds one query per line, either {"id": "...", "query": "..."} or a JSON string.
+# Each query gets <out>/<id>/ with report.md, answers.json, sources.json, kg.json and trace.json.
+# <out>/progress.jsonl records every finished query, so re-running the same command resumes.
+
+import os
+import re
+import sys
+import json
+import time
+import asyncio
+import logging
+import argparse
+import statistics
+from typing import Dict, List
+
+from dotenv import load_dotenv
+
+load_dotenv()
+log = logging.getLogger("batch")
+
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "2"))
+PROGRESS_FILE = "progress.jsonl"
+
+
+def load_queries(path: str) -> List[Dict]:
+    """Reads the JSONL input; ids default to a stable hash of the query so resumes line up."""
+    from agent.vectorstore import scope_for
+
+    queries, seen = [], set()
+    with open(path, encoding="utf-8") as f:
+        for lineno, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise SystemExit(f"{path}:{lineno}: invalid JSON ({e})")
+            if isinstance(record, str):
+                record = {"query": record}
+            query = (record.get("query") or "").strip()
+            if not query:
+                raise SystemExit(f"{path}:{lineno}: missing 'query'")
+            qid = str(record.get("id") or _slug(query, scope_for(query, "topic")[:8]))
+            if qid in (".", "..") or any(sep in qid for sep in ("/", "\\", "\0")):
+                # The id names the output directory under --out
+                raise SystemExit(f"{path}:{lineno}: id {qid!r} is not a valid directory name")
+            if qid in seen:
+                log.warning("Skipping duplicate id %s (line %d)", qid, lineno)
+                continue
+            seen.add(qid)
+            queries.append({"id": qid, "query": query})
+    return queries
+
+def _slug(query: str, suffix: str) -> str:
+    words = re.findall(r"[a-z0-9]+", query.lower())[:8]
+    return "-".join(words + [suffix])
+
+
+def load_progress(out_dir: str) -> Dict[str, Dict]:
+    """Last recorded status per id (later lines win)."""
+    path = os.path.join(out_dir, PROGRESS_FILE)
+    done = {}
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # a run killed mid-write leaves at most one torn line
+                done[entry["id"]] = entry
+    return done
+
+def _append_progress(out_dir: str, entry: Dict) -> None:
+    with open(os.path.join(out_dir, PROGRESS_FILE), "a", encoding="utf-8") as f:
+        f.write(json.dumps(entry) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+def _write(path: str, content: str) -> None:
+    # Write-then-rename: a killed run never leaves a half-written report behind
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(content)
+    os.replace(tmp, path)
+
+
+async def run_one(item: Dict, out_dir: str, use_cache: bool, with_kg: bool) -> Dict:
+    from graph import run_research
+    from agent.json_formatter import generate_graph_json
+    from agent.tracing import start_trace
+
+    target = os.path.join(out_dir, item["id"])
+    os.makedirs(target, exist_ok=True)
+    start = time.perf_counter()
+    with start_trace(item["id"], query=item["query"]) as trace:
+        result = await run_research(item["query"], use_cache=use_cache)
+        report = result.get("report", "")
+        if not report.strip():
+            raise RuntimeError("run finished without a report")
+        kg = await asyncio.to_thread(generate_graph_json, report, item["query"]) if with_kg else None
+
+    _write(os.path.join(target, "report.md"), report)
+    _write(os.path.join(target, "answers.json"), json.dumps({
+        "query": item["query"],
+        "subquestions": result.get("subquestions", []),
+        "answers": result.get("answers", []),
+        "executive_summary": result.get("executive_summary", ""),
+    }, indent=2, ensure_ascii=False))
+    _write(os.path.join(target, "sources.json"), json.dumps({
+        "sources": sorted(result.get("sources", [])),
+        "provenance": result.get("provenance", {}),
+    }, indent=2, ensure_ascii=False))
+    if kg is not None:
+        _write(os.path.join(target, "kg.json"), json.dumps(kg, indent=2, ensure_ascii=False))
+    _write(os.path.join(target, "trace.json"), trace.to_json())
+    return {"seconds": time.perf_counter() - start, "cached": bool(result.get("cache"))}
+
+
+async def run_batch(queries: List[Dict], out_dir: str, concurrency: int = BATCH_CONCURRENCY,
+                    use_cache: bool = True, with_kg: bool = True, retry_failed: bool = False) -> Dict:
+    os.makedirs(out_dir, exist_ok=True)
+    progress = load_progress(out_dir)
+    todo = [q for q in queries
+            if progress.get(q["id"], {}).get("status") != "done"
+            and (retry_failed or progress.get(q["id"], {}).get("status") != "failed")]
+    skipped = len(queries) - len(todo)
+    if skipped:
+        log.info("Resuming: %d of %d queries already recorded in %s", skipped, len(queries), PROGRESS_FILE)
+
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    durations, failed, cached = [], 0, 0
+    finished = 0
+
+    async def worker(item):
+        nonlocal failed, cached, finished
+        async with semaphore:
+            entry = {"id": item["id"], "query": item["query"]}
+            try:
+                outcome = await run_one(item, out_dir, use_cache, with_kg)
+                entry.update(status="done", seconds=round(outcome["seconds"], 2), cached=outcome["cached"])
+                durations.append(outcome["seconds"])
+                cached += outcome["cached"]
+            except Exception as e:
+                log.exception("Query %s failed", item["id"])
+                entry.update(status="failed", error=f"{type(e).__name__}: {e}")
+                failed += 1
+            _append_progress(out_dir, entry)
+            finished += 1
+            log.info("[%d/%d] %s %s", finished, len(todo), entry["status"], item["id"])
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(item) for item in todo))
+    wall = time.perf_counter() - start
+
+    return {
+        "total": len(queries),
+        "skipped": skipped,
+        "done": len(durations),
+        "failed": failed,
+        "served_from_cache": cached,
+        "wall_sec": round(wall, 2),
+        "queries_per_min": round(len(durations) / wall * 60, 2) if wall > 0 else 0.0,
+        "p50_sec": round(statistics.median(durations), 2) if durations else None,
+        "max_sec": round(max(durations), 2) if durations else None,
+    }
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Run research queries from a JSONL file without the Streamlit UI.")
+    ap.add_argument("queries", help="JSONL file: {\"id\": ..., \"query\": ...} or a JSON string per line")
+    ap.add_argument("--out", default="batch_out", help="output directory (also holds progress.jsonl)")
+    ap.add_argument("--concurrency", type=int, default=BATCH_CONCURRENCY, help="research runs in flight at once")
+    ap.add_argument("--no-kg", action="store_true", help="skip knowledge-graph generation")
+    ap.add_argument("--fresh", action="store_true", help="ignore the semantic run cache")
+    ap.add_argument("--retry-failed", action="store_true", help="re-run queries recorded as failed")
+    ap.add_argument("-v", "--verbose", action="store_true")
+    args = ap.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING,
+                        format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    log.setLevel(logging.INFO)
+
+    queries = load_queries(args.queries)
+    summary = asyncio.run(run_batch(queries, args.out, args.concurrency,
+                                    use_cache=not args.fresh, with_kg=not args.no_kg,
+                                    retry_failed=args.retry_failed))
+    print(json.dumps(summary, indent=2))
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,189 @@
+# benchmarks/fakes.py
+#
+# Deterministic local stand-ins for every external service the pipeline talks to.
+
+import json
+import time
+import asyncio
+import hashlib
+import random
+from typing import List
+from xml.sax.saxutils import escape
+
+import httpx
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.messages import AIMessage, AIMessageChunk
+
+TOPIC_WORDS = [
+    "diagnostics", "radiology", "imaging", "cancer", "screening", "privacy", "federated", "hospital",
+    "clinical", "trial", "model", "accuracy", "bias", "ethics", "regulation", "deployment", "sensor",
+    "genomics", "pathology", "triage", "workflow", "latency", "dataset", "annotation", "transformer",
+]
+FILLER_WORDS = ["the", "of", "and", "in", "for", "with", "on", "a", "to", "is", "by", "from"]
+
+
+def make_corpus(n_docs: int, words_per_doc: int = 400, duplicate_ratio: float = 0.1, seed: int = 0) -> List[Document]:
+    """Synthetic documents; `duplicate_ratio` of them are lightly edited copies (exercises dedupe)."""
+    rng = random.Random(seed)
+    docs = []
+    for i in range(n_docs):
+        if docs and rng.random() < duplicate_ratio:
+            base = rng.choice(docs)
+            text = base.page_content + f" (mirror {i})"
+        else:
+            words = [rng.choice(TOPIC_WORDS) if rng.random() < 0.4 else rng.choice(FILLER_WORDS)
+                     for _ in range(words_per_doc)]
+            text = " ".join(words) + f". Document {i}."
+        docs.append(Document(page_content=text, metadata={"source": f"https://bench.local/doc/{i}"}))
+    return docs
+
+
+class HashEmbeddings(Embeddings):
+    """Deterministic pseudo-embeddings (hashed bag of words); no model download, no GPU."""
+
+    def __init__(self, dim: int = 384):
+        self.dim = dim
+
+    def _embed(self, text: str) -> List[float]:
+        vec = np.zeros(self.dim, dtype=np.float32)
+        for word in text.lower().split():
+            h = int.from_bytes(hashlib.blake2b(word.encode("utf-8"), digest_size=8).digest(), "little")
+            vec[h % self.dim] += 1.0 if (h >> 32) & 1 else -1.0
+        norm = np.linalg.norm(vec)
+        return (vec / norm if norm else vec).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed(t) for t in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed(text)
+
+
+def hash_embeddings_factory(model_name: str, batch_size: int) -> Embeddings:
+    # Picklable factory for EmbeddingEngine worker processes
+    return HashEmbeddings()
+
+
+def _prompt_text(prompt) -> str:
+    if isinstance(prompt, str):
+        return prompt
+    return "\n".join(str(getattr(m, "content", m)) for m in prompt)
+
+
+class FakeChatModel:
+    """
+    Stand-in for the Groq-served chat models (planner, synthesizer, KG formatter).
+    Answers by prompt shape: numbered sub-questions, KG JSON, or a cited paragraph.
+    """
+
+    def __init__(self, model_name: str = "bench-llm", latency_ms: float = 0.0, tokens_per_sec: float = 0.0,
+                 n_subquestions: int = 4):
+        self.model_name = model_name
+        self.temperature = 0.0
+        self.latency = latency_ms / 1000.0
+        self.tokens_per_sec = tokens_per_sec
+        self.n_subquestions = n_subquestions
+
+    def _reply(self, prompt) -> str:
+        text = _prompt_text(prompt)
+        if "Decompose the following research question" in text:
+            topic = text.split("\n\n")[1] if "\n\n" in text else "the topic"
+            return "\n".join(f"{i}. Aspect {i} of {topic}?" for i in range(1, self.n_subquestions + 1))
+        if "knowledge graph" in text.lower():
+            nodes = [{"data": {"id": f"n{i}", "label": "CONCEPT", "name": w, "description": f"{w} in context"}}
+                     for i, w in enumerate(TOPIC_WORDS[:12])]
+            edges = [{"data": {"id": f"e{i}", "source": f"n{i}", "target": f"n{i + 1}", "label": "RELATES_TO",
+                               "description": "co-occurs"}} for i in range(11)]
+            return json.dumps({"nodes": nodes, "edges": edges})
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()[:8]
+        return (f"Synthetic finding {digest} drawn from the retrieved context [1] (85%). "
+                "A second supporting claim follows [2] (72%).\n\nReferences\n[1] bench.local\n[2] bench.local")
+
+    def _delay(self, text: str) -> float:
+        stream_time = len(text.split()) / self.tokens_per_sec if self.tokens_per_sec else 0.0
+        return self.latency + stream_time
+
+    def invoke(self, prompt, **kwargs) -> AIMessage:
+        reply = self._reply(prompt)
+        time.sleep(self._delay(reply))
+        return AIMessage(content=reply)
+
+    async def ainvoke(self, prompt, **kwargs) -> AIMessage:
+        reply = self._reply(prompt)
+        await asyncio.sleep(self._delay(reply))
+        return AIMessage(content=reply)
+
+    async def astream(self, prompt, **kwargs):
+        reply = self._reply(prompt)
+        await asyncio.sleep(self.latency)
+        words = reply.split(" ")
+        per_token = 1.0 / self.tokens_per_sec if self.tokens_per_sec else 0.0
+        for i, word in enumerate(words):
+            if per_token:
+                await asyncio.sleep(per_token)
+            yield AIMessageChunk(content=word if i == len(words) - 1 else word + " ")
+
+
+class FakeTavilyClient:
+    """
+    Returns `max_results` synthetic pages per query, deterministic per query text.
+    `search` stands in for TavilyClient; mount `handle` as the "tavily" transport
+    (httpx.MockTransport) to serve AsyncTavilyClient.
+    """
+
+    def __init__(self, latency_ms: float = 0.0, words_per_result: int = 300):
+        self.latency = latency_ms / 1000.0
+        self.words_per_result = words_per_result
+        self.calls = 0
+
+    def _results(self, query: str, max_results: int) -> dict:
+        self.calls += 1
+        seed = int(hashlib.sha256(query.encode("utf-8")).hexdigest()[:8], 16)
+        docs = make_corpus(max_results, self.words_per_result, duplicate_ratio=0.0, seed=seed)
+        return {"results": [{"url": f"https://web.bench.local/{seed}/{i}", "content": d.page_content}
+                            for i, d in enumerate(docs)]}
+
+    def search(self, query: str, max_results: int = 3, **kwargs) -> dict:
+        time.sleep(self.latency)
+        return self._results(query, max_results)
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(self.latency)
+        body = json.loads(request.content)
+        return httpx.Response(200, json=self._results(body["query"], body.get("max_results") or 3))
+
+
+def arxiv_feed(papers: List[dict]) -> str:
+    """Atom feed in the arXiv API's shape; papers are dicts with id, title, summary, authors, published."""
+    entries = "".join(
+        f"""<entry><id>http://arxiv.org/abs/{p['id']}</id><published>{p.get('published', '2024-01-01')}T00:00:00Z</published>
+<title>{escape(p['title'])}</title><summary>{escape(p.get('summary', ''))}</summary>
+{''.join(f'<author><name>{escape(a)}</name></author>' for a in p.get('authors', []))}
+<link href="http://arxiv.org/abs/{p['id']}" rel="alternate" type="text/html"/>
+<link title="pdf" href="http://arxiv.org/pdf/{p['id']}" rel="related" type="application/pdf"/></entry>"""
+        for p in papers)
+    return f'<?xml version="1.0" encoding="UTF-8"?><feed xmlns="http://www.w3.org/2005/Atom">{entries}</feed>'
+
+
+class FakeArxiv:
+    """Serves the arXiv API's Atom feed; mount `handle` as the "arxiv" transport (httpx.MockTransport)."""
+
+    def __init__(self, latency_ms: float = 0.0, papers: int = 3, words_per_paper: int = 200):
+        self.latency = latency_ms / 1000.0
+        self.papers = papers
+        self.words_per_paper = words_per_paper
+        self.calls = 0
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        query = request.url.params["search_query"]
+        max_results = int(request.url.params.get("max_results", self.papers))
+        seed = int(hashlib.sha256(query.encode("utf-8")).hexdigest()[8:16], 16)
+        docs = make_corpus(min(self.papers, max_results), self.words_per_paper, duplicate_ratio=0.0, seed=seed)
+        papers = [{"id": f"2401.{seed % 10000:04d}{i}v1", "published": f"2024-01-0{i + 1}",
+                   "title": f"{query} study {i}", "authors": ["A. Author"], "summary": d.page_content}
+                  for i, d in enumerate(docs)]
+        return httpx.Response(200, text=arxiv_feed(papers), headers={"content-type": "application/atom+xml"})
@@ -0,0 +1,174 @@
+# benchmarks/harness.py
+
+import os
+import gc
+import json
+import time
+import platform
+import statistics
+import subprocess
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from typing import Callable, Dict, List, Optional
+
+
+@dataclass
+class StageResult:
+    stage: str
+    repeats: int
+    items: int                 # work units per repeat (docs, chunks, queries...)
+    unit: str
+    p50_ms: float
+    p90_ms: float
+    p99_ms: float
+    mean_ms: float
+    throughput: float          # items per second at p50
+    peak_mem_mb: float         # peak traced Python/NumPy allocation during one repeat
+
+
+def _percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    pos = (len(sorted_values) - 1) * q
+    lo, hi = int(pos), min(int(pos) + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (pos - lo)
+
+
+def measure(stage: str, fn: Callable[[], object], items: int, unit: str, repeats: int = 5, warmup: int = 1,
+            setup: Optional[Callable[[], None]] = None) -> StageResult:
+    """
+    Runs fn() `warmup` + `repeats` times. Latency is wall time per call; peak memory
+    comes from tracemalloc on a separate final call, so tracing overhead never skews the timings.
+    `setup` (if given) runs before every call, outside the timed region.
+    """
+    for _ in range(warmup):
+        if setup:
+            setup()
+        fn()
+
+    timings = []
+    for _ in range(repeats):
+        if setup:
+            setup()
+        gc.collect()
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+
+    if setup:
+        setup()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    timings.sort()
+    p50 = _percentile(timings, 0.5)
+    return StageResult(
+        stage=stage,
+        repeats=repeats,
+        items=items,
+        unit=unit,
+        p50_ms=round(p50, 3),
+        p90_ms=round(_percentile(timings, 0.9), 3),
+        p99_ms=round(_percentile(timings, 0.99), 3),
+        mean_ms=round(statistics.fmean(timings), 3),
+        throughput=round(items / (p50 / 1000), 2) if p50 > 0 else float("inf"),
+        peak_mem_mb=round(peak / (1024 * 1024), 3),
+    )
+
+
+# ----------------- patching -----------------
+class Patcher:
+    """Minimal setattr/restore helper (the benchmarks must not depend on pytest)."""
+
+    def __init__(self):
+        self._undo = []
+
+    def setattr(self, obj, name: str, value) -> None:
+        self._undo.append((obj, name, getattr(obj, name)))
+        setattr(obj, name, value)
+
+    def setitem(self, mapping, key, value) -> None:
+        missing = key not in mapping
+        self._undo.append((mapping, key, None if missing else mapping[key], missing))
+        mapping[key] = value
+
+    def undo(self) -> None:
+        for entry in reversed(self._undo):
+            if len(entry) == 4:
+                mapping, key, old, missing = entry
+                if missing:
+                    mapping.pop(key, None)
+                else:
+                    mapping[key] = old
+            else:
+                obj, name, old = entry
+                setattr(obj, name, old)
+        self._undo = []
+
+@contextmanager
+def patched():
+    p = Patcher()
+    try:
+        yield p
+    finally:
+        p.undo()
+
+
+# ----------------- baselines -----------------
+def _git_commit() -> Optional[str]:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5)
+        return out.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+def to_report(results: List[StageResult], params: Dict) -> Dict:
+    return {
+        "meta": {
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "params": params,
+        },
+        "stages": {r.stage: asdict(r) for r in results},
+    }
+
+def save_report(report: Dict, path: str) -> None:
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+def load_report(path: str) -> Dict:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+def compare(current: Dict, baseline: Dict, tolerance: float = 0.2) -> List[Dict]:
+    """Stages whose p50 latency or peak memory grew by more than `tolerance` (0.2 = +20%)."""
+    regressions = []
+    for stage, now in current["stages"].items():
+        before = baseline.get("stages", {}).get(stage)
+        if not before:
+            continue
+        for metric in ("p50_ms", "peak_mem_mb"):
+            old, new = before.get(metric) or 0.0, now.get(metric) or 0.0
+            if old > 0 and new > old * (1 + tolerance):
+                regressions.append({"stage": stage, "metric": metric, "baseline": old, "current": new,
+                                    "change": round(new / old - 1, 3)})
+    return regressions
+
+def format_table(results: List[StageResult]) -> str:
+    header = f"{'stage':<14}{'items':>8}  {'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'throughput':>21}{'peak MB':>10}"
+    lines = [header, "-" * len(header)]
+    for r in results:
+        lines.append(f"{r.stage:<14}{r.items:>8}  {r.p50_ms:>10.2f}{r.p90_ms:>10.2f}{r.p99_ms:>10.2f}"
+                     f"{r.throughput:>11.1f} {r.unit + '/s':<9}{r.peak_mem_mb:>10.2f}")
+    return "\n".join(lines)
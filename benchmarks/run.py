@@ -0,0 +1,210 @@
+# benchmarks/run.py
+#
+# Offline per-stage benchmarks. Every external service is replaced by a deterministic
+# local stand-in (benchmarks/fakes.py), so numbers only move when our code does.
+#
+#   python -m benchmarks --docs 500 --out benchmarks/results/latest.json
+#   python -m benchmarks --baseline benchmarks/results/baseline.json --tolerance 0.2
+
+import os
+import sys
+import asyncio
+import logging
+import argparse
+import tempfile
+
+# Clients are constructed at import time and refuse to start without a key; the fakes never use it
+for key in ("GROQ_API_KEY", "TAVILY_API_KEY", "OPENAI_API_KEY"):
+    os.environ.setdefault(key, "bench")
+
+from benchmarks.fakes import (FakeArxiv, FakeChatModel, FakeTavilyClient, HashEmbeddings,
+                              hash_embeddings_factory, make_corpus)
+from benchmarks.harness import compare, format_table, load_report, measure, patched, save_report, to_report
+
+STAGES = ["chunking", "dedupe", "embedding", "embed_cache", "index", "retrieval",
+          "gather", "synthesis", "kg", "graph"]
+
+
+def _install_fakes(p, args):
+    """Points every module-level client of the pipeline at a local stand-in."""
+    import agent.planner as planner
+    import agent.synthesizer as synthesizer
+    import agent.json_formatter as json_formatter
+    import agent.gather_web as gather_web
+    import agent.http_pool as http_pool
+    import agent.gatherer as gatherer
+    import agent.llm_cache as llm_cache
+    import agent.search_cache as search_cache
+    import agent.run_cache as run_cache
+    import agent.rate_limit as rate_limit
+    import agent.vectorstore as vectorstore
+    import agent.tracing as tracing
+    import httpx
+
+    llm = FakeChatModel(latency_ms=args.llm_latency_ms, n_subquestions=args.subquestions)
+    for module, name in ((planner, "llm"), (synthesizer, "llm"), (json_formatter, "client")):
+        p.setattr(module, name, llm)
+    tavily = FakeTavilyClient(latency_ms=args.search_latency_ms)
+    p.setattr(gather_web, "client", tavily)
+    # Async provider clients reach the fakes through their connection pools' transports
+    p.setitem(http_pool.TRANSPORTS, "tavily", httpx.MockTransport(tavily.handle))
+    p.setitem(http_pool.TRANSPORTS, "arxiv", httpx.MockTransport(FakeArxiv(latency_ms=args.search_latency_ms).handle))
+
+    # Caches would turn every repeat after the first into a hit
+    p.setattr(llm_cache, "LLM_CACHE_ENABLED", False)
+    p.setattr(search_cache, "SEARCH_CACHE_ENABLED", False)
+    p.setattr(run_cache, "RUN_CACHE_ENABLED", False)
+    # Provider quotas are not what we measure here
+    p.setattr(rate_limit, "_limiters", {})
+    for provider in ("groq", "tavily", "arxiv"):
+        p.setitem(rate_limit.PROVIDER_LIMITS, provider, (1e9, 1_000_000))
+
+    embedding = HashEmbeddings()
+    pdf_chunks = make_corpus(args.pdf_chunks, 80, duplicate_ratio=0.0, seed=7)
+    p.setattr(gatherer, "_embedding_model", embedding)
+
+    def iter_local_pdfs(emb, cache, directory=None, **parse_options):
+        yield pdf_chunks, emb.embed_documents([d.page_content for d in pdf_chunks])
+
+    p.setattr(gatherer, "iter_local_pdfs", iter_local_pdfs)
+    p.setattr(vectorstore, "VECTOR_BACKEND", "local")
+    p.setattr(vectorstore, "LOCAL_INDEX_DIR", "")
+    p.setattr(tracing, "TRACE_DIR", "")
+    return embedding
+
+
+def _fresh_local_backend():
+    import agent.vectorstore as vectorstore
+    # A new process-wide store per repeat, so inserts are never skipped as "already present"
+    vectorstore.BACKENDS["local"] = vectorstore.LocalBackend()
+
+
+def run(args) -> list:
+    from langchain_core.documents import Document
+    from agent.chunker import chunk_documents
+    from agent.dedupe import SourceDeduplicator
+    from agent.embedding_cache import CachedEmbeddings
+    from agent.embedding_engine import EmbeddingEngine
+    from agent.vectorstore import open_vectorstore
+    from agent.json_formatter import generate_graph_json
+    import agent.vectorstore as vectorstore
+
+    selected = [s for s in (args.stages.split(",") if args.stages else STAGES) if s]
+    unknown = set(selected) - set(STAGES)
+    if unknown:
+        raise SystemExit(f"Unknown stage(s): {', '.join(sorted(unknown))}. Choose from: {', '.join(STAGES)}")
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix="bench-") as workdir, patched() as p:
+        p.setitem(vectorstore.BACKENDS, "local", vectorstore.LocalBackend())
+        embedding = _install_fakes(p, args)
+        corpus = make_corpus(args.docs, args.words, duplicate_ratio=args.duplicates)
+        chunks = chunk_documents(corpus)
+        texts = [c.page_content for c in chunks]
+        queries = [f"{corpus[i % len(corpus)].page_content.split('.')[0][:120]}" for i in range(args.queries)]
+        subquestions = [f"Aspect {i} of AI in diagnostics?" for i in range(1, args.subquestions + 1)]
+
+        def bench(stage, fn, items, unit, setup=None):
+            if stage in selected:
+                print(f"… {stage}", file=sys.stderr)
+                results.append(measure(stage, fn, items, unit, repeats=args.repeats, warmup=args.warmup, setup=setup))
+
+        bench("chunking", lambda: chunk_documents(corpus), len(corpus), "docs")
+        bench("dedupe", lambda: SourceDeduplicator().add_all([Document(page_content=d.page_content, metadata=dict(d.metadata)) for d in corpus]),
+              len(corpus), "docs")
+
+        engine = EmbeddingEngine("bench", workers=args.embed_workers, model_factory=hash_embeddings_factory)
+        bench("embedding", lambda: engine.embed_documents(texts), len(texts), "chunks")
+        engine.close()
+
+        cached = CachedEmbeddings(embedding, model_name="bench", root=os.path.join(workdir, "embeddings"))
+        cached.embed_documents(texts)  # warm: the stage measures the all-hits path
+        bench("embed_cache", lambda: cached.embed_documents(texts), len(texts), "chunks")
+
+        state = {}
+        def fresh_store():
+            _fresh_local_backend()
+            state["store"] = open_vectorstore(embedding, "bench")
+        bench("index", lambda: state["store"].add_documents(chunks), len(chunks), "chunks", setup=fresh_store)
+
+        fresh_store()
+        state["store"].add_documents(chunks)
+        index = state["store"]
+        bench("retrieval", lambda: [index.similarity_search(q, k=4) for q in queries], len(queries), "queries")
+
+        # The graph's own path: sources → one gather branch per sub-question → close
+        from agent.gatherer import close_sources, gather_subquestion, open_sources
+        from agent.synthesizer import SYNTH_MAX_CONCURRENCY, output_node, summarize_node, synthesize_branch
+
+        async def gather():
+            session = await open_sources("AI in diagnostics")
+            await asyncio.gather(*(gather_subquestion(subq, session) for subq in subquestions))
+            await close_sources(session)
+
+        async def synthesize():
+            slots = asyncio.Semaphore(max(1, SYNTH_MAX_CONCURRENCY))
+            findings = await asyncio.gather(*(synthesize_branch(i, subq, index, slots)
+                                              for i, subq in enumerate(subquestions)))
+            return await summarize_node({"findings": findings})
+
+        bench("gather", lambda: asyncio.run(gather()), len(subquestions), "subqs", setup=_fresh_local_backend)
+        bench("synthesis", lambda: asyncio.run(synthesize()), len(subquestions), "subqs")
+
+        report = output_node(asyncio.run(synthesize()))["report"]
+        bench("kg", lambda: generate_graph_json(report, topic="AI in diagnostics", use_cache=False), 1, "runs")
+
+        from graph import build_graph
+        bench("graph", lambda: asyncio.run(build_graph().ainvoke({"query": "AI in diagnostics"})), 1, "runs",
+              setup=_fresh_local_backend)
+    return results
+
+
+def parse_args(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m benchmarks", description="Offline per-stage pipeline benchmarks.")
+    ap.add_argument("--stages", default="", help=f"comma-separated subset of: {','.join(STAGES)}")
+    ap.add_argument("--docs", type=int, default=300, help="synthetic corpus size")
+    ap.add_argument("--words", type=int, default=400, help="words per synthetic document")
+    ap.add_argument("--duplicates", type=float, default=0.1, help="fraction of near-duplicate documents")
+    ap.add_argument("--pdf-chunks", type=int, default=200, help="synthetic local-PDF chunks seen by the gatherer")
+    ap.add_argument("--subquestions", type=int, default=4)
+    ap.add_argument("--queries", type=int, default=50, help="retrieval queries per repeat")
+    ap.add_argument("--embed-workers", type=int, default=0, help="EmbeddingEngine worker processes")
+    ap.add_argument("--llm-latency-ms", type=float, default=0.0, help="simulated LLM latency per call")
+    ap.add_argument("--search-latency-ms", type=float, default=0.0, help="simulated Tavily/arXiv latency per call")
+    ap.add_argument("--repeats", type=int, default=5)
+    ap.add_argument("--warmup", type=int, default=1)
+    ap.add_argument("--out", default="", help="write the results JSON here (e.g. a new baseline)")
+    ap.add_argument("--baseline", default="", help="compare against this results JSON")
+    ap.add_argument("--tolerance", type=float, default=0.2, help="allowed p50/peak-memory growth vs baseline")
+    return ap.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.WARNING)
+
+    results = run(args)
+    print(format_table(results))
+    params = {k: v for k, v in vars(args).items() if k not in ("out", "baseline", "tolerance")}
+    report = to_report(results, params)
+    if args.out:
+        save_report(report, args.out)
+        print(f"\nSaved results to {args.out}")
+
+    if args.baseline:
+        baseline = load_report(args.baseline)
+        comparable = lambda ps: {k: v for k, v in (ps or {}).items() if k != "stages"}
+        if comparable(baseline["meta"].get("params")) != comparable(params):
+            print("\n⚠️  Baseline was recorded with different parameters; comparison may be meaningless.")
+        regressions = compare(report, baseline, args.tolerance)
+        if regressions:
+            print(f"\nRegressions vs {args.baseline} (commit {baseline['meta'].get('commit')}):")
+            for r in regressions:
+                print(f"  {r['stage']:<14}{r['metric']:<12}{r['baseline']:>10.2f} → {r['current']:>10.2f}  (+{r['change']:.0%})")
+            return 1
+        print(f"\nNo regressions beyond {args.tolerance:.0%} vs {args.baseline}.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
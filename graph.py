@@ -1,33 +1,273 @@
 # graph.py
 
+import uuid
+import asyncio
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
 from langgraph.graph import StateGraph
-from typing import TypedDict
+from langgraph.types import Send
+from typing import Annotated, Optional, TypedDict
 from agent.planner import planner_node
-from agent.gatherer import gatherer_node
-from agent.synthesizer import synthesizer_node, output_node
+import agent.gatherer as gatherer
+from agent.gatherer import SourceSession, close_sources, gather_subquestion, open_sources, resume_sources
+from agent.checkpoints import latest_thread, open_checkpointer, prune_threads
+from agent.run_cache import get_run_cache
+from agent.events import emit
+from agent.tracing import current_span, span, start_trace, traced_node
+from agent.vectorstore import resolve_vectorstore, scope_for, vectorstore_handle
+from agent.synthesizer import (SYNTH_MAX_CONCURRENCY, announce_sections, output_node, summarize_node,
+                               synthesize_branch)
 
+def _merge_findings(left, right):
+    """Reducer for branch findings: keyed by sub-question index, so re-writing one is harmless."""
+    merged = {f["index"]: f for f in (left or [])}
+    merged.update({f["index"]: f for f in (right or [])})
+    return [merged[i] for i in sorted(merged)]
+
+def _merge_provenance(left, right):
+    merged = {doc_id: list(subqs) for doc_id, subqs in (left or {}).items()}
+    for doc_id, subqs in (right or {}).items():
+        refs = merged.setdefault(doc_id, [])
+        refs.extend(sq for sq in subqs if sq not in refs)
+    return merged
+
+# Everything here is checkpointed, so it stays plain data: the vectorstore is a
+# {"backend", "scope"} handle and the branches' shared objects are behind a session id
 class ResearchState(TypedDict, total=False):
     query: str
     subquestions: list[str]
-    vectorstore: object
+    session: Optional[str]
+    vectorstore: dict
+    findings: Annotated[list[dict], _merge_findings]
+    provenance: Annotated[dict[str, list[str]], _merge_provenance]
     answers: list[str]
     sources: list[str]
     report: str
     executive_summary: str
 
-def build_graph():
+
+@dataclass
+class RunSession:
+    """What the sub-question branches of one run share (per-run only; never checkpointed or returned)."""
+    sources: SourceSession
+    synth_slots: asyncio.Semaphore
+    loop: asyncio.AbstractEventLoop
+
+MAX_LIVE_SESSIONS = 64
+_sessions: "OrderedDict[str, RunSession]" = OrderedDict()
+_inflight: set[str] = set()   # sessions of graph runs still executing; never evicted
+_sessions_lock = threading.Lock()
+# Session ids registered by the graph run in this context, dropped when that run ends
+_run_sessions: ContextVar[Optional[set]] = ContextVar("run_sessions", default=None)
+
+def _new_session(sources: SourceSession) -> RunSession:
+    return RunSession(sources, asyncio.Semaphore(max(1, SYNTH_MAX_CONCURRENCY)), asyncio.get_running_loop())
+
+def _register(session_id: str, session: RunSession) -> RunSession:
+    owned = _run_sessions.get()
+    with _sessions_lock:
+        _sessions[session_id] = session
+        if owned is not None:
+            owned.add(session_id)
+            _inflight.add(session_id)
+        # Sessions left by runs outside run_research(); in-flight ones may exceed the cap
+        idle = [sid for sid in _sessions if sid not in _inflight]
+        for sid in idle[:max(0, len(_sessions) - MAX_LIVE_SESSIONS)]:
+            del _sessions[sid]
+    return session
+
+@contextmanager
+def _owning_sessions():
+    """Scope of one graph invocation: the sessions it opens are dropped when it returns, fails or is cancelled."""
+    owned: set = set()
+    token = _run_sessions.set(owned)
+    try:
+        yield
+    finally:
+        _run_sessions.reset(token)
+        with _sessions_lock:
+            dropped = [_sessions.pop(sid, None) for sid in owned]
+            _inflight.difference_update(owned)
+        for session in dropped:
+            if session is not None and session.sources.pdfs is not None:
+                session.sources.pdfs.cancel()   # no reduce step will wait for it now
+
+def _session(session_id: str, vectorstore_ref: dict) -> RunSession:
+    with _sessions_lock:
+        session = _sessions.get(session_id)
+    if session is None or session.loop is not asyncio.get_running_loop():
+        # Resumed in a new process or event loop: reopen the index by handle. The deduplicator
+        # starts over, and chunks indexed before the interruption are skipped by id.
+        session = _register(session_id, _new_session(resume_sources(resolve_vectorstore(vectorstore_ref, gatherer.get_embedding_model()))))
+    return session
+
+
+async def sources_node(state, config=None):
+    session_id = uuid.uuid4().hex
+    session = _register(session_id, _new_session(await open_sources(state["query"])))
+    announce_sections(state["subquestions"], config)
+    return {"session": session_id, "vectorstore": vectorstore_handle(session.sources.vectorstore),
+            "provenance": dict(session.sources.dedup.provenance)}
+
+def fan_out(state):
+    """One branch per sub-question (LangGraph runs them concurrently); straight to the reduce step if none."""
+    if not state["subquestions"]:
+        return "reduce"
+    return [Send("branch", {"index": idx, "subquestion": subq, "session": state["session"],
+                            "vectorstore": state["vectorstore"]})
+            for idx, subq in enumerate(state["subquestions"])]
+
+async def branch_node(task, config=None):
+    """
+    gather → index → retrieve → synthesize for a single sub-question. A branch answers as soon
+    as its own sources are indexed, without waiting for the other sub-questions' searches.
+    """
+    session, subq = _session(task["session"], task["vectorstore"]), task["subquestion"]
+    current_span().set(subquestion=subq)
+    provenance = await gather_subquestion(subq, session.sources)
+    finding = await synthesize_branch(task["index"], subq, session.sources.vectorstore, session.synth_slots, config)
+    return {"findings": [finding], "provenance": provenance}
+
+async def reduce_node(state, config=None):
+    await close_sources(_session(state["session"], state["vectorstore"]).sources)
+    summary = await summarize_node(state, config)
+    with _sessions_lock:
+        _sessions.pop(state["session"], None)
+    return {**summary, "session": None}
+
+def build_graph(checkpointer=None):
     graph = StateGraph(ResearchState)
 
-    graph.add_node("planner", planner_node)
-    graph.add_node("gatherer", gatherer_node, is_async=True)  # ✅ updated
-    graph.add_node("synthesizer", synthesizer_node, is_async=True)  # ✅ updated
-    graph.add_node("output", output_node)
+    # Each node runs in a span of the active trace (no-op when nothing is tracing)
+    graph.add_node("planner", traced_node("planner", planner_node))
+    graph.add_node("sources", traced_node("sources", sources_node))
+    graph.add_node("branch", traced_node("branch", branch_node))
+    graph.add_node("reduce", traced_node("reduce", reduce_node))
+    graph.add_node("output", traced_node("output", output_node))
 
     graph.set_entry_point("planner")
     graph.set_finish_point("output")
 
-    graph.add_edge("planner", "gatherer")
-    graph.add_edge("gatherer", "synthesizer")
-    graph.add_edge("synthesizer", "output")
+    # planner → sources → branch × N (map) → reduce → output
+    graph.add_edge("planner", "sources")
+    graph.add_conditional_edges("sources", fan_out, ["branch", "reduce"])
+    graph.add_edge("branch", "reduce")
+    graph.add_edge("reduce", "output")
+
+    # With a checkpointer, state is saved after every step: a failed run resumes where it stopped
+    return graph.compile(name="ResearchAgent", checkpointer=checkpointer)
+
+
+# Checkpoint threads a graph run in this process is executing; never resumed by a second caller
+_live_threads: set[str] = set()
+_live_lock = threading.Lock()
+
+def _claim_thread(thread_id: str) -> bool:
+    with _live_lock:
+        if thread_id in _live_threads:
+            return False
+        _live_threads.add(thread_id)
+        return True
+
+def _release_thread(thread_id: str) -> None:
+    with _live_lock:
+        _live_threads.discard(thread_id)
+
+def _run_config(config, thread_id: str, query_key: str) -> dict:
+    """Caller config plus the checkpoint thread; query_key (metadata) finds the run again later."""
+    config = dict(config or {})
+    config["configurable"] = {**(config.get("configurable") or {}), "thread_id": thread_id}
+    config["metadata"] = {**(config.get("metadata") or {}), "query_key": query_key}
+    return config
+
+async def _resumable_thread(graph, saver, query_key: str) -> Optional[str]:
+    """Thread of this query's latest run if it stopped before finishing (and isn't still running)."""
+    thread_id = await latest_thread(saver, query_key)
+    if thread_id is None:
+        return None
+    with _live_lock:
+        if thread_id in _live_threads:
+            return None
+    snapshot = await graph.aget_state({"configurable": {"thread_id": thread_id}})
+    return thread_id if snapshot.next else None
+
+async def run_research(query: str, config=None, use_cache: bool = True, resume: bool = True) -> dict:
+    """
+    Entry point in front of the graph: a near-duplicate of a past query is answered
+    from the semantic run cache, anything else runs the full graph (and is cached).
+    Cached results carry a "cache" entry: {"query", "similarity", "age_sec", "stale"}.
+    Graph runs are checkpointed (agent/checkpoints.py): if this query's last run failed
+    or was interrupted, it resumes from the last completed step instead of starting over.
+    Checkpointed results carry {"checkpoint": {"thread_id", "resumed"}} for rerun_from().
+    Spans are recorded into the caller's trace (agent.tracing.start_trace), or a new one.
+    """
+    with start_trace(query=query):
+        cache = get_run_cache(gatherer.get_embedding_model())
+        if cache is not None and use_cache:
+            with span("run_cache.lookup", kind="cache") as sp:
+                hit = await asyncio.to_thread(cache.lookup, query)
+                sp.set(cache="hit" if hit is not None else "miss")
+            if hit is not None:
+                return {**hit.result, "cache": {
+                    "query": hit.query, "similarity": hit.similarity, "age_sec": hit.age_sec, "stale": hit.stale,
+                }}
+
+        async with open_checkpointer() as saver:
+            graph = build_graph(checkpointer=saver)
+            if saver is None:
+                with _owning_sessions():
+                    result = await graph.ainvoke({"query": query}, config=config)
+            else:
+                query_key = scope_for(query, "topic")
+                thread_id = await _resumable_thread(graph, saver, query_key) if resume else None
+                # Claimed before running: a concurrent run of the same query starts its own thread
+                resumed = thread_id is not None and _claim_thread(thread_id)
+                if resumed:
+                    emit("checkpoint", "↩️ Resuming the interrupted run of this query from its last completed step.",
+                         thread_id=thread_id)
+                else:
+                    thread_id = uuid.uuid4().hex
+                    _claim_thread(thread_id)
+                current_span().set(thread_id=thread_id, resumed=resumed)
+                try:
+                    with _owning_sessions():
+                        result = await graph.ainvoke(None if resumed else {"query": query},
+                                                     config=_run_config(config, thread_id, query_key))
+                finally:
+                    _release_thread(thread_id)
+                result = {**result, "checkpoint": {"thread_id": thread_id, "resumed": resumed}}
+                await prune_threads(saver)
+        if cache is not None:
+            await asyncio.to_thread(cache.store, query, result)
+        return result
 
-    return graph.compile(name="ResearchAgent")
+async def rerun_from(thread_id: str, node: str, config=None) -> dict:
+    """
+    Re-runs a checkpointed run from just before `node`, reusing every earlier step:
+    "reduce" only rewrites the executive summary (local PDFs and the index are left
+    alone); "branch" re-gathers (mostly from the
+    search cache and already-indexed chunks) and re-answers every sub-question.
+    Raises RuntimeError while that run is still executing in this process.
+    """
+    with start_trace(thread_id=thread_id, rerun_from=node):
+        async with open_checkpointer() as saver:
+            if saver is None:
+                raise RuntimeError("Checkpoints are disabled (CHECKPOINTS=0).")
+            if not _claim_thread(thread_id):
+                raise RuntimeError(f"Run {thread_id} is still in progress.")
+            try:
+                graph = build_graph(checkpointer=saver)
+                async for snapshot in graph.aget_state_history({"configurable": {"thread_id": thread_id}}):
+                    if node in snapshot.next:
+                        run_config = dict(config or {})
+                        run_config["configurable"] = {**(run_config.get("configurable") or {}),
+                                                      **snapshot.config["configurable"]}
+                        with _owning_sessions():
+                            result = await graph.ainvoke(None, config=run_config)
+                        return {**result, "checkpoint": {"thread_id": thread_id, "resumed": True}}
+            finally:
+                _release_thread(thread_id)
+    raise ValueError(f"No checkpoint of run {thread_id} before node '{node}'.")
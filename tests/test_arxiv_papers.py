@@ -0,0 +1,114 @@
+# tests/test_arxiv_papers.py
+
+import asyncio
+
+import httpx
+import pytest
+
+import agent.http_pool as http_pool
+import agent.rate_limit as rate_limit
+import agent.search_cache as search_cache
+import agent.gather_academic as gather_academic
+from benchmarks.fakes import arxiv_feed
+
+class FakeArxivAPI:
+    """Two papers per query: one of its own and a survey every query finds."""
+
+    def __init__(self):
+        self.queries = []
+
+    def handle(self, request):
+        query = request.url.params["search_query"]
+        self.queries.append(query)
+        n = len(self.queries)
+        papers = [{"id": f"2401.{n:05d}v2", "published": "2024-01-02", "title": f"On {query}",
+                   "authors": ["Ada Lovelace", "Alan Turing"], "summary": "An   abstract\nabout it."},
+                  {"id": "2312.99999v1", "title": "A shared survey", "summary": "Survey."}]
+        return httpx.Response(200, text=arxiv_feed(papers[:int(request.url.params["max_results"])]))
+
+@pytest.fixture
+def client(monkeypatch):
+    fake = FakeArxivAPI()
+    monkeypatch.setitem(http_pool.TRANSPORTS, "arxiv", httpx.MockTransport(fake.handle))
+    monkeypatch.setattr(search_cache, "SEARCH_CACHE_ENABLED", False)
+    monkeypatch.setattr(rate_limit, "_limiters", {})
+    monkeypatch.setitem(rate_limit.PROVIDER_LIMITS, "arxiv", (1e6, 1000))
+    return fake
+
+def test_one_record_per_paper_with_metadata(client):
+    papers = asyncio.run(gather_academic.search_academic("federated learning", max_results=2))
+
+    own, shared = papers
+    assert own["url"] == "http://arxiv.org/abs/2401.00001v2" and own["arxiv_id"] == "2401.00001"
+    assert own["title"] == "On federated learning" and own["authors"] == "Ada Lovelace, Alan Turing"
+    assert own["published"] == "2024-01-02" and own["pdf_url"] == "http://arxiv.org/pdf/2401.00001v2"
+    assert own["content"] == "On federated learning\n\nAn abstract about it."
+    assert shared["arxiv_id"] == "2312.99999"
+
+def test_concurrent_searches_are_batched_and_share_papers(client):
+    async def main():
+        return await asyncio.gather(*(gather_academic.search_academic(q, max_results=2)
+                                      for q in ("privacy", "imaging", "privacy")))
+
+    privacy, imaging, again = asyncio.run(main())
+
+    assert client.queries == ["privacy", "imaging"]   # one batch, each distinct query once
+    assert again == privacy and privacy[1] is imaging[1]
+
+def test_each_query_of_a_batch_resolves_when_its_own_search_does(client, monkeypatch):
+    async def handler(request):
+        if "slow" in request.url.params["search_query"]:
+            await asyncio.sleep(0.5)
+        return client.handle(request)
+
+    monkeypatch.setitem(http_pool.TRANSPORTS, "arxiv", httpx.MockTransport(handler))
+
+    async def timed(query, start):
+        papers = await gather_academic.search_academic(query, max_results=2)
+        return papers, asyncio.get_running_loop().time() - start
+
+    async def main():
+        start = asyncio.get_running_loop().time()
+        return await asyncio.gather(timed("slow topic", start), timed("fast topic", start))
+
+    (slow, slow_after), (fast, fast_after) = asyncio.run(main())
+
+    assert fast_after < 0.4 <= slow_after
+    assert fast[0]["title"] == "On fast topic" and slow[0]["title"] == "On slow topic"
+
+def test_api_errors_are_not_cached_results(client, monkeypatch):
+    error = {"id": "http://arxiv.org/api/errors#incorrect_id_format", "title": "Error", "summary": "bad query"}
+    monkeypatch.setitem(http_pool.TRANSPORTS, "arxiv", httpx.MockTransport(
+        lambda request: httpx.Response(200, text=arxiv_feed([error]).replace("http://arxiv.org/abs/", ""))))
+    monkeypatch.setattr(rate_limit, "RATE_LIMIT_MAX_RETRIES", 0)
+    assert asyncio.run(gather_academic.search_academic("bad ( query")) == []
+
+def test_pdf_downloads_are_bounded_cached_and_skip_failures(tmp_path, monkeypatch):
+    active, peak, fetched = [0], [0], []
+
+    async def handler(request):
+        fetched.append(str(request.url))
+        active[0] += 1
+        peak[0] = max(peak[0], active[0])
+        await asyncio.sleep(0.05)
+        active[0] -= 1
+        if "broken" in request.url.path:
+            return httpx.Response(503)
+        if "huge" in request.url.path:
+            return httpx.Response(200, content=b"%PDF-1.4 " + b"x" * 4096)
+        return httpx.Response(200, content=b"%PDF-1.4 paper")
+
+    monkeypatch.setitem(http_pool.TRANSPORTS, "arxiv_pdf", httpx.MockTransport(handler))
+    papers = [{"arxiv_id": f"2401.0000{i}", "pdf_url": f"https://arxiv.org/pdf/2401.0000{i}"} for i in range(6)]
+    papers += [papers[0], {"arxiv_id": "math/0101001", "pdf_url": "https://arxiv.org/pdf/broken"},
+               {"arxiv_id": "2401.99999", "pdf_url": "https://arxiv.org/pdf/huge"}]
+    monkeypatch.setattr(gather_academic, "ARXIV_PDF_MAX_BYTES", 1024)
+
+    paths = asyncio.run(gather_academic.download_pdfs(papers, directory=str(tmp_path), concurrency=2))
+
+    assert sorted(paths) == [f"2401.0000{i}" for i in range(6)] and peak[0] <= 2
+    assert len(fetched) == 8 and not list(tmp_path.glob("*.part"))
+    assert not (tmp_path / "2401.99999.pdf").exists()   # over the size cap
+    assert (tmp_path / "2401.00003.pdf").read_bytes() == b"%PDF-1.4 paper"
+    assert asyncio.run(gather_academic.download_pdfs(papers[:6], directory=str(tmp_path))) == paths
+    assert len(fetched) == 8   # cached on disk
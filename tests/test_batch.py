@@ -0,0 +1,54 @@
+# tests/test_batch.py
+
+import os
+import json
+import asyncio
+
+os.environ.setdefault("GROQ_API_KEY", "test-key")
+os.environ.setdefault("TAVILY_API_KEY", "test-key")
+
+import pytest
+
+import graph
+import agent.json_formatter as json_formatter
+import batch
+
+def _fake_pipeline(monkeypatch, calls):
+    async def run_research(query, config=None, use_cache=True):
+        calls.append(query)
+        await asyncio.sleep(0.01)
+        if "fail" in query:
+            raise RuntimeError("provider down")
+        return {"query": query, "subquestions": ["q1"], "answers": ["a1"], "sources": ["https://x"],
+                "report": f"# Final Report\n\n{query}", "executive_summary": "s"}
+
+    monkeypatch.setattr(graph, "run_research", run_research)
+    monkeypatch.setattr(json_formatter, "generate_graph_json", lambda report, topic: {"nodes": [], "edges": []})
+
+def test_batch_writes_outputs_and_resumes(tmp_path, monkeypatch):
+    calls = []
+    _fake_pipeline(monkeypatch, calls)
+    src = tmp_path / "queries.jsonl"
+    src.write_text('{"id": "ai-dx", "query": "AI in diagnostics"}\n"quantum sensing"\n{"query": "please fail"}\n')
+    out = tmp_path / "out"
+
+    queries = batch.load_queries(str(src))
+    summary = asyncio.run(batch.run_batch(queries, str(out), concurrency=2))
+    assert (summary["done"], summary["failed"]) == (2, 1)
+    assert (out / "ai-dx" / "report.md").read_text().endswith("AI in diagnostics")
+    assert json.loads((out / "ai-dx" / "sources.json").read_text())["sources"] == ["https://x"]
+    assert (out / "ai-dx" / "kg.json").exists() and (out / "ai-dx" / "trace.json").exists()
+
+    # Resume: finished and failed queries are not re-run unless asked
+    calls.clear()
+    summary = asyncio.run(batch.run_batch(batch.load_queries(str(src)), str(out)))
+    assert calls == [] and summary["skipped"] == 3
+    summary = asyncio.run(batch.run_batch(batch.load_queries(str(src)), str(out), retry_failed=True))
+    assert calls == ["please fail"]
+
+@pytest.mark.parametrize("qid", ["../escape", "a/b", "..", "c:\\reports"])
+def test_ids_that_are_not_directory_names_are_rejected(tmp_path, qid):
+    src = tmp_path / "queries.jsonl"
+    src.write_text(json.dumps({"id": qid, "query": "AI in diagnostics"}) + "\n")
+    with pytest.raises(SystemExit, match="not a valid directory name"):
+        batch.load_queries(str(src))
@@ -0,0 +1,30 @@
+# tests/test_benchmarks.py
+
+import os
+
+os.environ.setdefault("GROQ_API_KEY", "test-key")
+os.environ.setdefault("TAVILY_API_KEY", "test-key")
+
+import agent.planner as planner
+from benchmarks.harness import compare, measure
+from benchmarks.run import parse_args, run
+
+def test_measure_reports_percentiles_and_throughput():
+    result = measure("noop", lambda: sum(range(1000)), items=10, unit="ops", repeats=5, warmup=0)
+    assert result.p50_ms <= result.p90_ms <= result.p99_ms
+    assert result.throughput > 0 and result.peak_mem_mb >= 0
+
+def test_compare_flags_only_growth_beyond_tolerance():
+    baseline = {"stages": {"index": {"p50_ms": 100.0, "peak_mem_mb": 10.0}}}
+    current = {"stages": {"index": {"p50_ms": 115.0, "peak_mem_mb": 13.0}, "new": {"p50_ms": 1.0}}}
+    regressions = compare(current, baseline, tolerance=0.2)
+    assert [(r["stage"], r["metric"]) for r in regressions] == [("index", "peak_mem_mb")]
+
+def test_offline_stages_run_without_network():
+    real_llm = planner.llm
+    args = parse_args(["--docs", "12", "--pdf-chunks", "5", "--queries", "3", "--repeats", "1", "--warmup", "0",
+                       "--stages", "chunking,dedupe,index,retrieval,gather,synthesis,kg,graph"])
+    results = {r.stage: r for r in run(args)}
+    assert set(results) == {"chunking", "dedupe", "index", "retrieval", "gather", "synthesis", "kg", "graph"}
+    assert results["retrieval"].items == 3
+    assert planner.llm is real_llm  # stand-ins are removed afterwards
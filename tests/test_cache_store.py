@@ -0,0 +1,31 @@
+# tests/test_cache_store.py
+
+import time
+from agent.cache_store import SQLiteTTLCache
+
+def test_round_trip_and_ttl_expiry(tmp_path):
+    cache = SQLiteTTLCache(str(tmp_path / "c.sqlite"), table="t")
+    cache.set("k", {"answer": [1, 2]})
+    cache.set("short", "gone soon", ttl=0.01)
+    time.sleep(0.02)
+    assert cache.get("k") == {"answer": [1, 2]}
+    assert cache.get("short") is None
+    assert cache.get("missing") is None
+    assert (cache.hits, cache.misses) == (1, 2)
+
+def test_lru_eviction(tmp_path):
+    cache = SQLiteTTLCache(str(tmp_path / "c.sqlite"), table="t", max_entries=2)
+    cache.set("a", 1)
+    time.sleep(0.001)
+    cache.set("b", 2)
+    time.sleep(0.001)
+    cache.get("a")  # "b" is now least recently used
+    time.sleep(0.001)
+    cache.set("c", 3)
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.get("b") is None
+
+def test_shared_file_between_instances(tmp_path):
+    path = str(tmp_path / "c.sqlite")
+    SQLiteTTLCache(path, table="t").set("k", "v")
+    assert SQLiteTTLCache(path, table="t").get("k") == "v"
@@ -0,0 +1,125 @@
+# tests/test_checkpoints.py
+
+import os
+import asyncio
+import contextvars
+from collections import OrderedDict
+from types import SimpleNamespace
+
+os.environ.setdefault("GROQ_API_KEY", "test-key")
+os.environ.setdefault("TAVILY_API_KEY", "test-key")
+
+import pytest
+from langchain_core.documents import Document
+
+import agent.checkpoints as checkpoints
+import agent.gatherer as gatherer
+import agent.planner as planner
+import graph
+from agent.tracing import start_trace
+from benchmarks.harness import patched
+from benchmarks.run import _install_fakes, parse_args
+
+@pytest.fixture
+def offline(tmp_path, monkeypatch):
+    monkeypatch.setattr(checkpoints, "CHECKPOINT_PATH", str(tmp_path / "checkpoints.sqlite"))
+    calls = {"plan": 0, "gather": [], "fail": set()}
+    with patched() as p:
+        _install_fakes(p, parse_args(["--pdf-chunks", "3", "--subquestions", "3"]))
+        real_plan = planner.llm.ainvoke
+
+        async def counting_plan(prompt, **kwargs):
+            # The fake model is shared with the synthesizer, which also calls it asynchronously
+            calls["plan"] += str(prompt).startswith("Decompose")
+            return await real_plan(prompt, **kwargs)
+
+        async def gather_all(subq, scheduler=None):
+            calls["gather"].append(subq)
+            if subq in calls["fail"]:
+                await asyncio.sleep(0.2)  # times out after the other branches have finished
+                raise TimeoutError("provider timed out")
+            return [Document(page_content=f"Evidence about {subq} " * 30, metadata={"source": f"src {subq}"})]
+
+        p.setattr(planner.llm, "ainvoke", counting_plan)
+        p.setattr(gatherer, "gather_all", gather_all)
+        yield calls
+
+def test_failed_run_resumes_from_the_last_completed_step(offline):
+    query = "AI in pathology"
+    offline["fail"].add("Aspect 2 of AI in pathology?")
+    sessions_before = set(graph._sessions)
+    with pytest.raises(TimeoutError):
+        asyncio.run(graph.run_research(query))
+    assert offline["plan"] == 1 and len(offline["gather"]) == 3
+    assert set(graph._sessions) == sessions_before and not graph._inflight   # the failed run's session is gone
+
+    offline["fail"].clear()
+    result = asyncio.run(graph.run_research(query))
+
+    assert result["checkpoint"]["resumed"] is True
+    assert offline["plan"] == 1                                           # planning was not redone
+    assert offline["gather"][3:] == ["Aspect 2 of AI in pathology?"]      # only the failed branch re-ran
+    assert len(result["answers"]) == 3 and "### 2. Aspect 2 of AI in pathology?" in result["report"]
+    assert result["vectorstore"] == {"backend": "local", "scope": result["vectorstore"]["scope"]}
+
+    # Finished runs are not resumed: the next submission starts a fresh run
+    again = asyncio.run(graph.run_research(query))
+    assert again["checkpoint"]["resumed"] is False and offline["plan"] == 2
+
+def test_rerun_from_reduce_only_rewrites_the_summary(offline):
+    first = asyncio.run(graph.run_research("AI in cardiology"))
+    gathered = len(offline["gather"])
+
+    with start_trace("rerun") as trace:
+        rerun = asyncio.run(graph.rerun_from(first["checkpoint"]["thread_id"], "reduce"))
+
+    assert len(offline["gather"]) == gathered and offline["plan"] == 1
+    assert not [s for s in trace.to_dict()["spans"] if s["name"] == "pdf.ingest"]   # PDFs left alone
+    assert rerun["answers"] == first["answers"] and rerun["executive_summary"]
+    with pytest.raises(ValueError):
+        asyncio.run(graph.rerun_from(first["checkpoint"]["thread_id"], "no-such-node"))
+
+def test_a_run_still_in_progress_is_not_resumed_by_a_second_caller(offline):
+    query = "AI in oncology"
+    offline["fail"].add("Aspect 1 of AI in oncology?")
+    with pytest.raises(TimeoutError):
+        asyncio.run(graph.run_research(query))
+    offline["fail"].clear()
+
+    async def latest():
+        async with checkpoints.open_checkpointer() as saver:
+            return await checkpoints.latest_thread(saver, graph.scope_for(query, "topic"))
+
+    live = asyncio.run(latest())
+    assert graph._claim_thread(live)   # as if another job were executing it right now
+    try:
+        second = asyncio.run(graph.run_research(query))
+        assert second["checkpoint"]["resumed"] is False and second["checkpoint"]["thread_id"] != live
+        with pytest.raises(RuntimeError):
+            asyncio.run(graph.rerun_from(live, "reduce"))
+    finally:
+        graph._release_thread(live)
+
+def test_sessions_of_runs_in_flight_are_never_evicted(monkeypatch):
+    monkeypatch.setattr(graph, "MAX_LIVE_SESSIONS", 3)
+    monkeypatch.setattr(graph, "_sessions", OrderedDict())
+    session = lambda: graph.RunSession(SimpleNamespace(pdfs=None), None, None)
+
+    with graph._owning_sessions():
+        graph._register("live", session())
+        for sid in ("a", "b", "c"):   # registered outside any run
+            contextvars.Context().run(graph._register, sid, session())
+        assert list(graph._sessions) == ["live", "b", "c"]   # oldest idle session evicted, not the live one
+
+    assert list(graph._sessions) == ["b", "c"] and not graph._inflight
+
+def test_prune_keeps_only_the_most_recent_runs(offline, monkeypatch):
+    for topic in ("one", "two", "three"):
+        asyncio.run(graph.run_research(f"AI in {topic}", resume=False))
+
+    async def threads():
+        async with checkpoints.open_checkpointer() as saver:
+            await checkpoints.prune_threads(saver, keep=2)
+            return {c.config["configurable"]["thread_id"] async for c in saver.alist(None)}
+
+    assert len(asyncio.run(threads())) == 2
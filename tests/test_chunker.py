@@ -1,6 +1,7 @@
 # tests/test_chunker.py
 
-from agent.chunker import chunk_text, chunk_documents
+import asyncio
+from agent.chunker import chunk_text, chunk_documents, iter_chunks, achunk_stream, make_splitter
 from langchain_core.documents import Document
 
 def test_chunk_text():
@@ -19,3 +20,21 @@ def test_chunk_documents():
     assert isinstance(chunks, list)
     assert all(isinstance(c, Document) for c in chunks)
     assert len(chunks) > 1
+
+def test_iter_chunks_keeps_metadata():
+    splitter = make_splitter(chunk_size=100, chunk_overlap=20)
+    docs = [Document(page_content="AI and medicine. " * 20, metadata={"source": "docs/a.pdf", "page": 3})]
+    chunks = list(iter_chunks(docs, splitter))
+    assert len(chunks) > 1
+    assert all(c.metadata == {"source": "docs/a.pdf", "page": 3} for c in chunks)
+
+def test_achunk_stream_yields_per_batch():
+    async def batches():
+        yield [Document(page_content="first source. " * 20, metadata={"source": "a"})]
+        yield [Document(page_content="second source. " * 20, metadata={"source": "b"})]
+
+    async def collect():
+        return [c.metadata["source"] async for c in achunk_stream(batches(), make_splitter(100, 20))]
+
+    sources = asyncio.run(collect())
+    assert sources[0] == "a" and sources[-1] == "b"
@@ -0,0 +1,44 @@
+# tests/test_dedupe.py
+
+from agent.dedupe import SourceDeduplicator, content_hash
+from langchain_core.documents import Document
+
+ARTICLE = (
+    "Deep learning models trained on chest radiographs now match radiologists at detecting "
+    "pneumonia and several other thoracic conditions, according to multiple retrospective studies "
+    "published over the last five years in peer reviewed journals across Europe and North America. "
+) * 3
+
+def test_exact_duplicates_collapse_across_subquestions():
+    pdf = Document(page_content=ARTICLE, metadata={"source": "docs/a.pdf", "page": 1})
+    web = Document(page_content=ARTICLE.upper(), metadata={"source": "https://example.com"})
+
+    dedup = SourceDeduplicator()
+    dedup.add_all([pdf])
+    for subq in ("q1", "q2"):
+        dedup.add_all([web], subq)
+
+    docs = dedup.documents
+    assert len(docs) == 1
+    assert docs[0].metadata["source"] == "docs/a.pdf"
+    assert docs[0].metadata["page"] == 1
+    assert dedup.provenance[content_hash(ARTICLE)] == ["q1", "q2"]
+
+def test_near_duplicates_collapse():
+    dedup = SourceDeduplicator(threshold=0.7)
+    a = Document(page_content=ARTICLE, metadata={"source": "a"})
+    b = Document(page_content=ARTICLE + " Retrieved 2024.", metadata={"source": "b"})
+    assert dedup.add(a, "q1") is not None
+    assert dedup.add(b, "q2") is None
+    assert dedup.dropped == 1
+    assert dedup.provenance[dedup.documents[0].metadata["doc_id"]] == ["q1", "q2"]
+
+def test_distinct_documents_are_kept():
+    dedup = SourceDeduplicator()
+    other = "Federated learning lets hospitals train shared models without moving patient records " * 3
+    kept = dedup.add_all([
+        Document(page_content=ARTICLE, metadata={"source": "a"}),
+        Document(page_content=other, metadata={"source": "b"}),
+        Document(page_content="short", metadata={"source": "c"}),
+    ], "q1")
+    assert len(kept) == 3
@@ -0,0 +1,46 @@
+# tests/test_embedding_cache.py
+
+from agent.embedding_cache import CachedEmbeddings
+
+class CountingEmbeddings:
+    def __init__(self):
+        self.seen = []
+
+    def embed_documents(self, texts):
+        self.seen.extend(texts)
+        return [[float(len(t)), 0.5, 1.0] for t in texts]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+def test_only_misses_are_embedded(tmp_path):
+    base = CountingEmbeddings()
+    cache = CachedEmbeddings(base, "test/model", root=str(tmp_path), dtype="float32")
+
+    first = cache.embed_documents(["alpha", "beta", "alpha"])
+    second = cache.embed_documents(["beta", "gamma"])
+
+    assert base.seen == ["alpha", "beta", "gamma"]
+    assert first == [[5.0, 0.5, 1.0], [4.0, 0.5, 1.0], [5.0, 0.5, 1.0]]
+    assert second == [[4.0, 0.5, 1.0], [5.0, 0.5, 1.0]]
+
+def test_vectors_persist_across_instances(tmp_path):
+    CachedEmbeddings(CountingEmbeddings(), "m", root=str(tmp_path)).embed_documents(["persisted"])
+    base = CountingEmbeddings()
+    reopened = CachedEmbeddings(base, "m", root=str(tmp_path))
+    assert reopened.embed_query("persisted") == [9.0, 0.5, 1.0]
+    assert base.seen == []
+
+def test_lru_eviction_respects_size_cap(tmp_path):
+    base = CountingEmbeddings()
+    cache = CachedEmbeddings(base, "m", root=str(tmp_path), max_entries=2)
+    cache.embed_documents(["a"])
+    cache.embed_documents(["bb"])
+    cache.embed_documents(["a"])      # touch "a" so "bb" is least recently used
+    cache.embed_documents(["ccc"])    # evicts "bb"
+    base.seen.clear()
+
+    cache.embed_documents(["a", "ccc"])
+    assert base.seen == []
+    cache.embed_documents(["bb"])
+    assert base.seen == ["bb"]
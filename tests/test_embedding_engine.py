@@ -0,0 +1,44 @@
+# tests/test_embedding_engine.py
+
+from agent.embedding_engine import EmbeddingEngine
+
+class RecordingModel:
+    def __init__(self):
+        self.batches = []
+
+    def embed_documents(self, texts):
+        self.batches.append(list(texts))
+        return [[float(len(t))] for t in texts]
+
+    def embed_query(self, text):
+        return [float(len(text))]
+
+def length_factory(model_name, batch_size):
+    return RecordingModel()
+
+def test_results_keep_input_order_and_batches_are_length_sorted():
+    model = RecordingModel()
+    engine = EmbeddingEngine("m", batch_size=2, model_factory=lambda name, bs: model)
+    texts = ["a", "ccc", "bb", "dddd", "e"]
+
+    vectors = engine.embed_documents(texts)
+
+    assert vectors == [[1.0], [3.0], [2.0], [4.0], [1.0]]
+    assert model.batches == [["dddd", "ccc"], ["bb", "a"], ["e"]]
+    assert engine.stats["chunks"] == 5 and engine.totals["chunks"] == 5
+
+def test_buffer_cap_splits_into_windows():
+    model = RecordingModel()
+    # ~10 characters of buffer → every text lands in its own window
+    engine = EmbeddingEngine("m", batch_size=8, max_buffer_mb=10 / (1024 * 1024),
+                             model_factory=lambda name, bs: model)
+    engine.embed_documents(["x" * 8, "y" * 8, "z" * 8])
+    assert len(model.batches) == 3
+
+def test_process_pool_mode():
+    engine = EmbeddingEngine("m", batch_size=2, workers=2, model_factory=length_factory)
+    try:
+        assert engine.embed_documents(["a", "bbb", "cc"]) == [[1.0], [3.0], [2.0]]
+        assert engine.embed_query("four") == [4.0]
+    finally:
+        engine.close()
@@ -0,0 +1,51 @@
+# tests/test_events.py
+
+import time
+import asyncio
+import threading
+
+from agent.events import CallbackSink, emit, use_event_sinks
+
+def test_events_are_batched_off_the_producer_thread():
+    batches, threads = [], set()
+
+    def record(events):
+        threads.add(threading.current_thread().name)
+        batches.append([e.message for e in events])
+
+    with use_event_sinks(CallbackSink(record), flush_interval=0.05):
+        for i in range(5):
+            emit("gather", f"event {i}", counts_seen=i)
+        time.sleep(0.15)
+        emit("index", "late event")
+
+    assert [m for batch in batches for m in batch] == [f"event {i}" for i in range(5)] + ["late event"]
+    assert batches[0] == [f"event {i}" for i in range(5)]  # one delivery for the burst
+    assert "event-bus" in threads
+
+def test_events_from_tasks_and_threads_reach_the_sink_with_fields():
+    events = []
+
+    async def work(subq):
+        emit("gather", f"done {subq}", subq, docs=3)
+        await asyncio.to_thread(emit, "embed", "embedded", chunks=7)
+
+    async def main():
+        await asyncio.gather(work("a"), work("b"))
+
+    with use_event_sinks(CallbackSink(events.extend)) as bus:
+        asyncio.run(main())
+
+    assert len(events) == len(bus.history) == 4
+    gathered = [e for e in events if e.stage == "gather"]
+    assert {e.subquestion for e in gathered} == {"a", "b"} and gathered[0].counts == {"docs": 3}
+
+def test_failing_sink_does_not_break_emitters():
+    def broken(events):
+        raise RuntimeError("websocket closed")
+
+    delivered = []
+    with use_event_sinks(CallbackSink(broken), CallbackSink(delivered.extend)):
+        emit("planner", "planned")
+    assert [e.stage for e in delivered] == ["planner"]
+    emit("planner", "no bus: logged, not raised")
@@ -0,0 +1,56 @@
+# tests/test_fanout.py
+
+import os
+import asyncio
+
+os.environ.setdefault("GROQ_API_KEY", "test-key")
+os.environ.setdefault("TAVILY_API_KEY", "test-key")
+
+from langchain_core.documents import Document
+
+import agent.gatherer as gatherer
+from agent.tracing import start_trace
+from benchmarks.harness import patched
+from benchmarks.run import _install_fakes, parse_args
+from graph import build_graph
+
+def _run(query, subquestions=3, gather_delays=None, **config):
+    sections = []
+    with patched() as p:
+        _install_fakes(p, parse_args(["--pdf-chunks", "3", "--subquestions", str(subquestions)]))
+
+        async def gather_all(subq, scheduler=None):
+            await asyncio.sleep((gather_delays or {}).get(subq[:8], 0.0))
+            shared = Document(page_content="A review shared by every sub-question " * 20, metadata={"source": "shared"})
+            own = Document(page_content=f"Evidence specific to {subq} " * 20, metadata={"source": f"src {subq}"})
+            return [shared, own]
+
+        p.setattr(gatherer, "gather_all", gather_all)
+        config = {"configurable": {"on_token": lambda key, title, delta: sections.append((key, title)), **config}}
+        with start_trace("fanout") as trace:
+            out = asyncio.run(build_graph().ainvoke({"query": query}, config=config))
+    return out, trace.to_dict()["spans"], sections
+
+def test_branches_reduce_in_order_with_shared_dedupe():
+    out, spans, sections = _run("AI in diagnostics")
+
+    assert out["subquestions"] == [f"Aspect {i} of AI in diagnostics?" for i in (1, 2, 3)]
+    assert [f["index"] for f in out["findings"]] == [0, 1, 2] and len(out["answers"]) == 3
+    assert "### 3. Aspect 3 of AI in diagnostics?" in out["report"] and out["executive_summary"]
+    assert out["session"] is None
+    ingest = next(s for s in spans if s["name"] == "pdf.ingest")
+    assert ingest["attrs"]["chunks"] == 3 and "error" not in ingest["attrs"]   # local PDFs were indexed
+    # The shared review was kept once and credited to every branch that found it
+    assert sorted(len(subqs) for subqs in out["provenance"].values() if len(subqs) > 1) == [3]
+    # Sections open in sub-question order before any branch streams
+    assert sections[:3] == [(0, "1. Aspect 1 of AI in diagnostics?"), (1, "2. Aspect 2 of AI in diagnostics?"),
+                            (2, "3. Aspect 3 of AI in diagnostics?")]
+
+def test_fast_branch_synthesizes_while_a_slow_branch_still_gathers():
+    _, spans, _ = _run("AI in radiology", subquestions=2, gather_delays={"Aspect 2": 0.5})
+
+    branches = {s["attrs"]["subquestion"]: s for s in spans if s["name"] == "branch"}
+    synth = {s["attrs"]["subquestion"]: s for s in spans if s["name"] == "synthesize.subquestion"}
+    slow_branch = branches["Aspect 2 of AI in radiology?"]
+    fast_synth = synth["Aspect 1 of AI in radiology?"]
+    assert fast_synth["start_ms"] + fast_synth["duration_ms"] < slow_branch["start_ms"] + 500
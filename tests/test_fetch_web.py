@@ -0,0 +1,93 @@
+# tests/test_fetch_web.py
+
+import asyncio
+
+import httpx
+import pytest
+
+import agent.fetch_web as fetch_web
+from agent.cache_store import SQLiteTTLCache
+from agent.fetch_web import PageFetcher, html_to_text
+
+PAGE = b"""<html><head><style>p {}</style><script>track()</script></head><body>
+<nav>Home | About</nav><article><h1>AI in radiology</h1><p>Models   read scans.</p></article>
+<footer>cookie banner</footer></body></html>"""
+
+@pytest.fixture(autouse=True)
+def page_cache(tmp_path, monkeypatch):
+    cache = SQLiteTTLCache(str(tmp_path / "pages.sqlite"), table="pages")
+    monkeypatch.setattr(fetch_web, "_cache", cache)
+    monkeypatch.setattr(fetch_web, "FETCH_CACHE_ENABLED", True)
+    monkeypatch.setattr(fetch_web, "FETCH_EXTRACT_WORKERS", 0)
+    return cache
+
+def _fetch(handler, urls, **kwargs):
+    async def main():
+        fetcher = PageFetcher(transport=httpx.MockTransport(handler), **kwargs)
+        try:
+            return await fetcher.fetch_all(urls)
+        finally:
+            await fetcher.aclose()
+    return asyncio.run(main())
+
+def test_html_to_text_keeps_the_readable_content():
+    assert html_to_text(PAGE) == "AI in radiology\nModels read scans."
+    assert html_to_text(b"plain  text\n\n\nbody", "text/plain") == "plain text\nbody"
+
+def test_fetches_concurrently_within_per_host_limits_and_byte_cap():
+    active, peak = {}, {}
+
+    async def handler(request):
+        host = request.url.host
+        active[host] = active.get(host, 0) + 1
+        peak[host] = max(peak.get(host, 0), active[host])
+        await asyncio.sleep(0.02)
+        active[host] -= 1
+        if request.url.path == "/pdf":
+            return httpx.Response(200, headers={"content-type": "application/pdf"}, content=b"%PDF")
+        if request.url.path == "/down":
+            return httpx.Response(503)
+        if request.url.path == "/huge":
+            return httpx.Response(200, headers={"content-type": "text/plain"}, content=b"x" * 5000)
+        return httpx.Response(200, headers={"content-type": "text/html; charset=utf-8"}, content=PAGE)
+
+    urls = [f"https://a.example/{i}" for i in range(6)] + ["https://b.example/1", "https://b.example/pdf",
+                                                         "https://b.example/down", "https://c.example/huge"]
+    texts = _fetch(handler, urls + ["https://a.example/0", "not-a-url"], per_host=2, max_bytes=1000)
+
+    assert sorted(texts) == sorted(urls[:7] + ["https://c.example/huge"])
+    assert texts["https://a.example/3"] == "AI in radiology\nModels read scans."
+    assert len(texts["https://c.example/huge"]) == 1000
+    assert peak["a.example"] == 2
+
+def test_stale_pages_are_revalidated_with_their_etag(monkeypatch):
+    seen = []
+
+    def handler(request):
+        seen.append(request.headers.get("if-none-match"))
+        if request.headers.get("if-none-match") == '"v1"':
+            return httpx.Response(304)
+        return httpx.Response(200, headers={"content-type": "text/html", "etag": '"v1"'}, content=PAGE)
+
+    url = "https://a.example/article"
+    first = _fetch(handler, [url])
+    assert _fetch(handler, [url]) == first and seen == [None]   # fresh: no request at all
+
+    monkeypatch.setattr(fetch_web, "FETCH_FRESH_SEC", 0.0)
+    monkeypatch.setattr(fetch_web, "_extract", None)             # a 304 must not re-parse
+    assert _fetch(handler, [url]) == first and seen == [None, '"v1"']
+
+def test_full_text_replaces_snippets_only_when_it_adds_content(monkeypatch):
+    def handler(request):
+        if request.url.path == "/gone":
+            return httpx.Response(404)
+        return httpx.Response(200, headers={"content-type": "text/html"}, content=PAGE)
+
+    async def main():
+        fetcher = PageFetcher(transport=httpx.MockTransport(handler))
+        monkeypatch.setattr(fetch_web, "get_fetcher", lambda: fetcher)
+        return await fetch_web.with_full_text([{"url": "https://a.example/ok", "content": "AI"},
+                                               {"url": "https://a.example/gone", "content": "snippet"}])
+
+    ok, gone = asyncio.run(main())
+    assert ok["content"] == "AI in radiology\nModels read scans." and gone["content"] == "snippet"
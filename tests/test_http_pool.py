@@ -0,0 +1,50 @@
+# tests/test_http_pool.py
+
+import asyncio
+
+import httpx
+
+import agent.http_pool as http_pool
+from langchain_openai import ChatOpenAI
+
+from benchmarks.fakes import FakeChatModel
+
+def test_one_pool_per_provider_per_loop(monkeypatch):
+    monkeypatch.setitem(http_pool.HTTP_POOL_LIMITS, "tavily", 3)
+    monkeypatch.setitem(http_pool.TRANSPORTS, "tavily", httpx.MockTransport(lambda r: httpx.Response(200, text="ok")))
+
+    async def main():
+        client = http_pool.get_async_client("tavily", base_url="https://api.tavily.com")
+        assert http_pool.get_async_client("tavily") is client
+        assert http_pool.get_async_client("arxiv") is not client
+        assert (await client.get("/search")).text == "ok"   # served by the mounted transport
+        await http_pool.aclose_pools()
+        assert client.is_closed
+        return client
+
+    first, second = asyncio.run(main()), asyncio.run(main())
+    assert first is not second   # a new loop gets new connections
+
+def test_loop_local_objects_and_non_openai_models_pass_through():
+    llm = FakeChatModel()
+
+    async def main():
+        built = http_pool.loop_local("thing", object)
+        assert http_pool.loop_local("thing", object) is built
+        assert http_pool.pooled_chat_model(llm) is llm
+        await http_pool.aclose_pools()
+        return built
+
+    assert asyncio.run(main()) is not asyncio.run(main())
+
+def test_chat_models_share_the_provider_pool():
+    llm = ChatOpenAI(model="llama3-70b-8192", api_key="test-key", base_url="https://api.groq.com/openai/v1")
+
+    async def main():
+        chat = http_pool.pooled_chat_model(llm)
+        assert chat is not llm and http_pool.pooled_chat_model(llm) is chat
+        assert chat.root_async_client._client is http_pool.get_async_client("groq")
+        assert chat.async_client is chat.root_async_client.chat.completions
+        await http_pool.aclose_pools()
+
+    asyncio.run(main())
@@ -0,0 +1,50 @@
+# tests/test_ingest_cache.py
+
+import shutil
+
+from agent.ingest_cache import PDFIngestCache, SeededEmbeddings
+
+class CountingEmbeddings:
+    def __init__(self):
+        self.calls = 0
+
+    def embed_documents(self, texts):
+        self.calls += 1
+        return [[float(len(t)), 1.0] for t in texts]
+
+    def embed_query(self, text):
+        return [float(len(text)), 1.0]
+
+def _fake_pdf(tmp_path, name="paper.pdf", body=b"%PDF-1.4 fake"):
+    path = tmp_path / name
+    path.write_bytes(body)
+    return str(path)
+
+def test_changed_content_or_model_misses(tmp_path):
+    root = str(tmp_path / "cache")
+    path = _fake_pdf(tmp_path)
+    cache = PDFIngestCache("model-a", root=root)
+    key = cache.key_for(path)
+
+    assert PDFIngestCache("model-b", root=root).key_for(path) != key
+    shutil.copy(path, tmp_path / "copy.pdf")
+    assert cache.key_for(str(tmp_path / "copy.pdf")) == key
+    _fake_pdf(tmp_path, body=b"%PDF-1.4 edited")
+    assert cache.key_for(path) != key
+
+def test_cache_directory_is_created_by_the_first_entry(tmp_path):
+    root = tmp_path / "cache"
+    cache = PDFIngestCache("test-model", root=str(root))
+    key = cache.key_for(_fake_pdf(tmp_path))
+
+    assert cache.load(str(tmp_path / "paper.pdf"), key) is None and not root.exists()
+    cache.store(key, [], [], [])
+    assert (root / key / "embeddings.npy").exists()
+
+def test_seeded_embeddings_only_embed_misses():
+    base = CountingEmbeddings()
+    seeded = SeededEmbeddings(base, {"known": [9.0, 9.0]})
+    vectors = seeded.embed_documents(["known", "new text"])
+    assert vectors[0] == [9.0, 9.0]
+    assert vectors[1] == [8.0, 1.0]
+    assert base.calls == 1
@@ -0,0 +1,96 @@
+# tests/test_jobs.py
+
+import os
+import time
+import asyncio
+
+os.environ.setdefault("GROQ_API_KEY", "test-key")
+os.environ.setdefault("TAVILY_API_KEY", "test-key")
+
+import pytest
+
+import graph
+from agent.events import emit
+from agent.jobs import JobQueueFull, JobService
+
+def _wait(service, job_id, statuses, timeout=5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = service.status(job_id)
+        if job["status"] in statuses:
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} stuck in {job['status']}")
+
+@pytest.fixture
+def fake_research(monkeypatch):
+    gates = {}
+
+    async def run_research(query, config=None, use_cache=True):
+        on_token = config["configurable"]["on_token"]
+        emit("planner", f"planned {query}", subquestions=1)
+        on_token("a0", "Q1", "partial ")
+        gate = gates.setdefault(query, asyncio.Event())
+        await gate.wait()
+        if "fail" in query:
+            raise RuntimeError("provider down")
+        on_token("a0", "Q1", "answer")
+        return {"query": query, "report": f"# Final Report\n\n{query}", "vectorstore": object()}
+
+    monkeypatch.setattr(graph, "run_research", run_research)
+    return gates
+
+def _release(service, gates, query):
+    service._loop.call_soon_threadsafe(lambda: gates[query].set())
+
+def test_jobs_run_bounded_stream_progress_and_finish(fake_research):
+    service = JobService(max_workers=1)
+    try:
+        first, second = service.submit("topic one"), service.submit("topic two")
+        assert service.submit("topic one") == first  # rerun of the same query joins the live job
+
+        job = _wait(service, first, {"running"})
+        time.sleep(0.3)  # let the event bus flush
+        job = service.status(first)
+        assert job["sections"] == [{"key": "a0", "title": "Q1", "text": "partial "}]
+        assert [e["message"] for e in job["events"]] == ["planned topic one"]
+        assert service.status(second)["status"] == "queued"
+
+        # Polls only carry events the caller has not seen yet
+        assert service.status(first, since_event=job["next_event"])["events"] == []
+
+        _release(service, fake_research, "topic one")
+        done = _wait(service, first, {"done"})
+        assert done["result"]["report"].endswith("topic one") and "vectorstore" not in done["result"]
+        assert done["sections"][0]["text"] == "partial answer" and done["trace"]["run_id"] == first
+        _wait(service, second, {"running"})
+    finally:
+        service.close()
+
+def test_jobs_cancel_and_failures(fake_research):
+    service = JobService(max_workers=1)
+    try:
+        running, queued = service.submit("slow topic"), service.submit("never started")
+        _wait(service, running, {"running"})
+        assert service.cancel(queued) and service.status(queued)["status"] == "cancelled"
+        assert service.cancel(running)
+        assert _wait(service, running, {"cancelled"})["finished_at"] is not None
+        assert not service.cancel(running)
+
+        failing = service.submit("please fail")
+        _wait(service, failing, {"running"})
+        _release(service, fake_research, "please fail")
+        assert "provider down" in _wait(service, failing, {"failed"})["error"]
+        assert service.status("unknown") is None
+    finally:
+        service.close()
+
+def test_submit_refuses_work_beyond_the_pending_limit(fake_research):
+    service = JobService(max_workers=1, max_pending=2)
+    try:
+        service.submit("a")
+        service.submit("b")
+        with pytest.raises(JobQueueFull):
+            service.submit("c")
+    finally:
+        service.close()
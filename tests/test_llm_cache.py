@@ -0,0 +1,58 @@
+# tests/test_llm_cache.py
+
+import asyncio
+
+import agent.llm_cache as llm_cache
+from agent.cache_store import SQLiteTTLCache
+
+class Msg:
+    def __init__(self, content):
+        self.content = content
+
+class FakeLLM:
+    model_name = "llama-test"
+    temperature = 0.0
+
+    def __init__(self):
+        self.calls = 0
+
+    def invoke(self, prompt):
+        self.calls += 1
+        return Msg(f"reply #{self.calls}")
+
+    async def ainvoke(self, prompt):
+        return self.invoke(prompt)
+
+    async def astream(self, prompt):
+        self.calls += 1
+        for part in ("stre", "amed"):
+            yield Msg(part)
+
+def _fresh_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(llm_cache, "_cache", SQLiteTTLCache(str(tmp_path / "llm.sqlite"), table="llm"))
+
+def test_repeated_prompt_is_served_from_cache(tmp_path, monkeypatch):
+    _fresh_cache(tmp_path, monkeypatch)
+    llm = FakeLLM()
+    assert llm_cache.invoke_cached(llm, "plan this") == "reply #1"
+    assert llm_cache.invoke_cached(llm, "plan this") == "reply #1"
+    assert llm_cache.invoke_cached(llm, "something else") == "reply #2"
+    assert llm.calls == 2
+
+def test_opt_out_and_params_are_part_of_the_key(tmp_path, monkeypatch):
+    _fresh_cache(tmp_path, monkeypatch)
+    llm = FakeLLM()
+    llm_cache.invoke_cached(llm, "p")
+    assert llm_cache.invoke_cached(llm, "p", use_cache=False) == "reply #2"
+    warmer = FakeLLM()
+    warmer.temperature = 0.7
+    assert llm_cache.cache_key(warmer, "p") != llm_cache.cache_key(llm, "p")
+
+def test_streaming_hit_is_delivered_in_one_piece(tmp_path, monkeypatch):
+    _fresh_cache(tmp_path, monkeypatch)
+    llm = FakeLLM()
+    first, second = [], []
+    assert asyncio.run(llm_cache.ainvoke_cached(llm, "q", on_token=first.append)) == "streamed"
+    assert asyncio.run(llm_cache.ainvoke_cached(llm, "q", on_token=second.append)) == "streamed"
+    assert first == ["stre", "amed"] and second == ["streamed"]
+    assert llm.calls == 1
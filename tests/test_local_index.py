@@ -0,0 +1,78 @@
+# tests/test_local_index.py
+
+import numpy as np
+from agent.local_index import LocalVectorStore
+from agent.vectorstore import query_vectorstore
+from langchain_core.documents import Document
+
+VOCAB = ["cancer", "radiology", "diagnostics", "privacy", "federated", "hospital", "imaging", "ethics"]
+
+class BagOfWordsEmbeddings:
+    def embed_documents(self, texts):
+        return [self.embed_query(t) for t in texts]
+
+    def embed_query(self, text):
+        words = text.lower().split()
+        return [float(words.count(w)) + 0.01 for w in VOCAB]
+
+DOCS = [
+    Document(page_content="AI detects cancer in radiology imaging", metadata={"source": "a", "scope": "x"}),
+    Document(page_content="federated learning protects hospital privacy", metadata={"source": "b", "scope": "x"}),
+    Document(page_content="ethics of AI diagnostics", metadata={"source": "c", "scope": "y"}),
+]
+
+def test_flat_search_ranks_by_cosine():
+    vs = LocalVectorStore.from_documents(DOCS, embedding=BagOfWordsEmbeddings())
+    results = query_vectorstore("radiology cancer imaging", vs, k=2)
+    assert [d.metadata["source"] for d in results][0] == "a"
+    assert len(results) == 2
+
+def test_metadata_filter():
+    vs = LocalVectorStore.from_documents(DOCS, embedding=BagOfWordsEmbeddings())
+    results = vs.similarity_search("privacy", k=3, filter={"scope": "y"})
+    assert [d.metadata["source"] for d in results] == ["c"]
+
+def test_save_and_load_round_trip(tmp_path):
+    vs = LocalVectorStore.from_documents(DOCS, embedding=BagOfWordsEmbeddings())
+    vs.save(str(tmp_path))
+    loaded = LocalVectorStore.load(str(tmp_path), BagOfWordsEmbeddings())
+    assert isinstance(loaded._vectors, np.memmap)
+    assert loaded.similarity_search("federated hospital", k=1)[0].metadata["source"] == "b"
+    loaded.add_documents([Document(page_content="privacy ethics", metadata={"source": "d"})])
+    assert len(loaded) == 4
+
+def test_a_mapped_index_can_be_saved_back_in_place(tmp_path):
+    LocalVectorStore.from_documents(DOCS, embedding=BagOfWordsEmbeddings()).save(str(tmp_path))
+    loaded = LocalVectorStore.load(str(tmp_path), BagOfWordsEmbeddings())
+    loaded.save(str(tmp_path))   # nothing new: rewrites the file it is mapping
+    loaded.add_documents([Document(page_content="privacy ethics", metadata={"source": "d"})])
+    loaded.save(str(tmp_path))
+
+    again = LocalVectorStore.load(str(tmp_path), BagOfWordsEmbeddings())
+    assert len(again) == 4 and again.similarity_search("federated hospital", k=1)[0].metadata["source"] == "b"
+    assert len(list(tmp_path.glob("*.npy"))) == 1 and not list(tmp_path.glob("*.part"))
+
+def test_ivf_search_finds_the_nearest_cluster():
+    rng = np.random.default_rng(0)
+    centers = np.eye(8, dtype=np.float32)
+    vectors = np.repeat(centers, 50, axis=0) + rng.normal(0, 0.05, size=(400, 8)).astype(np.float32)
+    docs = [Document(page_content=str(i), metadata={"cluster": i // 50}) for i in range(400)]
+    vs = LocalVectorStore(BagOfWordsEmbeddings(), ivf_lists=8, ivf_probes=2, ivf_min_size=100)
+    vs.add_vectors(vectors, docs)
+
+    hits = vs.similarity_search_by_vector(list(centers[3]), k=5)
+    assert len(hits) == 5
+    assert all(d.metadata["cluster"] == 3 for d in hits)
+
+def test_scoped_search_only_scores_its_own_rows():
+    rng = np.random.default_rng(1)
+    centers = np.eye(8, dtype=np.float32)
+    vectors = np.repeat(centers, 50, axis=0) + rng.normal(0, 0.05, size=(400, 8)).astype(np.float32)
+    docs = [Document(page_content=str(i), metadata={"cluster": i // 50, "scope": "ab"[i % 2]}) for i in range(400)]
+    vs = LocalVectorStore(None, ivf_lists=8, ivf_probes=2, ivf_min_size=100)
+    vs.add_vectors(vectors, docs, ids=[str(i) for i in range(400)])
+
+    hits = vs.similarity_search_by_vector(list(centers[3]), k=5, scope="b")
+    assert len(hits) == 5 and all(d.metadata["cluster"] == 3 and d.metadata["scope"] == "b" for d in hits)
+    assert vs.similarity_search_by_vector(list(centers[3]), k=5, scope="missing") == []
+    assert vs.known_ids(["7", "400"]) == {"7"}
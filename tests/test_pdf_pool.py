@@ -0,0 +1,87 @@
+# tests/test_pdf_pool.py
+
+import os
+import shutil
+
+import pytest
+
+from agent.gather_docs import iter_pdf_pages, load_local_pdfs
+from agent.ingest_cache import PDFIngestCache, iter_local_pdfs
+
+DOCS = os.path.join(os.path.dirname(__file__), "..", "docs")
+
+class CountingEmbeddings:
+    def __init__(self):
+        self.texts = 0
+
+    def embed_documents(self, texts):
+        self.texts += len(texts)
+        return [[float(len(t)), 1.0] for t in texts]
+
+    def embed_query(self, text):
+        return [float(len(text)), 1.0]
+
+def _docs(tmp_path, *names):
+    for name in names:
+        shutil.copy(os.path.join(DOCS, name), tmp_path / name)
+    return [str(tmp_path / name) for name in names]
+
+def test_pool_streams_page_batches_and_matches_inline_parsing(tmp_path):
+    path, = _docs(tmp_path, "ai_healthcare1.pdf")
+
+    batches = list(iter_pdf_pages([path], workers=2, pages_per_task=3))
+    inline = list(iter_pdf_pages([path], workers=0, pages_per_task=3))
+
+    assert len(batches) > 1 and all(not b.error for b in batches)
+    assert [b.last for b in batches].count(True) == 1
+    pages = sorted((p for b in batches for p in b.pages), key=lambda d: d.metadata["page"])
+    assert [p.page_content for p in pages] == [p.page_content for b in inline for p in b.pages]
+    assert [p.metadata["page"] for p in pages] == list(range(pages[0].metadata["total_pages"]))
+
+def test_page_cap_size_limit_and_unreadable_files(tmp_path):
+    path, = _docs(tmp_path, "ai_healthcare1.pdf")
+    broken = tmp_path / "broken.pdf"
+    broken.write_bytes(b"%PDF-1.4 not really")
+
+    capped = list(iter_pdf_pages([path], workers=2, max_pages=4, pages_per_task=3))
+    assert sorted(p.metadata["page"] for b in capped for p in b.pages) == [0, 1, 2, 3]
+
+    skipped, = iter_pdf_pages([path], workers=2, max_file_mb=0.01)
+    assert skipped.last and "limit" in skipped.error and not skipped.pages
+
+    failed = [b for b in iter_pdf_pages([str(broken), path], workers=2) if b.error]
+    assert [b.path for b in failed] == [str(broken)]
+
+@pytest.mark.parametrize("failing_last", [False, True])
+def test_a_file_failing_midway_does_not_stop_the_others(tmp_path, failing_last):
+    failing, good = _docs(tmp_path, "ai_healthcare1.pdf", "ai_healthcare3.pdf")
+    batches = []
+    for batch in iter_pdf_pages([good, failing] if failing_last else [failing, good], workers=1, pages_per_task=1):
+        if batch.path == failing and not any(b.path == failing for b in batches):
+            with open(failing, "wb") as f:   # unreadable from its second page range on
+                f.write(b"%PDF-1.4 truncated")
+        batches.append(batch)
+
+    broken = [b for b in batches if b.path == failing]
+    assert broken[-1].error and broken[-1].last and not any(b.error for b in broken[:-1])
+    parsed = [b for b in batches if b.path == good]
+    assert parsed and not any(b.error for b in parsed) and [b.last for b in parsed].count(True) == 1
+
+def test_streamed_ingest_caches_whole_files_once(tmp_path):
+    _docs(tmp_path, "ai_healthcare1.pdf", "ai_healthcare3.pdf")
+    cache = PDFIngestCache("test-model", root=str(tmp_path / "cache"))
+    embedding = CountingEmbeddings()
+
+    first = list(iter_local_pdfs(embedding, cache, str(tmp_path), workers=2, pages_per_task=2))
+    embedded = embedding.texts
+    second = list(iter_local_pdfs(embedding, cache, str(tmp_path), workers=2))
+
+    assert len(first) > len(second) == 2   # page batches, then one cached entry per file
+    assert embedding.texts == embedded
+    chunks = lambda batches: sorted(c.page_content for chunk_list, _ in batches for c in chunk_list)
+    assert chunks(second) == chunks(first)
+
+    # The eager loader returns every page in file, then page order
+    pages = load_local_pdfs(str(tmp_path))
+    order = [(os.path.basename(d.metadata["source"]), d.metadata["page"]) for d in pages]
+    assert order == sorted(order) and order[0] == ("ai_healthcare1.pdf", 0)
@@ -0,0 +1,76 @@
+# tests/test_rate_limit.py
+
+import time
+import asyncio
+
+import pytest
+
+import agent.rate_limit as rate_limit
+from agent.rate_limit import RateLimiter, TokenBucket, is_retryable, retry_after
+
+class RateLimited(Exception):
+    def __init__(self, retry_after=None):
+        super().__init__("Error code: 429 - rate limit reached")
+        self.status_code = 429
+        self.response = type("Resp", (), {"status_code": 429, "headers": {"retry-after": retry_after} if retry_after else {}})()
+
+@pytest.fixture(autouse=True)
+def fast_backoff(monkeypatch):
+    monkeypatch.setattr(rate_limit, "RATE_LIMIT_BACKOFF_BASE_SEC", 0.01)
+    monkeypatch.setattr(rate_limit, "RATE_LIMIT_BACKOFF_MAX_SEC", 0.05)
+
+def test_bucket_allows_a_burst_then_spaces_callers():
+    bucket = TokenBucket(rate_per_sec=10, burst=2)
+    waits = [bucket.reserve() for _ in range(4)]
+    assert waits[0] == waits[1] == 0
+    assert waits[2] == pytest.approx(0.1, abs=0.02)
+    assert waits[3] == pytest.approx(0.2, abs=0.02)
+
+def test_rate_limited_calls_are_retried_and_counted():
+    limiter = RateLimiter("test", rpm=6000, burst=10)
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise RateLimited()
+        return "ok"
+
+    assert limiter.call(flaky) == "ok"
+    assert limiter.stats["retries"] == 2 and limiter.stats["calls"] == 3
+
+def test_non_retryable_errors_and_exhausted_retries_raise():
+    limiter = RateLimiter("test", rpm=6000, burst=10, max_retries=1)
+    with pytest.raises(ValueError):
+        limiter.call(lambda: (_ for _ in ()).throw(ValueError("bad prompt")))
+
+    async def always_limited():
+        raise RateLimited()
+
+    with pytest.raises(RateLimited):
+        asyncio.run(limiter.acall(always_limited))
+    assert limiter.stats["failures"] == 2
+
+def test_retry_after_pauses_the_whole_bucket():
+    assert retry_after(RateLimited(retry_after="0.03")) == pytest.approx(0.03)
+    assert is_retryable(RuntimeError("429 Too Many Requests")) and not is_retryable(RuntimeError("invalid api key"))
+
+    limiter = RateLimiter("test", rpm=6000, burst=10)
+    calls = []
+
+    async def once_limited():
+        calls.append(time.monotonic())
+        if len(calls) == 1:
+            raise RateLimited(retry_after="0.05")
+        return "ok"
+
+    async def other():
+        await asyncio.sleep(0.01)  # arrives while the bucket is paused
+        return await limiter.acall(lambda: asyncio.sleep(0, "other"))
+
+    async def main():
+        return await asyncio.gather(limiter.acall(once_limited), other())
+
+    assert asyncio.run(main()) == ["ok", "other"]
+    assert calls[1] - calls[0] >= 0.04
+    assert limiter.stats["throttled"] >= 2 and limiter.stats["queue_delay_sec"] > 0
@@ -0,0 +1,57 @@
+# tests/test_run_cache.py
+
+import time
+
+import agent.run_cache as run_cache
+from agent.run_cache import SemanticRunCache
+
+VOCAB = ["ai", "medical", "diagnostics", "diagnosis", "healthcare", "climate", "policy", "ocean"]
+
+class BagOfWordsEmbeddings:
+    def __init__(self):
+        self.calls = 0
+
+    def embed_documents(self, texts):
+        return [self.embed_query(t) for t in texts]
+
+    def embed_query(self, text):
+        self.calls += 1
+        words = text.lower().replace("diagnosis", "diagnostics").split()
+        return [float(words.count(w)) + 0.01 for w in VOCAB]
+
+RESULT = {
+    "query": "AI in medical diagnostics",
+    "subquestions": ["What is it?"],
+    "answers": ["An answer."],
+    "report": "# Final Report",
+    "executive_summary": "Summary.",
+    "vectorstore": object(),
+}
+
+def test_paraphrase_hits_and_unrelated_query_misses(tmp_path):
+    cache = SemanticRunCache(BagOfWordsEmbeddings(), directory=str(tmp_path), threshold=0.9)
+    cache.store("AI in medical diagnostics", RESULT)
+
+    hit = cache.lookup("AI for medical diagnosis")
+    assert hit is not None and hit.similarity >= 0.9
+    assert hit.result["report"] == "# Final Report"
+    assert "vectorstore" not in hit.result
+    assert not hit.stale
+    assert cache.lookup("ocean climate policy") is None
+
+def test_entries_survive_restart_and_expire(tmp_path):
+    cache = SemanticRunCache(BagOfWordsEmbeddings(), directory=str(tmp_path), ttl=0.05)
+    cache.store("AI in medical diagnostics", RESULT)
+    reopened = SemanticRunCache(BagOfWordsEmbeddings(), directory=str(tmp_path), ttl=0.05)
+    assert reopened.lookup("AI in medical diagnostics") is not None
+    time.sleep(0.1)
+    assert reopened.lookup("AI in medical diagnostics") is None
+
+def test_empty_runs_are_not_cached_and_old_hits_are_stale(tmp_path, monkeypatch):
+    cache = SemanticRunCache(BagOfWordsEmbeddings(), directory=str(tmp_path))
+    cache.store("AI in medical diagnostics", {**RESULT, "report": ""})
+    assert cache.lookup("AI in medical diagnostics") is None
+
+    cache.store("AI in medical diagnostics", RESULT)
+    monkeypatch.setattr(run_cache, "RUN_CACHE_FRESH_SEC", 0.0)
+    assert cache.lookup("AI in medical diagnostics").stale
@@ -0,0 +1,40 @@
+# tests/test_scheduler.py
+
+import asyncio
+from agent.scheduler import GatherScheduler
+
+def test_provider_limit_is_enforced():
+    scheduler = GatherScheduler(max_concurrency=8, provider_limits={"web": 2})
+    active, peak = 0, 0
+
+    async def call():
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.01)
+        active -= 1
+
+    async def main():
+        await asyncio.gather(*(scheduler.run("web", call) for _ in range(6)))
+
+    asyncio.run(main())
+    assert peak == 2
+
+def test_global_limit_is_enforced():
+    scheduler = GatherScheduler(max_concurrency=3, provider_limits={"web": 5, "academic": 5})
+    active, peak = 0, 0
+
+    async def call():
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.01)
+        active -= 1
+
+    async def main():
+        tasks = [scheduler.run("web", call) for _ in range(4)]
+        tasks += [scheduler.run("academic", call) for _ in range(4)]
+        await asyncio.gather(*tasks)
+
+    asyncio.run(main())
+    assert peak == 3
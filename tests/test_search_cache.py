@@ -0,0 +1,77 @@
+# tests/test_search_cache.py
+
+import os
+import asyncio
+
+os.environ.setdefault("TAVILY_API_KEY", "test")
+
+import httpx
+import pytest
+
+import agent.rate_limit as rate_limit
+import agent.search_cache as search_cache
+import agent.gather_web as gather_web
+import agent.gather_academic as gather_academic
+import agent.http_pool as http_pool
+from benchmarks.fakes import arxiv_feed
+from agent.cache_store import SQLiteTTLCache
+
+class FakeTavily:
+    def __init__(self, fail=False):
+        self.calls = 0
+        self.fail = fail
+
+    def search(self, q, max_results=3):
+        self.calls += 1
+        if self.fail:
+            raise RuntimeError("429 Too Many Requests")
+        return {"results": [{"url": f"https://example.com/{i}", "content": q} for i in range(max_results)]}
+
+class FakeArxiv:
+    def __init__(self):
+        self.calls = 0
+
+    def handle(self, request):
+        self.calls += 1
+        query = request.url.params["search_query"]
+        return httpx.Response(200, text=arxiv_feed([{"id": "2401.00001v1", "title": query, "summary": "abstract"}]))
+
+@pytest.fixture(autouse=True)
+def fresh_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(search_cache, "_cache", SQLiteTTLCache(str(tmp_path / "search.sqlite"), table="search"))
+    monkeypatch.setattr(search_cache, "SEARCH_CACHE_ENABLED", True)
+    monkeypatch.setattr(rate_limit, "_limiters", {})
+    monkeypatch.setattr(rate_limit, "RATE_LIMIT_BACKOFF_MAX_SEC", 0.01)
+    for provider in ("tavily", "arxiv"):
+        monkeypatch.setitem(rate_limit.PROVIDER_LIMITS, provider, (1e6, 1000))
+
+def test_web_results_are_cached_per_clamped_query_and_limit(monkeypatch):
+    fake = FakeTavily()
+    monkeypatch.setattr(gather_web, "client", fake)
+    first = gather_web.search_web("AI   in diagnostics", max_results=2)
+    assert gather_web.search_web("AI in diagnostics ", max_results=2) == first
+    assert fake.calls == 1
+    assert len(gather_web.search_web("AI in diagnostics", max_results=3)) == 3
+    assert fake.calls == 2
+
+def test_failures_are_not_cached(monkeypatch):
+    monkeypatch.setattr(gather_web, "client", FakeTavily(fail=True))
+    assert gather_web.search_web("AI in diagnostics") == []
+    healthy = FakeTavily()
+    monkeypatch.setattr(gather_web, "client", healthy)
+    assert gather_web.search_web("AI in diagnostics")
+    assert healthy.calls == 1
+
+def test_arxiv_results_are_cached_with_their_own_ttl(monkeypatch):
+    fake = FakeArxiv()
+    monkeypatch.setitem(http_pool.TRANSPORTS, "arxiv", httpx.MockTransport(fake.handle))
+    monkeypatch.setitem(search_cache.SEARCH_CACHE_TTL, "arxiv", 0.0)
+    asyncio.run(gather_academic.search_academic("federated learning"))
+    asyncio.run(gather_academic.search_academic("federated learning"))
+    assert fake.calls == 2  # expired immediately
+
+    monkeypatch.setitem(search_cache.SEARCH_CACHE_TTL, "arxiv", 60.0)
+    asyncio.run(gather_academic.search_academic("federated learning"))
+    asyncio.run(gather_academic.search_academic("federated learning"))
+    assert fake.calls == 3
+    assert search_cache.search_key("arxiv", "q", 3) != search_cache.search_key("tavily", "q", 3)
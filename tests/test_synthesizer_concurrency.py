@@ -0,0 +1,88 @@
+# tests/test_synthesizer_concurrency.py
+
+import os
+import time
+import asyncio
+
+os.environ.setdefault("GROQ_API_KEY", "test-key")
+
+import pytest
+import agent.llm_cache as llm_cache
+import agent.rate_limit as rate_limit
+import agent.synthesizer as synthesizer
+from langchain_core.documents import Document
+
+@pytest.fixture(autouse=True)
+def no_llm_cache(monkeypatch):
+    monkeypatch.setattr(llm_cache, "LLM_CACHE_ENABLED", False)
+    # These tests measure our own concurrency, not the provider quota
+    monkeypatch.setattr(rate_limit, "_limiters", {})
+    monkeypatch.setitem(rate_limit.PROVIDER_LIMITS, "groq", (1e6, 1000))
+
+class SlowLLM:
+    def __init__(self, delays):
+        self.delays = delays
+        self.active = 0
+        self.peak = 0
+
+    async def ainvoke(self, prompt):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        first_line = prompt.splitlines()[0]
+        if "Context:" in prompt:  # only the per-sub-question calls are slow
+            await asyncio.sleep(self.delays.get(first_line, 0.0))
+        self.active -= 1
+        return type("Msg", (), {"content": f"answer to {first_line}"})()
+
+class StubStore:
+    def similarity_search(self, query, k=4):
+        return [Document(page_content=f"ctx {query}", metadata={"source": f"src-{query}"})]
+
+async def _synthesize(subquestions, vectorstore, config=None):
+    # What the graph does: a branch per sub-question under shared slots, then the reduce step
+    synthesizer.announce_sections(subquestions, config)
+    slots = asyncio.Semaphore(synthesizer.SYNTH_MAX_CONCURRENCY)
+    findings = await asyncio.gather(*(synthesizer.synthesize_branch(i, subq, vectorstore, slots, config)
+                                      for i, subq in enumerate(subquestions)))
+    return await synthesizer.summarize_node({"findings": findings}, config)
+
+def test_subquestions_run_concurrently_and_keep_order(monkeypatch):
+    llm = SlowLLM({"Sub-question: q1": 0.3, "Sub-question: q2": 0.2, "Sub-question: q3": 0.1})
+    monkeypatch.setattr(synthesizer, "llm", llm)
+    start = time.perf_counter()
+    out = asyncio.run(_synthesize(["q1", "q2", "q3"], StubStore()))
+    elapsed = time.perf_counter() - start
+
+    assert out["answers"] == ["answer to Sub-question: q1", "answer to Sub-question: q2", "answer to Sub-question: q3"]
+    assert sorted(out["sources"]) == ["src-q1", "src-q2", "src-q3"]
+    assert llm.peak == 3
+    assert elapsed < 0.5  # ~slowest branch, not the 0.6s sum
+
+def test_timeouts_fall_back_without_failing_the_run(monkeypatch):
+    monkeypatch.setattr(synthesizer, "llm", SlowLLM({"Sub-question: slow": 5.0}))
+    monkeypatch.setattr(synthesizer, "SYNTH_TIMEOUT_SEC", 0.1)
+    out = asyncio.run(_synthesize(["fast", "slow"], StubStore()))
+
+    assert out["answers"][0] == "answer to Sub-question: fast"
+    assert "timed out" in out["answers"][1]
+
+def test_tokens_stream_per_section_in_order(monkeypatch):
+    class StreamingLLM:
+        async def astream(self, prompt):
+            label = "summary" if "Executive Summary" in prompt else prompt.splitlines()[0]
+            for word in ("part-a ", "part-b"):
+                await asyncio.sleep(0)
+                yield type("Chunk", (), {"content": f"{label}:{word}"})()
+
+    monkeypatch.setattr(synthesizer, "llm", StreamingLLM())
+    events = []
+    config = {"configurable": {"on_token": lambda key, title, delta: events.append((key, title, delta))}}
+    out = asyncio.run(_synthesize(["q1", "q2"], StubStore(), config))
+
+    assert events[:2] == [(0, "1. q1", ""), (1, "2. q2", "")]
+    streamed = {}
+    for key, _, delta in events:
+        streamed[key] = streamed.get(key, "") + delta
+    assert streamed[0] == out["answers"][0] == "Sub-question: q1:part-a Sub-question: q1:part-b"
+    assert streamed["summary"].strip() == out["executive_summary"]
+    assert events[-1][0] == "summary"
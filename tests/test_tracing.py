@@ -0,0 +1,66 @@
+# tests/test_tracing.py
+
+import json
+import asyncio
+from typing import TypedDict
+
+from langgraph.graph import StateGraph
+
+from agent.tracing import current_span, span, start_trace, traced_node
+
+def test_spans_nest_across_tasks_and_threads():
+    def blocking_step():
+        with span("embedding", kind="embedding", texts=3):
+            pass
+
+    async def branch(name):
+        with span(name) as sp:
+            await asyncio.to_thread(blocking_step)
+            sp.set(docs=2)
+
+    async def run():
+        with span("gatherer", kind="node"):
+            await asyncio.gather(branch("a"), branch("b"))
+
+    with start_trace("r1") as trace:
+        asyncio.run(run())
+
+    spans = {s["span_id"]: s for s in trace.to_dict()["spans"]}
+    by_name = {}
+    for s in spans.values():
+        by_name.setdefault(s["name"], []).append(s)
+    node = by_name["gatherer"][0]
+    assert node["parent_id"] is None
+    assert {s["parent_id"] for s in by_name["a"] + by_name["b"]} == {node["span_id"]}
+    assert {spans[s["parent_id"]]["name"] for s in by_name["embedding"]} == {"a", "b"}
+    assert by_name["a"][0]["attrs"] == {"docs": 2}
+    assert json.loads(trace.to_json())["run_id"] == "r1"
+
+def test_spans_are_noops_without_a_trace_and_record_errors():
+    with span("orphan") as sp:
+        sp.set(x=1)  # nothing to record into, must not fail
+    with start_trace() as trace:
+        try:
+            with span("boom"):
+                raise ValueError("bad")
+        except ValueError:
+            pass
+    assert trace.to_dict()["spans"][0]["error"] == "ValueError: bad"
+
+class State(TypedDict, total=False):
+    value: str
+
+def test_traced_nodes_keep_the_config_parameter():
+    async def node(state, config=None):
+        current_span().set(seen=config["configurable"]["tag"])
+        return {"value": "done"}
+
+    graph = StateGraph(State)
+    graph.add_node("work", traced_node("work", node))
+    graph.set_entry_point("work")
+    graph.set_finish_point("work")
+
+    with start_trace() as trace:
+        out = asyncio.run(graph.compile().ainvoke({}, config={"configurable": {"tag": "t"}}))
+    assert out["value"] == "done"
+    assert trace.to_dict()["spans"][0]["attrs"] == {"seen": "t"}
@@ -0,0 +1,78 @@
+# tests/test_vectorstore_scopes.py
+
+from concurrent.futures import ThreadPoolExecutor
+
+from agent.vectorstore import DOCS_SCOPE, LocalBackend, ScopedVectorStore, chunk_id, query_vectorstore, scope_for
+from langchain_core.documents import Document
+
+class LengthEmbeddings:
+    def __init__(self):
+        self.embedded = 0
+
+    def embed_documents(self, texts):
+        self.embedded += len(texts)
+        return [[float(len(t)), 1.0] for t in texts]
+
+    def embed_query(self, text):
+        return [float(len(text)), 1.0]
+
+def _scoped(backend, embedding, scope):
+    return ScopedVectorStore(backend, backend.open(embedding), scope, embedding)
+
+def test_topic_scope_is_stable_and_run_scope_is_not():
+    assert scope_for("AI in  Diagnostics?") == scope_for("ai in diagnostics")
+    assert scope_for("ai in diagnostics", mode="run") != scope_for("ai in diagnostics", mode="run")
+
+def test_upsert_skips_chunks_already_in_scope():
+    backend, embedding = LocalBackend(), LengthEmbeddings()
+    docs = [Document(page_content="alpha", metadata={"source": "a"}),
+            Document(page_content="beta", metadata={"source": "b"})]
+
+    first = _scoped(backend, embedding, "topic-1")
+    assert len(first.add_documents(docs)) == 2
+    again = _scoped(backend, embedding, "topic-1")
+    assert again.add_documents(docs + [Document(page_content="gamma", metadata={"source": "c"})]) == [
+        chunk_id("topic-1", Document(page_content="gamma"))
+    ]
+    assert embedding.embedded == 3
+
+def test_search_is_confined_to_scope():
+    backend, embedding = LocalBackend(), LengthEmbeddings()
+    _scoped(backend, embedding, "x").add_documents([Document(page_content="in x", metadata={"source": "x"})])
+    y = _scoped(backend, embedding, "y")
+    y.add_documents([Document(page_content="in y", metadata={"source": "y"})])
+
+    results = query_vectorstore("in x", y, k=4)
+    assert [d.metadata["source"] for d in results] == ["y"]
+    assert results[0].metadata["scope"] == "y"
+
+def test_each_view_embeds_with_its_own_embedding():
+    backend, first, second = LocalBackend(), LengthEmbeddings(), LengthEmbeddings()
+    _scoped(backend, first, "x").add_documents([Document(page_content="run one")])
+    y = _scoped(backend, second, "y")
+    y.add_documents([Document(page_content="run two"), Document(page_content="and more")])
+
+    assert (first.embedded, second.embedded) == (1, 2)   # the shared store kept no run's embedding
+    assert len(y.similarity_search("run", k=4)) == 2
+    assert backend.open(second)._rows_in_scope("y").tolist() == [1, 2]
+
+def test_concurrent_upserts_add_each_chunk_once():
+    backend, embedding = LocalBackend(), LengthEmbeddings()
+    docs = [Document(page_content=f"chunk {i}") for i in range(20)]
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(lambda _: _scoped(backend, embedding, "topic").add_documents(docs), range(8)))
+
+    assert len(backend.open(embedding)) == 20
+    assert backend.open(embedding).add_vectors([[1.0, 1.0]], [docs[0]], ids=[chunk_id("topic", docs[0])]) == []
+
+def test_local_pdfs_are_indexed_once_for_every_topic():
+    backend, embedding = LocalBackend(), LengthEmbeddings()
+    pdf = [Document(page_content="a chunk of a local PDF", metadata={"source": "docs/a.pdf"})]
+    first = ScopedVectorStore(backend, backend.open(embedding), "topic-1", embedding, shared_scopes=(DOCS_SCOPE,))
+    second = ScopedVectorStore(backend, backend.open(embedding), "topic-2", embedding, shared_scopes=(DOCS_SCOPE,))
+
+    assert len(first.in_scope(DOCS_SCOPE).add_documents(pdf)) == 1
+    assert second.in_scope(DOCS_SCOPE).add_documents(pdf) == [] and embedding.embedded == 1
+    second.add_documents([Document(page_content="web page", metadata={"source": "web"})])
+    assert {d.metadata["source"] for d in second.similarity_search("chunk", k=4)} == {"docs/a.pdf", "web"}
+    assert [d.metadata["source"] for d in first.similarity_search("chunk", k=4)] == ["docs/a.pdf"]